@@ -0,0 +1,127 @@
+"""Load scenarios for the TMS flows testers and CI hit hardest.
+
+Seed first with ``bench/seed.sh``, then for example:
+
+    locust -f bench/locustfile.py --host http://localhost --headless -u 300 -r 20 -t 10m --csv bench/out/run
+
+Environment: BENCH_USERS, BENCH_PASSWORD, BENCH_TENANT_IDS, BENCH_PROJECT_KEY,
+BENCH_REPORT (JSON summary path), BENCH_MAX_P95_MS (fail the run above this p95).
+"""
+import json
+import os
+import random
+
+from locust import HttpUser, between, events, task
+
+
+USERS = int(os.getenv('BENCH_USERS', '300'))
+PASSWORD = os.getenv('BENCH_PASSWORD', 'bench-pass-123')
+TENANT_IDS = [int(t) for t in os.getenv('BENCH_TENANT_IDS', '1').split(',') if t.strip()]
+PROJECT_KEY = os.getenv('BENCH_PROJECT_KEY', 'BENCH1')
+
+
+def _results(payload):
+    if isinstance(payload, dict):
+        return payload.get('results') or []
+    return payload or []
+
+
+class Tester(HttpUser):
+    wait_time = between(0.5, 2.0)
+
+    def on_start(self):
+        n = random.randint(1, USERS)
+        self.tenant_id = random.choice(TENANT_IDS)
+        resp = self.client.post('/auth/api/auth/token', json={
+            'username': f'bench{n}@bench.local', 'password': PASSWORD, 'tenant_id': self.tenant_id,
+        }, name='login')
+        resp.raise_for_status()
+        self.headers = {
+            'Authorization': f"Bearer {resp.json()['access']}",
+            'X-Tenant-ID': str(self.tenant_id),
+        }
+        projects = _results(self._get(f'/tms/api/projects/?key={PROJECT_KEY}', 'projects?key').json())
+        self.project_id = projects[0]['id']
+        self.plan_ids = [p['id'] for p in _results(self._get(f'/tms/api/plans/?project={self.project_id}', 'plans?project').json())]
+        self.run_ids = [r['id'] for r in _results(self._get(f'/tms/api/runs/?project={self.project_id}&status=running', 'runs?status').json())]
+        self.open_instances = []
+        self.automation_refs = []
+
+    def _get(self, path, name):
+        return self.client.get(path, headers=self.headers, name=name)
+
+    def _post(self, path, name, payload=None):
+        return self.client.post(path, json=payload or {}, headers=self.headers, name=name)
+
+    @task(10)
+    def list_cases(self):
+        self._get(f'/tms/api/testcases/?project={self.project_id}', 'testcases?project')
+
+    @task(8)
+    def list_run_instances(self):
+        if not self.run_ids:
+            return
+        run_id = random.choice(self.run_ids)
+        resp = self._get(f'/tms/api/instances/?run={run_id}&status=not_started', 'instances?run')
+        if resp.ok:
+            items = _results(resp.json())
+            self.open_instances = [it['id'] for it in items]
+            self.automation_refs = [it['automation_ref'] for it in items if it.get('automation_ref')] or self.automation_refs
+
+    @task(5)
+    def pass_instance(self):
+        if not self.open_instances:
+            return
+        inst_id = self.open_instances.pop()
+        self._post(f'/tms/api/instances/{inst_id}/pass_case/', 'instances/pass_case')
+
+    @task(2)
+    def upload_results(self):
+        if not self.run_ids or not self.automation_refs:
+            return
+        results = [
+            {'automation_ref': ref, 'status': random.choice(('passed', 'passed', 'passed', 'failed')), 'actual_result': 'bench'}
+            for ref in self.automation_refs
+        ]
+        self._post(f'/tms/api/runs/{random.choice(self.run_ids)}/results/', 'runs/results', {'results': results})
+
+    @task(1)
+    def start_run(self):
+        if not self.plan_ids:
+            return
+        resp = self._post('/tms/api/runs/', 'runs (create)', {
+            'project': self.project_id, 'plan': random.choice(self.plan_ids), 'name': 'Bench load run',
+        })
+        if resp.ok:
+            run_id = resp.json()['id']
+            self._post(f'/tms/api/runs/{run_id}/start/', 'runs/start')
+
+
+@events.quitting.add_listener
+def _report(environment, **_kwargs):
+    """Print throughput and latency percentiles; optionally fail on a p95 budget."""
+    stats = environment.stats
+    rows = []
+    for entry in sorted(stats.entries.values(), key=lambda e: e.name):
+        if not entry.num_requests:
+            continue
+        rows.append({
+            'name': entry.name,
+            'method': entry.method,
+            'requests': entry.num_requests,
+            'failures': entry.num_failures,
+            'rps': round(entry.total_rps, 2),
+            'p50_ms': entry.get_response_time_percentile(0.50),
+            'p95_ms': entry.get_response_time_percentile(0.95),
+            'p99_ms': entry.get_response_time_percentile(0.99),
+        })
+    print(f"{'endpoint':<28}{'req':>8}{'fail':>6}{'rps':>9}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for r in rows:
+        print(f"{r['name']:<28}{r['requests']:>8}{r['failures']:>6}{r['rps']:>9}{r['p50_ms']:>8}{r['p95_ms']:>8}{r['p99_ms']:>8}")
+    report_path = os.getenv('BENCH_REPORT')
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as fh:
+            json.dump({'endpoints': rows, 'total_rps': round(stats.total.total_rps, 2)}, fh, indent=2)
+    budget = os.getenv('BENCH_MAX_P95_MS')
+    if budget and any(r['p95_ms'] > float(budget) for r in rows):
+        environment.process_exit_code = 1
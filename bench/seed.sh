@@ -0,0 +1,19 @@
+#!/bin/sh
+# Seed auth users, orgs tenants/memberships and the TMS dataset for the load tests.
+# Extra arguments go to `tms manage.py seed_bench`, e.g. ./bench/seed.sh --cases 20000 --flush
+set -e
+
+COMPOSE="docker compose -f docker-compose.dev.yml"
+USERS=${BENCH_USERS:-300}
+TENANTS=${BENCH_TENANTS:-1}
+PASSWORD=${BENCH_PASSWORD:-bench-pass-123}
+
+ids_from_json() {
+    python3 -c 'import json,sys; print(",".join(map(str, json.loads(sys.stdin.read().strip().splitlines()[-1])[sys.argv[1]])))' "$1"
+}
+
+USER_IDS=$($COMPOSE exec -T auth python manage.py seed_bench --users "$USERS" --password "$PASSWORD" | ids_from_json user_ids)
+TENANT_IDS=$($COMPOSE exec -T orgs python manage.py seed_bench --tenants "$TENANTS" --user-ids "$USER_IDS" | ids_from_json tenant_ids)
+$COMPOSE exec -T tms python manage.py seed_bench --tenants "$TENANT_IDS" --assignees "$USER_IDS" "$@"
+
+echo "BENCH_TENANT_IDS=$TENANT_IDS"
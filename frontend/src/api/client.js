@@ -97,6 +97,58 @@ class ApiClient {
     return response.json();
   }
 
+  // Server-Sent Events over fetch (EventSource cannot send Authorization/X-Tenant-ID).
+  // Reconnects after the server-provided retry delay until the signal is aborted.
+  // Rejects with status 401 once the session cannot be refreshed, so the caller can log out.
+  async streamEvents(path, onEvent, { signal } = {}) {
+    let retryMs = 3000;
+    while (!signal?.aborted) {
+      let unauthorized = false;
+      try {
+        const headers = { Accept: 'text/event-stream' };
+        if (this.token) headers.Authorization = `Bearer ${this.token}`;
+        if (this.tenantId) headers['X-Tenant-ID'] = this.tenantId;
+        const response = await fetch(`${API_BASE}${path}`, { headers, signal });
+        if (response.status === 401) {
+          // Reconnect with a refreshed token after the usual delay, or give up below
+          unauthorized = !(this.refreshToken && (await this.refreshAccess()));
+          throw new Error('HTTP 401');
+        }
+        if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let idx;
+          while ((idx = buffer.indexOf('\n\n')) >= 0) {
+            const frame = buffer.slice(0, idx);
+            buffer = buffer.slice(idx + 2);
+            let data = '';
+            frame.split('\n').forEach((line) => {
+              if (line.startsWith('data:')) data += line.slice(5).trim();
+              else if (line.startsWith('retry:')) retryMs = Number(line.slice(6)) || retryMs;
+            });
+            if (!data) continue;
+            try {
+              onEvent(JSON.parse(data));
+            } catch (_) {}
+          }
+        }
+      } catch (_) {
+        if (signal?.aborted) return;
+      }
+      if (unauthorized) {
+        const error = new Error('HTTP 401');
+        error.status = 401;
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, retryMs));
+    }
+  }
+
   async login(username, password, tenantId) {
     const data = await this.request('/auth/api/auth/token', {
       method: 'POST',
@@ -113,12 +113,13 @@ export function AuthProvider({ children }) {
     return data;
   };
 
-  const logout = () => {
+  // Stable identity: effects (e.g. the dashboard event stream) depend on it
+  const logout = useCallback(() => {
     api.clearAuth();
     setUser(null);
     setCurrentTenant(null);
     setMemberships([]);
-  };
+  }, []);
 
   if (loading) {
     return (
@@ -320,6 +320,27 @@ export default function DashboardPage({ onOpenAccount }) {
     };
   }, [refreshPlans, refreshRuns, refreshSections, selectedProjectId]);
 
+  useEffect(() => {
+    if (!selectedProjectId) return undefined;
+    // Live run status instead of polling /runs/
+    const controller = new AbortController();
+    api.streamEvents(
+      `/tms/api/projects/${selectedProjectId}/events/`,
+      (evt) => {
+        if (!evt?.type?.startsWith('run.') || !evt.data) return;
+        setRuns((prev) => {
+          if (!prev.some((run) => run.id === evt.data.id)) return prev;
+          return prev.map((run) => (run.id === evt.data.id ? { ...run, ...evt.data } : run));
+        });
+      },
+      { signal: controller.signal },
+    ).catch((error) => {
+      // The session expired and could not be refreshed
+      if (error?.status === 401) logout();
+    });
+    return () => controller.abort();
+  }, [selectedProjectId, logout]);
+
   const handleTenantSubmit = async (event) => {
     event.preventDefault();
     if (!tenantForm.name.trim()) {
@@ -119,3 +119,10 @@ CACHES = {
         }
     }
 }
+
+# Distributed tracing (OpenTelemetry, W3C traceparent propagation)
+OTEL_ENABLED = env.bool('OTEL_ENABLED', default=False)
+OTEL_SERVICE_NAME = env('OTEL_SERVICE_NAME', default=env('SERVICE_NAME', default='auth'))
+OTEL_EXPORTER_OTLP_ENDPOINT = env('OTEL_EXPORTER_OTLP_ENDPOINT', default=None)
+OTEL_TRACES_FILE = env('OTEL_TRACES_FILE', default=None)
+OTEL_TRACES_SAMPLER_RATIO = env.float('OTEL_TRACES_SAMPLER_RATIO', default=1.0)
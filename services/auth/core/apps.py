@@ -5,3 +5,7 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Core'
+
+    def ready(self):
+        from .tracing import configure_tracing
+        configure_tracing()
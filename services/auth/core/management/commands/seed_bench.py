@@ -0,0 +1,27 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Create benchmark users bench<N>@bench.local sharing one password (idempotent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--password', default='bench-pass-123')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        emails = [f'bench{i}@bench.local' for i in range(1, options['users'] + 1)]
+        existing = set(User.objects.filter(username__in=emails).values_list('username', flat=True))
+        # Hash once: every benchmark user shares the same credentials
+        password = make_password(options['password'])
+        User.objects.bulk_create([
+            User(username=email, email=email, password=password, first_name='Bench', last_name=email.split('@')[0])
+            for email in emails if email not in existing
+        ], batch_size=1000)
+        ids = list(User.objects.filter(username__in=emails).order_by('id').values_list('id', flat=True))
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} benchmark users ready ({len(ids) - len(existing)} created)'))
+        self.stdout.write(json.dumps({'user_ids': ids}))
@@ -0,0 +1,77 @@
+# Kept byte-identical in services/auth, services/orgs and services/tms: each service is
+# built from its own directory, so there is no shared package to import it from.
+# Service-specific values (service name, endpoints) come from the settings module.
+import os
+import threading
+
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_configured = False
+
+
+def _file_exporter(path):
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    out = open(path, 'a', encoding='utf-8')
+    # One JSON span per line, easy to grep or load into a viewer
+    return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + os.linesep)
+
+
+def configure_tracing():
+    """Install the OpenTelemetry tracer provider and instrumentations.
+
+    Covers incoming Django/DRF requests, outbound `requests` calls (W3C `traceparent`
+    is injected), psycopg2 queries issued by the ORM and, where the instrumentation is
+    installed, Celery tasks. Spans go to the OTLP collector at OTEL_EXPORTER_OTLP_ENDPOINT
+    or are appended to OTEL_TRACES_FILE.
+    Does nothing unless OTEL_ENABLED is set or when the SDK is not installed.
+    """
+    global _configured
+    if not getattr(settings, 'OTEL_ENABLED', False):
+        return False
+    with _lock:
+        if _configured:
+            return True
+        try:
+            from opentelemetry import trace, propagate
+            from opentelemetry.baggage.propagation import W3CBaggagePropagator
+            from opentelemetry.propagators.composite import CompositePropagator
+            from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+            from opentelemetry.instrumentation.django import DjangoInstrumentor
+            from opentelemetry.instrumentation.requests import RequestsInstrumentor
+            from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+        except ImportError:
+            return False
+
+        service_name = getattr(settings, 'OTEL_SERVICE_NAME', None) or os.getenv('SERVICE_NAME', 'django')
+        ratio = float(getattr(settings, 'OTEL_TRACES_SAMPLER_RATIO', 1.0))
+        provider = TracerProvider(
+            resource=Resource.create({'service.name': service_name}),
+            sampler=ParentBased(TraceIdRatioBased(ratio)),
+        )
+        endpoint = getattr(settings, 'OTEL_EXPORTER_OTLP_ENDPOINT', None)
+        traces_file = getattr(settings, 'OTEL_TRACES_FILE', None)
+        if endpoint:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+        if traces_file:
+            provider.add_span_processor(BatchSpanProcessor(_file_exporter(traces_file)))
+        trace.set_tracer_provider(provider)
+        propagate.set_global_textmap(CompositePropagator([TraceContextTextMapPropagator(), W3CBaggagePropagator()]))
+
+        DjangoInstrumentor().instrument()
+        RequestsInstrumentor().instrument()
+        # psycopg2-binary does not satisfy the instrumentor's distribution check
+        Psycopg2Instrumentor().instrument(skip_dep_check=True)
+        try:
+            from opentelemetry.instrumentation.celery import CeleryInstrumentor
+            CeleryInstrumentor().instrument()
+        except ImportError:
+            pass
+        _configured = True
+        return True
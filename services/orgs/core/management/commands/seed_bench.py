@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Tenant, Role, Membership
+
+
+def _parse_ids(raw):
+    ids = []
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+class Command(BaseCommand):
+    help = 'Create benchmark tenants with default roles and memberships for the given users (idempotent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=1)
+        parser.add_argument('--user-ids', required=True, help='e.g. "2-301" or "2,3,4"; the first user owns the tenants')
+
+    def handle(self, *args, **options):
+        user_ids = _parse_ids(options['user_ids'])
+        if not user_ids:
+            raise CommandError('--user-ids is empty')
+        tenant_ids = []
+        with transaction.atomic():
+            for n in range(1, options['tenants'] + 1):
+                tenant, _ = Tenant.objects.get_or_create(
+                    slug=f'bench-{n}', defaults={'name': f'Benchmark {n}', 'owner_user_id': user_ids[0]},
+                )
+                roles = {}
+                for key in ('owner', 'admin', 'member'):
+                    roles[key], _ = Role.objects.get_or_create(
+                        tenant=tenant, key=key, defaults={'name': key.title(), 'is_system': True},
+                    )
+                Membership.objects.bulk_create([
+                    Membership(tenant=tenant, user_id=uid, role=roles['owner' if idx == 0 else 'member'])
+                    for idx, uid in enumerate(user_ids)
+                ], ignore_conflicts=True, batch_size=1000)
+                tenant_ids.append(tenant.id)
+        self.stdout.write(self.style.SUCCESS(f'{len(tenant_ids)} benchmark tenants ready for {len(user_ids)} users'))
+        self.stdout.write(json.dumps({'tenant_ids': tenant_ids}))
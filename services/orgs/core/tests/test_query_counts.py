@@ -0,0 +1,136 @@
+"""Query-count and latency regression harness for every router endpoint.
+
+Mirrors services/tms/core/tests/test_query_counts.py: each endpoint runs against
+fixtures with 10, 100 and 1000 children (roles, memberships, invitations, ...)
+and must issue the same number of queries at every size. Set
+QUERY_BUDGET_REPORT=<path> to dump the measurements as JSON.
+
+    docker compose -f docker-compose.dev.yml exec -T orgs python manage.py test core
+"""
+import json
+import os
+import sys
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.auth import ExternalUser
+from core.models import Tenant, Role, Membership, Invitation, ProjectRole, ProjectMembership
+from orgs_service.urls import router
+
+
+SIZES = (10, 100, 1000)
+USER_ID = 1
+PROJECT_ID = 1
+
+
+def build_fixture(n):
+    tenant = Tenant.objects.create(name=f'Budget {n}', slug=f'budget-{n}', owner_user_id=USER_ID)
+    Tenant.objects.bulk_create([Tenant(name=f'Budget {n}/{i}', slug=f'budget-{n}-{i}') for i in range(n)])
+    roles = Role.objects.bulk_create([Role(tenant=tenant, key=f'role{i}', name=f'Role {i}') for i in range(n)])
+    Membership.objects.bulk_create([
+        Membership(tenant=tenant, user_id=USER_ID + i, role=roles[i % len(roles)]) for i in range(n)
+    ])
+    invitations = Invitation.objects.bulk_create([
+        Invitation(tenant=tenant, email=f'user{i}@budget{n}.local', role=roles[0], token=f'budget-{n}-{i}') for i in range(n)
+    ])
+    project_roles = ProjectRole.objects.bulk_create([
+        ProjectRole(tenant=tenant, project_id=PROJECT_ID, key=f'prole{i}', name=f'Project role {i}') for i in range(n)
+    ])
+    ProjectMembership.objects.bulk_create([
+        ProjectMembership(tenant=tenant, project_id=PROJECT_ID, user_id=USER_ID + i, role=project_roles[i % len(project_roles)])
+        for i in range(n)
+    ])
+    return {
+        'n': n,
+        'tenant': tenant.id,
+        'role': roles[0].id,
+        'membership': Membership.objects.filter(tenant=tenant).order_by('id').values_list('id', flat=True).first(),
+        'invitation': Invitation.objects.filter(token=invitations[0].token).values_list('id', flat=True).first(),
+        'resend_invitation': Invitation.objects.filter(token=invitations[1].token).values_list('id', flat=True).first(),
+        'project_role': project_roles[0].id,
+        'project_membership': ProjectMembership.objects.filter(tenant=tenant).order_by('id').values_list('id', flat=True).first(),
+    }
+
+
+# (basename, label, method, path, payload) -- path/payload are callables of the fixture context
+SCENARIOS = [
+    ('tenant', 'list', 'get', lambda c: '/api/tenants/', None),
+    ('tenant', 'retrieve', 'get', lambda c: f"/api/tenants/{c['tenant']}/", None),
+    ('tenant', 'seed_roles', 'post', lambda c: f"/api/tenants/{c['tenant']}/seed_roles/", None),
+    ('role', 'list', 'get', lambda c: '/api/roles/', None),
+    ('role', 'retrieve', 'get', lambda c: f"/api/roles/{c['role']}/", None),
+    ('membership', 'list', 'get', lambda c: f"/api/memberships/?tenant={c['tenant']}", None),
+    ('membership', 'retrieve', 'get', lambda c: f"/api/memberships/{c['membership']}/", None),
+    ('invitation', 'list', 'get', lambda c: '/api/invitations/', None),
+    ('invitation', 'retrieve', 'get', lambda c: f"/api/invitations/{c['invitation']}/", None),
+    ('invitation', 'resend', 'post', lambda c: f"/api/invitations/{c['resend_invitation']}/resend/", None),
+    ('invitation', 'accept', 'post', lambda c: f"/api/invitations/{c['invitation']}/accept/", None),
+    ('projectrole', 'list', 'get', lambda c: '/api/project-roles/', None),
+    ('projectrole', 'retrieve', 'get', lambda c: f"/api/project-roles/{c['project_role']}/", None),
+    ('projectmembership', 'list', 'get', lambda c: f"/api/project-memberships/?tenant={c['tenant']}&project_id={PROJECT_ID}", None),
+    ('projectmembership', 'retrieve', 'get', lambda c: f"/api/project-memberships/{c['project_membership']}/", None),
+]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QueryBudgetTests(TestCase):
+    report = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.report:
+            return
+        sys.stderr.write('\n{:<18}{:<14}{:>22}{:>30}\n'.format('endpoint', 'action', 'queries @ ' + '/'.join(map(str, SIZES)), 'ms'))
+        for row in cls.report:
+            sys.stderr.write('{:<18}{:<14}{:>22}{:>30}\n'.format(
+                row['basename'], row['action'], '/'.join(map(str, row['queries'])), '/'.join(f'{ms:.1f}' for ms in row['ms']),
+            ))
+        path = os.getenv('QUERY_BUDGET_REPORT')
+        if path:
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump(cls.report, fh, indent=2)
+
+    def setUp(self):
+        self.fixtures = [build_fixture(n) for n in SIZES]
+
+    def _measure(self, ctx, method, path, payload):
+        cache.clear()  # keep throttling out of the picture
+        client = APIClient()
+        client.force_authenticate(ExternalUser(USER_ID))
+        kwargs = {}
+        if payload is not None:
+            kwargs['data'] = payload
+            kwargs['format'] = 'json'
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            resp = getattr(client, method)(path, **kwargs)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.assertLess(resp.status_code, 400, f'{method.upper()} {path} -> {resp.status_code}: {getattr(resp, "data", "")}')
+        return len(captured), elapsed, captured
+
+    def test_every_router_endpoint_has_a_scenario(self):
+        covered = {basename for basename, *_rest in SCENARIOS}
+        registered = {basename for _prefix, _viewset, basename in router.registry}
+        self.assertEqual(registered - covered, set(), 'Add query-budget scenarios for new viewsets')
+
+    def test_query_count_does_not_grow_with_fixture_size(self):
+        for basename, action, method, path, payload in SCENARIOS:
+            with self.subTest(endpoint=basename, action=action):
+                counts, timings, samples = [], [], []
+                for ctx in self.fixtures:
+                    n_queries, ms, captured = self._measure(ctx, method, path(ctx), payload(ctx) if payload else None)
+                    counts.append(n_queries)
+                    timings.append(ms)
+                    samples.append(captured)
+                self.report.append({'basename': basename, 'action': action, 'queries': counts, 'ms': timings})
+                self.assertEqual(
+                    len(set(counts)), 1,
+                    f'{basename}.{action}: query count grows with N {dict(zip(SIZES, counts))}; '
+                    f'largest run executed:\n' + '\n'.join(q['sql'][:200] for q in samples[-1].captured_queries),
+                )
@@ -120,3 +120,10 @@ SERVICES_JWKS_URL = env('SERVICES_JWKS_URL', default=None)
 SERVICES_JWT_SECRET = env('SERVICES_JWT_SECRET', default=None)
 SERVICES_JWT_AUDIENCE = env('SERVICES_JWT_AUDIENCE', default='orgs')
 SERVICES_JWT_ISSUER = env('SERVICES_JWT_ISSUER', default=None)
+
+# Distributed tracing (OpenTelemetry, W3C traceparent propagation)
+OTEL_ENABLED = env.bool('OTEL_ENABLED', default=False)
+OTEL_SERVICE_NAME = env('OTEL_SERVICE_NAME', default=env('SERVICE_NAME', default='orgs'))
+OTEL_EXPORTER_OTLP_ENDPOINT = env('OTEL_EXPORTER_OTLP_ENDPOINT', default=None)
+OTEL_TRACES_FILE = env('OTEL_TRACES_FILE', default=None)
+OTEL_TRACES_SAMPLER_RATIO = env.float('OTEL_TRACES_SAMPLER_RATIO', default=1.0)
@@ -0,0 +1,61 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+
+
+def effort_of(mean_seconds, steps):
+    """Predicted seconds to execute one instance.
+
+    The case's mean duration when it has history, otherwise its step count times
+    AUTO_ASSIGN_SECONDS_PER_STEP (a case without steps counts as one step).
+    """
+    if mean_seconds:
+        return float(mean_seconds)
+    count = len(steps) if isinstance(steps, list) else 0
+    return float(max(count, 1) * settings.AUTO_ASSIGN_SECONDS_PER_STEP)
+
+
+def plan_assignment(items, users, loads, affinity=True):
+    """Distribute instances over users, balancing predicted effort.
+
+    `items` are (instance_id, section_id, seconds) in execution order; `loads` maps
+    user id -> seconds already assigned in the run. Groups (whole sections with
+    `affinity`, else single instances) are placed longest first on the least loaded
+    user (LPT). A section that would push that user past the fair share is cut: the
+    user gets the consecutive part that fits and the rest goes back in the queue, so
+    areas are only split when balance requires it. Returns {user_id: [instance ids]}
+    and the final loads.
+    """
+    loads = {uid: float(loads.get(uid, 0.0)) for uid in users}
+    target = (sum(item[2] for item in items) + sum(loads.values())) / len(users)
+    if affinity:
+        sections = defaultdict(list)
+        for item in items:
+            sections[item[1]].append(item)
+        groups = list(sections.values())
+    else:
+        groups = [[item] for item in items]
+    queue = [(-sum(item[2] for item in group), group[0][0], group) for group in groups]
+    heapq.heapify(queue)
+    heap = [(load, uid) for uid, load in loads.items()]
+    heapq.heapify(heap)
+    plan = {uid: [] for uid in users}
+    while queue:
+        neg_seconds, _first, group = heapq.heappop(queue)
+        load, uid = heapq.heappop(heap)
+        room = target - load
+        if len(group) > 1 and -neg_seconds > room > 0:
+            taken, fit = 0, 0.0
+            while taken < len(group) - 1 and fit + group[taken][2] <= room:
+                fit += group[taken][2]
+                taken += 1
+            taken = max(taken, 1)
+            rest = group[taken:]
+            heapq.heappush(queue, (-sum(item[2] for item in rest), rest[0][0], rest))
+            group = group[:taken]
+        plan[uid].extend(item[0] for item in group)
+        load += sum(item[2] for item in group)
+        loads[uid] = load
+        heapq.heappush(heap, (load, uid))
+    return plan, loads
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import TestCase, TestInstance
+
+
+FAILING = ('failed', 'blocked')
+CATEGORIES = ('newly_failing', 'newly_passing', 'still_failing', 'added', 'removed')
+
+# One pass over both runs' instances: each case's latest instance per run (a case added
+# to a run twice keeps its newest result), then conditional aggregation pairs them per
+# testcase (a self-join without the duplicate-row blowup) and the CASE classifies each pair.
+# Window totals are attached before filtering; the first row is always returned so the
+# case total survives when nothing changed.
+_COMPARE_SQL = """
+WITH latest AS (
+    SELECT id, run_id, testcase_id, status, duration_seconds,
+           ROW_NUMBER() OVER (PARTITION BY run_id, testcase_id ORDER BY id DESC) AS pick
+    FROM {instances}
+    WHERE run_id IN (%(run)s, %(base)s)
+), pairs AS (
+    SELECT testcase_id,
+           MAX(CASE WHEN run_id = %(run)s THEN status END) AS cur_status,
+           MAX(CASE WHEN run_id = %(base)s THEN status END) AS base_status,
+           MAX(CASE WHEN run_id = %(run)s THEN duration_seconds END) AS cur_duration,
+           MAX(CASE WHEN run_id = %(base)s THEN duration_seconds END) AS base_duration,
+           MAX(CASE WHEN run_id = %(run)s THEN id END) AS cur_instance,
+           MAX(CASE WHEN run_id = %(base)s THEN id END) AS base_instance
+    FROM latest
+    WHERE pick = 1
+    GROUP BY testcase_id
+), classified AS (
+    SELECT p.*,
+           CASE
+               WHEN p.base_status IS NULL THEN 'added'
+               WHEN p.cur_status IS NULL THEN 'removed'
+               WHEN p.cur_status IN {failing} AND p.base_status IN {failing} THEN 'still_failing'
+               WHEN p.cur_status IN {failing} THEN 'newly_failing'
+               WHEN p.cur_status = 'passed' AND p.base_status IN {failing} THEN 'newly_passing'
+               ELSE 'unchanged'
+           END AS change,
+           CASE
+               WHEN p.cur_duration IS NOT NULL AND p.base_duration IS NOT NULL
+                    AND p.cur_duration >= p.base_duration * %(ratio)s
+                    AND p.cur_duration - p.base_duration >= %(min_delta)s THEN 1
+               ELSE 0
+           END AS regressed
+    FROM pairs p
+), counted AS (
+    SELECT c.*,
+           COUNT(*) OVER (PARTITION BY c.change) AS change_total,
+           SUM(c.regressed) OVER () AS regressed_total,
+           COUNT(*) OVER () AS cases_total,
+           ROW_NUMBER() OVER (ORDER BY c.testcase_id) AS rn
+    FROM classified c
+)
+SELECT k.testcase_id, t.title, k.change, k.regressed, k.cur_status, k.base_status,
+       k.cur_duration, k.base_duration, k.cur_instance, k.base_instance,
+       k.change_total, k.regressed_total, k.cases_total
+FROM counted k
+JOIN {testcases} t ON t.id = k.testcase_id
+WHERE k.change <> 'unchanged' OR k.regressed = 1 OR k.rn = 1
+ORDER BY k.change, k.testcase_id
+"""
+
+
+def compare_runs(run, base, ratio, min_delta):
+    sql = _COMPARE_SQL.format(
+        instances=TestInstance._meta.db_table,
+        testcases=TestCase._meta.db_table,
+        failing="('" + "', '".join(FAILING) + "')",
+    )
+    params = {'run': run.id, 'base': base.id, 'ratio': 1 + ratio, 'min_delta': min_delta}
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    result = {category: [] for category in CATEGORIES}
+    result['duration_regressions'] = []
+    summary = {category: 0 for category in CATEGORIES}
+    summary.update({'unchanged': 0, 'duration_regressions': 0, 'cases': 0})
+    for (tc_id, title, change, regressed, cur_status, base_status, cur_dur, base_dur,
+         cur_inst, base_inst, change_total, regressed_total, cases_total) in rows:
+        summary[change] = change_total
+        summary['duration_regressions'] = regressed_total or 0
+        summary['cases'] = cases_total
+        item = {
+            'testcase': tc_id, 'title': title,
+            'status': cur_status, 'base_status': base_status,
+            'duration_seconds': cur_dur, 'base_duration_seconds': base_dur,
+            'instance': cur_inst, 'base_instance': base_inst,
+        }
+        if change in result:
+            result[change].append(item)
+        if regressed:
+            result['duration_regressions'].append(item)
+    # Unchanged rows are mostly filtered out in SQL, so derive their count from the total
+    summary['unchanged'] = summary['cases'] - sum(summary[category] for category in CATEGORIES)
+    result['duration_regressions'].sort(
+        key=lambda it: (it['duration_seconds'] or 0) - (it['base_duration_seconds'] or 0), reverse=True,
+    )
+    result['summary'] = summary
+    return result
+
+
+def cached_compare(run, base, ratio, min_delta):
+    """Comparison of two runs; cached once both are completed (their instances no longer change)."""
+    if run.status != 'completed' or base.status != 'completed':
+        return compare_runs(run, base, ratio, min_delta)
+    stamp = lambda r: r.finished_at.timestamp() if r.finished_at else 0
+    key = f'tms:compare:{run.id}:{stamp(run)}:{base.id}:{stamp(base)}:{ratio}:{min_delta}'
+    result = cache.get(key)
+    if result is None:
+        result = compare_runs(run, base, ratio, min_delta)
+        cache.set(key, result, settings.RUN_COMPARE_CACHE_SECONDS)
+    return result
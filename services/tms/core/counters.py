@@ -0,0 +1,56 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import TestInstance, TestRun
+
+
+# TestRun counter column per instance status
+STATUS_FIELDS = {status: f'{status}_count' for status, _label in TestInstance.STATUS_CHOICES}
+COUNTER_FIELDS = ('total_count', *STATUS_FIELDS.values())
+
+
+def apply(run_id, deltas):
+    """Add per-status deltas (status -> +/-n) to a run's counters with one UPDATE.
+
+    Transitions net to zero; created (+) or deleted (-) instances change the total.
+    Call inside the transaction that changes the instances.
+    """
+    updates = {STATUS_FIELDS[s]: F(STATUS_FIELDS[s]) + n for s, n in deltas.items() if n}
+    if not updates:
+        return
+    total = sum(deltas.values())
+    if total:
+        updates['total_count'] = F('total_count') + total
+    TestRun.objects.filter(id=run_id).update(**updates)
+
+
+def moved(run_id, old_status, new_status):
+    if old_status != new_status:
+        apply(run_id, {old_status: -1, new_status: 1})
+
+
+def transitions(changes):
+    """Apply (run_id, old_status, new_status) changes, one UPDATE per affected run."""
+    per_run = defaultdict(Counter)
+    for run_id, old, new in changes:
+        if old != new:
+            per_run[run_id][old] -= 1
+            per_run[run_id][new] += 1
+    for run_id, deltas in per_run.items():
+        apply(run_id, deltas)
+
+
+def recount(run_ids):
+    """Recompute the counters of the given runs from their instances (one UPDATE)."""
+    def count(**filters):
+        sub = (
+            TestInstance.objects.filter(run_id=OuterRef('pk'), **filters)
+            .order_by().values('run_id').annotate(n=Count('id')).values('n')
+        )
+        return Coalesce(Subquery(sub, output_field=IntegerField()), Value(0))
+
+    updates = {field: count(status=status) for status, field in STATUS_FIELDS.items()}
+    updates['total_count'] = count()
+    TestRun.objects.filter(id__in=list(run_ids)).update(**updates)
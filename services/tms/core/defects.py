@@ -0,0 +1,62 @@
+import re
+from urllib.parse import urlparse
+
+
+_JIRA_KEY = re.compile(r'^[A-Z][A-Z0-9_]+-\d+$')
+_ISSUE_PATH = re.compile(r'^/(?P<repo>[^/]+/[^/]+(?:/[^/-][^/]*)*?)/(?:-/)?(?:issues|pull|merge_requests)/(?P<num>\d+)')
+
+
+def tracker_of(url, key=''):
+    host = urlparse(url).netloc.lower() if url else ''
+    if 'github' in host:
+        return 'github'
+    if 'gitlab' in host:
+        return 'gitlab'
+    if 'youtrack' in host:
+        return 'youtrack'
+    if 'atlassian' in host or 'jira' in host or (url and '/browse/' in url) or _JIRA_KEY.match(key or ''):
+        return 'jira'
+    return 'other'
+
+
+def key_from_url(url):
+    """External defect key derived from a tracker URL (ABC-12, owner/repo#34), else the URL itself."""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/')
+    if '/browse/' in path:
+        return path.rsplit('/browse/', 1)[1].split('/')[0].upper()
+    m = _ISSUE_PATH.match(path)
+    if m:
+        return f"{m.group('repo')}#{m.group('num')}"
+    issue = re.search(r'/issue/([A-Za-z][\w]*-\d+)', path)
+    if issue:
+        return issue.group(1).upper()
+    return url[:100]
+
+
+def parse_defect(value, title='', tracker=''):
+    """Normalize a defect reference into DefectLink fields, or None when it is empty.
+
+    Accepts a key ("BUG-123"), a URL, or a dict with key/id, url/bug_url, title and
+    tracker (the shapes `link_defect` and runner payloads used to store as JSON).
+    """
+    if isinstance(value, dict):
+        title = value.get('title') or title
+        tracker = value.get('tracker') or tracker
+        key = str(value.get('key') or value.get('id') or '').strip()
+        url = str(value.get('url') or value.get('bug_url') or '').strip()
+    elif isinstance(value, (str, int)):
+        text = str(value).strip()
+        key, url = ('', text) if re.match(r'^https?://', text) else (text, '')
+    else:
+        return None
+    if not key and not url:
+        return None
+    if not key:
+        key = key_from_url(url)
+    return {
+        'key': key[:100],
+        'url': url[:500],
+        'title': str(title or '')[:255],
+        'tracker': tracker or tracker_of(url, key),
+    }
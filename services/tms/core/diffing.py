@@ -0,0 +1,147 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Beyond this many edits the rest of a differing region is reported as delete + insert,
+# which bounds Myers' O((N+M)·D) work for wholesale rewrites
+MAX_EDITS = 2000
+
+
+def _middle_script(a, b, off_a, off_b):
+    """Myers' shortest edit script between a and b: [(op, index_a, index_b)]."""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return [('delete', off_a + i, None) for i in range(n)] + [('insert', None, off_b + j) for j in range(m)]
+    v = {1: 0}
+    trace = []
+    for d in range(min(n + m, MAX_EDITS) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            x = v[k + 1] if k == -d or (k != d and v[k - 1] < v[k + 1]) else v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x, y = x + 1, y + 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, off_a, off_b)
+    return [('delete', off_a + i, None) for i in range(n)] + [('insert', None, off_b + j) for j in range(m)]
+
+
+def _backtrack(trace, x, y, off_a, off_b):
+    ops = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        prev_k = k + 1 if k == -d or (k != d and v.get(k - 1, -1) < v.get(k + 1, -1)) else k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x, y = x - 1, y - 1
+            ops.append(('equal', off_a + x, off_b + y))
+        if d:
+            ops.append(('insert', None, off_b + prev_y) if x == prev_x else ('delete', off_a + prev_x, None))
+        x, y = prev_x, prev_y
+    ops.reverse()
+    return ops
+
+
+def edit_script(a, b):
+    """Edit script turning sequence a into b: [('equal'|'delete'|'insert', index_a, index_b)].
+
+    The common prefix and suffix are matched in one linear pass; only the differing
+    middle goes through Myers' algorithm, so near-identical versions diff in linear time.
+    """
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a, end_b = end_a - 1, end_b - 1
+    return (
+        [('equal', i, i) for i in range(start)]
+        + _middle_script(a[start:end_a], b[start:end_b], start, start)
+        + [('equal', end_a + i, end_b + i) for i in range(len(a) - end_a)]
+    )
+
+
+def _step_key(step):
+    # Step numbers shift on every insert/delete; compare the content only
+    if isinstance(step, dict):
+        step = {key: value for key, value in step.items() if key != 'order'}
+    return json.dumps(step, sort_keys=True, ensure_ascii=False)
+
+
+def diff_steps(a, b):
+    """Step-level diff: inserted, deleted and modified steps (unchanged ones are only counted).
+
+    Within a run of changes, deletions and insertions are paired in order as
+    modifications, with the keys whose values differ.
+    """
+    ops, summary = [], {'inserted': 0, 'deleted': 0, 'modified': 0, 'unchanged': 0}
+    deleted, inserted = [], []
+
+    def flush():
+        for i, j in zip(deleted, inserted):
+            before, after = a[i], b[j]
+            fields = None
+            if isinstance(before, dict) and isinstance(after, dict):
+                fields = sorted(key for key in before.keys() | after.keys()
+                                if key != 'order' and before.get(key) != after.get(key))
+            ops.append({'op': 'modify', 'from_index': i, 'to_index': j, 'from': before, 'to': after, 'fields': fields})
+        ops.extend({'op': 'delete', 'from_index': i, 'step': a[i]} for i in deleted[len(inserted):])
+        ops.extend({'op': 'insert', 'to_index': j, 'step': b[j]} for j in inserted[len(deleted):])
+        pairs = min(len(deleted), len(inserted))
+        summary['modified'] += pairs
+        summary['deleted'] += len(deleted) - pairs
+        summary['inserted'] += len(inserted) - pairs
+        deleted.clear()
+        inserted.clear()
+
+    for op, i, j in edit_script([_step_key(s) for s in a], [_step_key(s) for s in b]):
+        if op == 'equal':
+            flush()
+            summary['unchanged'] += 1
+        elif op == 'delete':
+            deleted.append(i)
+        else:
+            inserted.append(j)
+    flush()
+    return {'changed': bool(ops), **summary, 'ops': ops}
+
+
+def diff_text(a, b):
+    """Line diff of two texts; unchanged lines are collapsed into counted 'equal' runs."""
+    lines_a, lines_b = (a or '').splitlines(), (b or '').splitlines()
+    ops = []
+    for op, i, j in edit_script(lines_a, lines_b):
+        if op == 'equal':
+            if ops and ops[-1]['op'] == 'equal':
+                ops[-1]['count'] += 1
+            else:
+                ops.append({'op': 'equal', 'from_index': i, 'to_index': j, 'count': 1})
+        elif op == 'delete':
+            ops.append({'op': 'delete', 'from_index': i, 'text': lines_a[i]})
+        else:
+            ops.append({'op': 'insert', 'to_index': j, 'text': lines_b[j]})
+    return {'changed': any(op['op'] != 'equal' for op in ops), 'ops': ops}
+
+
+def diff_content(a, b):
+    """Description and step diff of two (description, steps) payloads."""
+    return {'description': diff_text(a[0], b[0]), 'steps': diff_steps(a[1] or [], b[1] or [])}
+
+
+def cached_diff_content(sha_a, sha_b, load):
+    """diff_content of two content hashes; `load()` returns both payloads on a miss.
+
+    Content rows are immutable (keyed by their hash), so the result is cached for
+    VERSION_DIFF_CACHE_SECONDS without invalidation.
+    """
+    key = f'tms:diff:{sha_a}:{sha_b}'
+    result = cache.get(key)
+    if result is None:
+        result = diff_content(*load())
+        cache.set(key, result, settings.VERSION_DIFF_CACHE_SECONDS)
+    return result
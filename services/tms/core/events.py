@@ -0,0 +1,133 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.renderers import BaseRenderer
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'tms'
+
+
+def run_channel(run_id):
+    return f'{CHANNEL_PREFIX}:run:{run_id}'
+
+
+def project_channel(project_id):
+    return f'{CHANNEL_PREFIX}:project:{project_id}'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _send(channels, message):
+    try:
+        conn = _redis()
+        for ch in channels:
+            conn.publish(ch, message)
+    except Exception:
+        # Live updates are best effort; clients resync from the REST endpoints
+        logger.warning('Failed to publish %s', channels, exc_info=True)
+
+
+def publish(channels, event_type, data):
+    """Publish an event to Redis pub/sub once the surrounding transaction commits."""
+    message = json.dumps({'type': event_type, 'data': data, 'ts': time.time()}, default=str)
+    channels = list(channels)
+    transaction.on_commit(lambda: _send(channels, message))
+
+
+def instance_payload(inst):
+    return {
+        'id': inst.id,
+        'run': inst.run_id,
+        'testcase': inst.testcase_id,
+        'status': inst.status,
+        'assignee_user_id': inst.assignee_user_id,
+        'started_at': inst.started_at,
+        'finished_at': inst.finished_at,
+        'duration_seconds': inst.duration_seconds,
+    }
+
+
+def run_payload(run):
+    return {
+        'id': run.id,
+        'project': run.project_id,
+        'status': run.status,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at,
+    }
+
+
+def publish_instances(run, instances, event_type='instance.updated'):
+    """One event per changed instance on the run channel (status/assignment changes)."""
+    channels = [run_channel(run.id)]
+    for inst in instances:
+        publish(channels, event_type, instance_payload(inst))
+
+
+def publish_bulk(run_id, event_type, instance_ids, changes):
+    """One event for a set-based change of many instances of a run; clients refetch or patch them."""
+    publish([run_channel(run_id)], event_type, {'run': run_id, 'instances': sorted(instance_ids), **changes})
+
+
+def publish_run(run, event_type):
+    """Run state transitions go to both the run and the project channel (dashboards)."""
+    publish([run_channel(run.id), project_channel(run.project_id)], event_type, run_payload(run))
+
+
+def event_stream(channels, heartbeat=None, max_seconds=None):
+    """Server-Sent Events generator relaying Redis pub/sub messages.
+
+    Emits a comment line every `heartbeat` seconds so proxies keep the
+    connection open and dead clients are detected on write. The stream ends
+    after `max_seconds`; EventSource clients reconnect after the `retry` delay,
+    so a client that is gone without a failed write holds a worker slot for at
+    most that long.
+    """
+    heartbeat = heartbeat or getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    max_seconds = max_seconds or getattr(settings, 'SSE_MAX_STREAM_SECONDS', 300)
+    deadline = time.monotonic() + max_seconds
+    pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(*channels)
+    try:
+        yield f'retry: {int(heartbeat * 1000)}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            msg = pubsub.get_message(timeout=min(heartbeat, remaining))
+            if msg is None:
+                yield ': keepalive\n\n'
+                continue
+            raw = msg.get('data')
+            if isinstance(raw, bytes):
+                raw = raw.decode('utf-8')
+            try:
+                event_type = json.loads(raw).get('type', 'message')
+            except (TypeError, ValueError):
+                event_type = 'message'
+            yield f'event: {event_type}\ndata: {raw}\n\n'
+    finally:
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate `Accept: text/event-stream`; errors are rendered as JSON text."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (str, bytes)):
+            return data
+        return json.dumps(data, default=str)
@@ -0,0 +1,89 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PlanItem, TestInstance, TestRun
+from . import counters
+from . import events
+from . import versions
+
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_instances(run):
+    """Materialize one not-started instance per plan item of a run that has none yet."""
+    if run.instances.exists():
+        return
+    items = []
+    if run.plan_id:
+        items = list(PlanItem.objects.filter(plan_id=run.plan_id).select_related('testcase').order_by('order', 'id'))
+    with transaction.atomic():
+        # Resolve snapshots for items without a pinned version in bulk
+        snapshots = versions.snapshot_versions(it.testcase for it in items if not it.testcase_version_id)
+        TestInstance.objects.bulk_create([
+            TestInstance(
+                run=run,
+                tenant_id=run.project.tenant_id,
+                testcase_id=it.testcase_id,
+                testcase_version_id=it.testcase_version_id or snapshots[(it.testcase_id, it.testcase.version)].id,
+                order=idx,
+                automation_ref=(it.testcase.automation_ref or ''),
+            )
+            for idx, it in enumerate(items, start=1)
+        ])
+        counters.apply(run.id, {'not_started': len(items)})
+        # The run had no instances, so the new counters are known without re-reading
+        run.total_count = run.not_started_count = len(items)
+
+
+def start_run(run):
+    """Materialize instances and move a planned/paused run to running.
+
+    Call inside a transaction holding the run row lock, so the API `start` and the
+    scheduled-run launcher never start the same run twice.
+    """
+    ensure_instances(run)
+    run.status = 'running'
+    run.started_at = timezone.now()
+    run.save(update_fields=['status', 'started_at'])
+    events.publish_run(run, 'run.started')
+
+
+def launch_due_runs(limit=None):
+    """Start planned runs whose scheduled_at has passed, oldest first; returns how many.
+
+    Due runs are found through the partial index on scheduled_at (status='planned')
+    and claimed one at a time with FOR UPDATE SKIP LOCKED, each in its own
+    transaction: concurrent launchers (several beat/worker replicas) never pick the
+    same run, and a large plan does not hold the locks of the others. A run that
+    fails to start is rolled back to its savepoint, logged and rescheduled
+    SCHEDULED_RUN_RETRY_SECONDS later, so it does not block the runs behind it.
+    At most `limit` runs are attempted per call.
+    """
+    limit = limit or settings.SCHEDULED_RUNS_BATCH
+    now = timezone.now()
+    launched = 0
+    for _attempt in range(limit):
+        with transaction.atomic():
+            run = (
+                TestRun.objects.select_for_update(skip_locked=True)
+                .filter(status='planned', scheduled_at__lte=now)
+                .order_by('scheduled_at', 'id')
+                .first()
+            )
+            if run is None:
+                break
+            try:
+                with transaction.atomic():
+                    start_run(run)
+            except Exception:
+                retry_at = timezone.now() + timezone.timedelta(seconds=settings.SCHEDULED_RUN_RETRY_SECONDS)
+                logger.exception('Failed to start scheduled run %s; retrying at %s', run.id, retry_at.isoformat())
+                TestRun.objects.filter(id=run.id).update(scheduled_at=retry_at)
+                continue
+        logger.info('Started scheduled run %s (%s instances)', run.id, run.total_count)
+        launched += 1
+    return launched
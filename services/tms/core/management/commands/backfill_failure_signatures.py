@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import TestInstance
+from core.signatures import FAILING, failure_signature
+
+
+class Command(BaseCommand):
+    help = 'Compute failure signatures for failed/blocked instances recorded before signatures existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Limit to one project id')
+        parser.add_argument('--batch', type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        qs = (
+            TestInstance.objects.filter(status__in=FAILING, failure_signature='')
+            .exclude(actual_result='')
+            .only('id', 'actual_result')
+            .order_by('id')
+        )
+        if opts['project']:
+            qs = qs.filter(run__project_id=opts['project'])
+        batch, updated = [], 0
+        for inst in qs.iterator(chunk_size=opts['batch']):
+            inst.failure_signature = failure_signature(inst.actual_result)
+            batch.append(inst)
+            if len(batch) >= opts['batch']:
+                updated += TestInstance.objects.bulk_update(batch, ['failure_signature'])
+                batch = []
+        if batch:
+            updated += TestInstance.objects.bulk_update(batch, ['failure_signature'])
+        self.stdout.write(self.style.SUCCESS(f'Signed {updated} instances'))
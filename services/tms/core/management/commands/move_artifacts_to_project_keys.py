@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core import storage
+from core.models import InstanceArtifact
+
+
+def _legacy_keys(tenant_id, sha256):
+    # Object keys before keys were scoped per project: per tenant, and before that shared
+    suffix = f'sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+    return [f't/{tenant_id}/{suffix}', suffix]
+
+
+class Command(BaseCommand):
+    help = 'Copy artifacts stored under the old per-tenant or shared sha256/ keys to their per-project keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-legacy', action='store_true',
+                            help='Remove the old objects once every project has its copy')
+
+    def handle(self, *args, **opts):
+        store = storage.get_storage()
+        rows = (
+            InstanceArtifact.objects.filter(status='uploaded')
+            .values_list('project__tenant_id', 'project_id', 'sha256').distinct().order_by('sha256')
+        )
+        copied, missing, legacy = 0, 0, set()
+        for tenant_id, project_id, sha in rows.iterator():
+            sources = _legacy_keys(tenant_id, sha)
+            legacy.update(sources)
+            key = storage.content_key(tenant_id, project_id, sha)
+            if store.size_of(key) is not None:
+                continue
+            source = next((src for src in sources if store.size_of(src) is not None), None)
+            if source is None:
+                missing += 1
+                self.stderr.write(f'No stored object for project {project_id} sha256 {sha}')
+                continue
+            store.copy(source, key)
+            copied += 1
+        if opts['delete_legacy'] and not missing:
+            for key in legacy:
+                if store.size_of(key) is not None:
+                    store.delete(key)
+        self.stdout.write(self.style.SUCCESS(f'Copied {copied} objects, {missing} missing'))
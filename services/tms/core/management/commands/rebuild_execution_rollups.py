@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import ExecutionRollup, TestInstance
+from core.rollups import KEY_FIELDS, aggregate
+
+
+class Command(BaseCommand):
+    help = 'Rebuild hourly/daily execution rollups (trend analytics) from finished instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Limit to one project id')
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        qs = TestInstance.objects.filter(finished_at__isnull=False)
+        rollups = ExecutionRollup.objects.all()
+        if opts['project']:
+            qs = qs.filter(run__project_id=opts['project'])
+            rollups = rollups.filter(project_id=opts['project'])
+        qs = qs.order_by().values_list(
+            'run__project_id', 'testcase__section_id', 'testcase__priority', 'assignee_user_id',
+            'finished_at', 'status', 'duration_seconds',
+        )
+        totals = aggregate(qs.iterator(chunk_size=opts['batch']))
+        rows = [ExecutionRollup(**dict(zip(KEY_FIELDS, key)), **values) for key, values in totals.items()]
+        with transaction.atomic():
+            rollups.delete()
+            ExecutionRollup.objects.bulk_create(rows, batch_size=opts['batch'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} rollup rows'))
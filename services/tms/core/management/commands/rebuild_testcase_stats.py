@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import TestCase, TestCaseStats, TestInstance
+from core.stats import OUTCOME_CODES, apply_outcomes, apply_samples
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-testcase statistics (duration sketch, flakiness window) from finished instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Limit to one project id')
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        cases = TestCase.objects.all()
+        if opts['project']:
+            cases = cases.filter(project_id=opts['project'])
+        qs = (
+            TestInstance.objects.filter(testcase__in=cases, finished_at__isnull=False)
+            .order_by('testcase_id', 'finished_at')
+            .values_list('testcase_id', 'testcase__project_id', 'duration_seconds', 'status')
+        )
+        samples = defaultdict(list)
+        outcomes = defaultdict(list)
+        projects = {}
+        for tc_id, project_id, seconds, status in qs.iterator(chunk_size=opts['batch']):
+            if seconds and seconds > 0:
+                samples[tc_id].append(seconds)
+            if status in OUTCOME_CODES:
+                outcomes[tc_id].append(OUTCOME_CODES[status])
+            projects[tc_id] = project_id
+        rows = []
+        for tc_id, project_id in projects.items():
+            stats = TestCaseStats(testcase_id=tc_id, project_id=project_id)
+            apply_samples(stats, samples[tc_id])
+            apply_outcomes(stats, outcomes[tc_id])
+            rows.append(stats)
+        with transaction.atomic():
+            TestCaseStats.objects.filter(testcase__in=cases).delete()
+            TestCaseStats.objects.bulk_create(rows, batch_size=opts['batch'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(rows)} test cases'))
@@ -0,0 +1,241 @@
+import csv
+import io
+import json
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import (
+    Project, TestSection, TestCase, TestPlan, PlanItem, TestRun, TestInstance,
+)
+from core import counters
+from core.signatures import failure_signature
+from core.versions import snapshot_versions
+
+
+def _parse_ids(raw):
+    ids = []
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+def _csv_value(value):
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Seed a reproducible benchmark dataset (sections tree, cases, plans, runs, instances) using COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', default='1', help='Tenant ids, e.g. "1,2" or "1-3"')
+        parser.add_argument('--projects', type=int, default=1, help='Projects per tenant')
+        parser.add_argument('--section-depth', type=int, default=5)
+        parser.add_argument('--section-fanout', type=int, default=4)
+        parser.add_argument('--cases', type=int, default=100000, help='Test cases per project')
+        parser.add_argument('--plans', type=int, default=10, help='Plans per project')
+        parser.add_argument('--plan-size', type=int, default=10000, help='Cases per plan')
+        parser.add_argument('--runs-per-plan', type=int, default=20, help='Runs per plan (last one planned, one running)')
+        parser.add_argument('--automated-ratio', type=float, default=0.6)
+        parser.add_argument('--assignees', default='', help='User ids to assign instances to, e.g. "2-301"')
+        parser.add_argument('--batch', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded BENCH* projects first')
+
+    def handle(self, *args, **opts):
+        tenant_ids = _parse_ids(opts['tenants'])
+        if not tenant_ids:
+            raise CommandError('--tenants is required')
+        if opts['plan_size'] > opts['cases']:
+            raise CommandError('--plan-size cannot exceed --cases')
+        self.rng = random.Random(opts['seed'])
+        self.batch = opts['batch']
+        self.assignees = _parse_ids(opts['assignees'])
+        self.use_copy = connection.vendor == 'postgresql'
+
+        if opts['flush']:
+            deleted, _ = Project.objects.filter(tenant_id__in=tenant_ids, key__startswith='BENCH').delete()
+            self.stdout.write(f'Flushed {deleted} rows')
+
+        existing = Project.objects.filter(tenant_id__in=tenant_ids, key__startswith='BENCH').exists()
+        if existing:
+            raise CommandError('Benchmark projects already exist for these tenants; use --flush to re-seed')
+        summary = {'projects': []}
+        for tenant_id in tenant_ids:
+            for n in range(1, opts['projects'] + 1):
+                project = self._seed_project(tenant_id, n, opts)
+                summary['projects'].append({'tenant_id': tenant_id, 'project_id': project.id, 'key': project.key})
+        self.stdout.write(self.style.SUCCESS('Benchmark dataset seeded'))
+        self.stdout.write(json.dumps(summary))
+
+    # -- bulk writers -------------------------------------------------------------
+
+    def _copy(self, model, columns, rows):
+        """Write rows through COPY on Postgres, bulk_create elsewhere; returns row count."""
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch:
+                total += self._flush_chunk(model, columns, chunk)
+                chunk = []
+        if chunk:
+            total += self._flush_chunk(model, columns, chunk)
+        return total
+
+    def _flush_chunk(self, model, columns, chunk):
+        if not self.use_copy:
+            model.objects.bulk_create([model(**dict(zip(columns, row))) for row in chunk], batch_size=5000)
+            return len(chunk)
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in chunk:
+            writer.writerow([_csv_value(v) for v in row])
+        buf.seek(0)
+        db_columns = ', '.join(model._meta.get_field(c).column for c in columns)
+        sql = f"COPY {model._meta.db_table} ({db_columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        with connection.cursor() as cur:
+            cur.copy_expert(sql, buf)
+        return len(chunk)
+
+    # -- dataset ------------------------------------------------------------------
+
+    def _seed_project(self, tenant_id, n, opts):
+        rng = self.rng
+        now = timezone.now()
+        with transaction.atomic():
+            project = Project.objects.create(tenant_id=tenant_id, key=f'BENCH{n}', name=f'Benchmark {n}')
+            sections = self._seed_sections(project, opts['section_depth'], opts['section_fanout'])
+            self.stdout.write(f'[{project.key}] {len(sections)} sections')
+
+            def case_rows():
+                for i in range(opts['cases']):
+                    automated = rng.random() < opts['automated_ratio']
+                    steps = [
+                        {'order': s + 1, 'action': f'Step {s + 1} of case {i}', 'expected': 'OK'}
+                        for s in range(rng.randint(1, 12))
+                    ]
+                    yield (
+                        project.id, rng.choice(sections), f'Bench case {i}', 'Generated for load testing',
+                        steps, [], 'active', rng.choice(('low', 'medium', 'medium', 'high', 'critical')), 1,
+                        now, now, automated, 'pytest' if automated else '',
+                        f'bench.mod_{i % 200}.test_{i}' if automated else '',
+                    )
+            self._copy(TestCase, [
+                'project_id', 'section_id', 'title', 'description', 'steps', 'tags', 'status', 'priority',
+                'version', 'created_at', 'updated_at', 'is_automated', 'automation_type', 'automation_ref',
+            ], case_rows())
+            cases = list(TestCase.objects.filter(project=project).order_by('id').values_list('id', 'automation_ref'))
+            self.stdout.write(f'[{project.key}] {len(cases)} test cases')
+
+            # Version 1 snapshots in batches; content rows are shared by hash (core/versions.py)
+            version_ids = {}
+            fields = ('id', 'version', 'title', 'description', 'steps')
+            batch = []
+            for tc in TestCase.objects.filter(project=project).only(*fields).order_by('id').iterator(chunk_size=5000):
+                batch.append(tc)
+                if len(batch) == 5000:
+                    version_ids.update({tc_id: vobj.id for (tc_id, _ver), vobj in snapshot_versions(batch).items()})
+                    batch = []
+            version_ids.update({tc_id: vobj.id for (tc_id, _ver), vobj in snapshot_versions(batch).items()})
+            # Stable per-case base duration so the history is meaningful for planners
+            base_duration = {cid: max(1, int(rng.lognormvariate(3.0, 0.8))) for cid, _aref in cases}
+        for p in range(1, opts['plans'] + 1):
+            with transaction.atomic():
+                self._seed_plan(project, p, cases, version_ids, base_duration, opts, now)
+        return project
+
+    def _seed_sections(self, project, depth, fanout):
+        all_ids = []
+        parents = [None]
+        for level in range(depth):
+            created = TestSection.objects.bulk_create([
+                TestSection(project=project, parent=parent, name=f'L{level}-{idx}', order=idx)
+                for parent in parents for idx in range(1, fanout + 1)
+            ])
+            if created and created[0].pk is None:
+                created = list(TestSection.objects.filter(project=project, name__startswith=f'L{level}-').order_by('id'))
+            for sec in created:
+                parent = sec.parent
+                sec.path = f'{parent.path}/{sec.pk}' if parent else str(sec.pk)
+            TestSection.objects.bulk_update(created, ['path'], batch_size=5000)
+            all_ids.extend(sec.pk for sec in created)
+            parents = created
+        return all_ids
+
+    def _seed_plan(self, project, p, cases, version_ids, base_duration, opts, now):
+        rng = self.rng
+        plan = TestPlan.objects.create(project=project, name=f'Bench plan {p}')
+        picked = rng.sample(cases, opts['plan_size'])
+        self._copy(PlanItem, ['plan_id', 'testcase_id', 'testcase_version_id', 'order'], (
+            (plan.id, cid, version_ids[cid], idx) for idx, (cid, _aref) in enumerate(picked, start=1)
+        ))
+        runs_total = opts['runs_per_plan']
+        runs = []
+        for r in range(1, runs_total + 1):
+            if r == runs_total:
+                status_val, started = 'planned', None
+            elif r == runs_total - 1:
+                status_val, started = 'running', now - timedelta(hours=2)
+            else:
+                status_val, started = 'completed', now - timedelta(days=runs_total - r)
+            runs.append(TestRun(
+                project=project, plan=plan, name=f'Bench plan {p} run {r}', status=status_val,
+                started_at=started, finished_at=(started + timedelta(hours=6)) if status_val == 'completed' else None,
+                is_automation=(r % 2 == 0),
+            ))
+        runs = TestRun.objects.bulk_create(runs)
+        if runs and runs[0].pk is None:
+            runs = list(TestRun.objects.filter(plan=plan).order_by('id'))
+
+        failure_text = 'AssertionError: expected 200'
+        failure_sig = failure_signature(failure_text)
+
+        def instance_rows():
+            for run in runs:
+                if run.status == 'planned':
+                    continue
+                for idx, (cid, aref) in enumerate(picked, start=1):
+                    assignee = rng.choice(self.assignees) if self.assignees and rng.random() < 0.7 else None
+                    if run.status == 'completed':
+                        roll = rng.random()
+                        status_val = 'passed' if roll < 0.85 else 'failed' if roll < 0.95 else 'blocked' if roll < 0.98 else 'skipped'
+                    else:
+                        status_val = 'not_started' if rng.random() < 0.8 else 'passed'
+                    if status_val == 'not_started':
+                        started = finished = duration = None
+                    else:
+                        duration = max(1, int(base_duration[cid] * rng.uniform(0.7, 1.5)))
+                        started = run.started_at + timedelta(seconds=idx)
+                        finished = started + timedelta(seconds=duration)
+                    failed = status_val == 'failed'
+                    yield (
+                        run.id, project.tenant_id, cid, version_ids[cid], assignee, status_val,
+                        failure_text if failed else '', False, failure_sig if failed else '',
+                        duration, aref, started, finished, idx,
+                    )
+        count = self._copy(TestInstance, [
+            'run_id', 'tenant_id', 'testcase_id', 'testcase_version_id', 'assignee_user_id', 'status', 'actual_result',
+            'actual_result_truncated', 'failure_signature', 'duration_seconds', 'automation_ref',
+            'started_at', 'finished_at', 'order',
+        ], instance_rows())
+        counters.recount(run.id for run in runs)
+        self.stdout.write(f'[{project.key}] plan {p}: {len(runs)} runs, {count} instances')
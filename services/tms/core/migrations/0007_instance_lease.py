@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_project_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testinstance',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='testinstance',
+            index=models.Index(fields=['run', 'status', 'order'], name='core_ti_run_st_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testinstance',
+            index=models.Index(condition=models.Q(status='in_progress'), fields=['lease_expires_at'], name='core_ti_lease_idx'),
+        ),
+    ]
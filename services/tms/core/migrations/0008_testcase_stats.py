@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_instance_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestCaseStats',
+            fields=[
+                ('testcase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.testcase')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean_seconds', models.FloatField(default=0)),
+                ('p50_seconds', models.FloatField(blank=True, null=True)),
+                ('p90_seconds', models.FloatField(blank=True, null=True)),
+                ('sketch', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='testcase_stats', to='core.project')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['project'], name='core_tcstats_project_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_testcase_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrun',
+            name='parent_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reruns', to='core.testrun'),
+        ),
+    ]
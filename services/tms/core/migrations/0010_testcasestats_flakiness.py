@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_testrun_parent_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcasestats',
+            name='recent_outcomes',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='testcasestats',
+            name='flips',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testcasestats',
+            name='flaky_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='testcasestats',
+            index=models.Index(fields=['project', 'flaky_score'], name='core_tcstats_flaky_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_testcasestats_flakiness'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testinstance',
+            name='failure_signature',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='testinstance',
+            index=models.Index(fields=['run', 'failure_signature'], name='core_ti_run_sig_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_testinstance_failure_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testinstance',
+            name='actual_result_truncated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='InstanceArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('actual_result', 'Actual result'), ('log', 'Log'), ('screenshot', 'Screenshot'), ('attachment', 'Attachment')], default='attachment', max_length=20)),
+                ('name', models.CharField(max_length=255)),
+                ('content_type', models.CharField(default='application/octet-stream', max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending upload'), ('uploaded', 'Uploaded')], default='pending', max_length=20)),
+                ('created_by_user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('uploaded_at', models.DateTimeField(blank=True, null=True)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='core.testinstance')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='core.project')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['instance'], name='core_artifact_inst_idx'),
+                    models.Index(fields=['sha256'], name='core_artifact_sha_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,129 @@
+import re
+from urllib.parse import urlparse
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of core.defects as of this migration, so later changes to the parser
+# cannot alter what the migration writes
+
+_JIRA_KEY = re.compile(r'^[A-Z][A-Z0-9_]+-\d+$')
+_ISSUE_PATH = re.compile(r'^/(?P<repo>[^/]+/[^/]+(?:/[^/-][^/]*)*?)/(?:-/)?(?:issues|pull|merge_requests)/(?P<num>\d+)')
+
+
+def tracker_of(url, key=''):
+    host = urlparse(url).netloc.lower() if url else ''
+    if 'github' in host:
+        return 'github'
+    if 'gitlab' in host:
+        return 'gitlab'
+    if 'youtrack' in host:
+        return 'youtrack'
+    if 'atlassian' in host or 'jira' in host or (url and '/browse/' in url) or _JIRA_KEY.match(key or ''):
+        return 'jira'
+    return 'other'
+
+
+def key_from_url(url):
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/')
+    if '/browse/' in path:
+        return path.rsplit('/browse/', 1)[1].split('/')[0].upper()
+    m = _ISSUE_PATH.match(path)
+    if m:
+        return f"{m.group('repo')}#{m.group('num')}"
+    issue = re.search(r'/issue/([A-Za-z][\w]*-\d+)', path)
+    if issue:
+        return issue.group(1).upper()
+    return url[:100]
+
+
+def parse_defect(value, title='', tracker=''):
+    if isinstance(value, dict):
+        title = value.get('title') or title
+        tracker = value.get('tracker') or tracker
+        key = str(value.get('key') or value.get('id') or '').strip()
+        url = str(value.get('url') or value.get('bug_url') or '').strip()
+    elif isinstance(value, (str, int)):
+        text = str(value).strip()
+        key, url = ('', text) if re.match(r'^https?://', text) else (text, '')
+    else:
+        return None
+    if not key and not url:
+        return None
+    if not key:
+        key = key_from_url(url)
+    return {
+        'key': key[:100],
+        'url': url[:500],
+        'title': str(title or '')[:255],
+        'tracker': tracker or tracker_of(url, key),
+    }
+
+
+def copy_defects_to_links(apps, schema_editor):
+    TestInstance = apps.get_model('core', 'TestInstance')
+    DefectLink = apps.get_model('core', 'DefectLink')
+
+    batch = []
+    qs = (
+        TestInstance.objects.exclude(defects=[])
+        .values_list('id', 'run__project_id', 'defects')
+        .order_by('id')
+    )
+    for inst_id, project_id, defects in qs.iterator(chunk_size=2000):
+        for value in defects if isinstance(defects, list) else []:
+            fields = parse_defect(value)
+            if fields:
+                batch.append(DefectLink(instance_id=inst_id, project_id=project_id, **fields))
+        if len(batch) >= 2000:
+            DefectLink.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    DefectLink.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def copy_links_to_defects(apps, schema_editor):
+    TestInstance = apps.get_model('core', 'TestInstance')
+    DefectLink = apps.get_model('core', 'DefectLink')
+
+    by_instance = {}
+    for link in DefectLink.objects.order_by('id').iterator(chunk_size=2000):
+        by_instance.setdefault(link.instance_id, []).append({
+            'key': link.key, 'url': link.url, 'title': link.title, 'tracker': link.tracker,
+        })
+    for inst_id, defects in by_instance.items():
+        TestInstance.objects.filter(id=inst_id).update(defects=defects)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_instance_artifacts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracker', models.CharField(choices=[('jira', 'Jira'), ('github', 'GitHub'), ('gitlab', 'GitLab'), ('youtrack', 'YouTrack'), ('other', 'Other')], default='other', max_length=20)),
+                ('key', models.CharField(max_length=100)),
+                ('url', models.CharField(blank=True, default='', max_length=500)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('created_by_user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defect_links', to='core.testinstance')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defect_links', to='core.project')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['key', 'project'], name='core_defect_key_proj_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('instance', 'key'), name='core_defect_link_unique'),
+                ],
+            },
+        ),
+        migrations.RunPython(copy_defects_to_links, copy_links_to_defects),
+    ]
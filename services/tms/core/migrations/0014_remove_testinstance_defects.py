@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Separate from the backfill: Postgres refuses ALTER TABLE while the copied rows'
+    # deferred FK checks are still pending in the same transaction.
+
+    dependencies = [
+        ('core', '0013_defect_links'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='testinstance',
+            name='defects',
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+STATUSES = ('not_started', 'in_progress', 'blocked', 'passed', 'failed', 'skipped')
+
+
+def backfill_counters(apps, schema_editor):
+    TestRun = apps.get_model('core', 'TestRun')
+    TestInstance = apps.get_model('core', 'TestInstance')
+
+    def count(**filters):
+        sub = (
+            TestInstance.objects.filter(run_id=OuterRef('pk'), **filters)
+            .order_by().values('run_id').annotate(n=Count('id')).values('n')
+        )
+        return Coalesce(Subquery(sub, output_field=IntegerField()), Value(0))
+
+    updates = {f'{status}_count': count(status=status) for status in STATUSES}
+    updates['total_count'] = count()
+    TestRun.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_remove_testinstance_defects'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrun',
+            name='total_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='not_started_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='in_progress_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='blocked_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='passed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='failed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='skipped_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_testrun_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testrun',
+            index=models.Index(condition=models.Q(status='planned'), fields=['scheduled_at'], name='core_run_sched_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_tenant(apps, schema_editor):
+    TestRun = apps.get_model('core', 'TestRun')
+    TestInstance = apps.get_model('core', 'TestInstance')
+    tenant = TestRun.objects.filter(pk=OuterRef('run_id')).values('project__tenant_id')[:1]
+    TestInstance.objects.update(tenant_id=Subquery(tenant))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_testrun_scheduled_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testinstance',
+            name='tenant_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_tenant, migrations.RunPython.noop),
+    ]
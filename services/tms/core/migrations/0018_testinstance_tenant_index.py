@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from the backfill (as 0014): no ALTER TABLE on core_testinstance in the
+    # transaction that rewrote its rows
+
+    dependencies = [
+        ('core', '0017_testinstance_tenant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='testinstance',
+            name='tenant_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='testinstance',
+            index=models.Index(fields=['tenant_id', 'assignee_user_id', 'status'], name='core_ti_tenant_assignee_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_testinstance_tenant_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('section_id', models.BigIntegerField(default=0)),
+                ('priority', models.CharField(default='', max_length=20)),
+                ('assignee_user_id', models.BigIntegerField(default=0)),
+                ('executions', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('blocked', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('duration_count', models.PositiveIntegerField(default=0)),
+                ('duration_total', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execution_rollups', to='core.project')),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(fields=('project', 'granularity', 'bucket', 'section_id', 'priority', 'assignee_user_id'), name='core_rollup_unique'),
+                ],
+            },
+        ),
+    ]
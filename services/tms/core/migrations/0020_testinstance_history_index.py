@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_executionrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testinstance',
+            index=models.Index(condition=models.Q(finished_at__isnull=False), fields=['testcase', 'finished_at', 'id'], name='core_ti_case_history_idx'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of core.versions.content_hash, so later changes to the hashing
+# cannot alter the keys this migration writes
+
+def content_hash(description, steps, expected):
+    payload = json.dumps([description or '', steps or [], expected or []],
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def move_content(apps, schema_editor):
+    TestCaseVersion = apps.get_model('core', 'TestCaseVersion')
+    TestCaseVersionContent = apps.get_model('core', 'TestCaseVersionContent')
+
+    def flush(contents, links):
+        TestCaseVersionContent.objects.bulk_create([
+            TestCaseVersionContent(sha256=sha, description=d, steps=s, expected=e) for sha, (d, s, e) in contents.items()
+        ], ignore_conflicts=True)
+        ids = dict(TestCaseVersionContent.objects.filter(sha256__in=contents).values_list('sha256', 'id'))
+        TestCaseVersion.objects.bulk_update(
+            [TestCaseVersion(id=vid, content_id=ids[sha]) for vid, sha in links], ['content'],
+        )
+
+    contents, links = {}, []
+    qs = TestCaseVersion.objects.order_by('id').values_list('id', 'description', 'steps', 'expected')
+    for vid, description, steps, expected in qs.iterator(chunk_size=2000):
+        sha = content_hash(description, steps, expected)
+        contents[sha] = (description or '', steps or [], expected or [])
+        links.append((vid, sha))
+        if len(links) >= 2000:
+            flush(contents, links)
+            contents, links = {}, []
+    if links:
+        flush(contents, links)
+
+
+def restore_content(apps, schema_editor):
+    TestCaseVersion = apps.get_model('core', 'TestCaseVersion')
+
+    batch = []
+    for vobj in TestCaseVersion.objects.select_related('content').order_by('id').iterator(chunk_size=2000):
+        vobj.description, vobj.steps, vobj.expected = vobj.content.description, vobj.content.steps, vobj.content.expected
+        batch.append(vobj)
+        if len(batch) >= 2000:
+            TestCaseVersion.objects.bulk_update(batch, ['description', 'steps', 'expected'])
+            batch = []
+    TestCaseVersion.objects.bulk_update(batch, ['description', 'steps', 'expected'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_testinstance_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestCaseVersionContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('description', models.TextField(blank=True, default='')),
+                ('steps', models.JSONField(blank=True, default=list)),
+                ('expected', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='testcaseversion',
+            name='content',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='versions', to='core.testcaseversioncontent'),
+        ),
+        migrations.RunPython(move_content, restore_content),
+    ]
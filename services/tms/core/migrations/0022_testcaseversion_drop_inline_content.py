@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Separate from the backfill (as 0018): no ALTER TABLE on core_testcaseversion in the
+    # transaction that rewrote its rows
+
+    dependencies = [
+        ('core', '0021_testcaseversion_content'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='testcaseversion',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='versions', to='core.testcaseversioncontent'),
+        ),
+        migrations.RemoveField(
+            model_name='testcaseversion',
+            name='description',
+        ),
+        migrations.RemoveField(
+            model_name='testcaseversion',
+            name='steps',
+        ),
+        migrations.RemoveField(
+            model_name='testcaseversion',
+            name='expected',
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_testcaseversion_drop_inline_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testinstance',
+            name='claimed_by_user_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
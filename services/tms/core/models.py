@@ -152,13 +152,24 @@ class Release(models.Model):
         ]
 
 
+class TestCaseVersionContent(models.Model):
+    """Description/steps/expected of case versions, stored once per distinct content.
+
+    Keyed by the SHA-256 of the three fields (core/versions.py), so versions that only
+    retitle a case, and cases sharing the same steps, point at one row.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    description = models.TextField(blank=True, default='')
+    steps = models.JSONField(default=list, blank=True)
+    expected = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class TestCaseVersion(models.Model):
     testcase = models.ForeignKey(TestCase, related_name='versions', on_delete=models.CASCADE)
     version = models.IntegerField()
     title = models.CharField(max_length=300)
-    description = models.TextField(blank=True, default='')
-    steps = models.JSONField(default=list, blank=True)
-    expected = models.JSONField(default=list, blank=True)
+    content = models.ForeignKey(TestCaseVersionContent, related_name='versions', on_delete=models.PROTECT)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -207,6 +218,8 @@ class TestRun(models.Model):
     )
     project = models.ForeignKey(Project, related_name='runs', on_delete=models.CASCADE)
     plan = models.ForeignKey(TestPlan, related_name='runs', on_delete=models.SET_NULL, null=True, blank=True)
+    # Set on runs created by `rerun` from a subset of another run's instances
+    parent_run = models.ForeignKey('self', related_name='reruns', on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=200)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
     scheduled_at = models.DateTimeField(null=True, blank=True)
@@ -215,12 +228,22 @@ class TestRun(models.Model):
     is_automation = models.BooleanField(default=False)
     created_by_user_id = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Instance counters per status, kept in step with instance writes (core/counters.py)
+    total_count = models.IntegerField(default=0)
+    not_started_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    blocked_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
 
     class Meta:
         indexes = [
             models.Index(fields=['project']),
             models.Index(fields=['status']),
             models.Index(fields=['project', 'status']),
+            # Due-run lookup of the scheduled-run launcher
+            models.Index(fields=['scheduled_at'], name='core_run_sched_idx', condition=models.Q(status='planned')),
         ]
 
 
@@ -234,16 +257,25 @@ class TestInstance(models.Model):
         ('skipped', 'Skipped'),
     )
     run = models.ForeignKey(TestRun, related_name='instances', on_delete=models.CASCADE)
+    # Copy of run.project.tenant_id: tenant-scoped lookups (my_work) without joining runs and projects
+    tenant_id = models.BigIntegerField()
     testcase = models.ForeignKey(TestCase, related_name='instances', on_delete=models.CASCADE)
     testcase_version = models.ForeignKey(TestCaseVersion, related_name='instances', on_delete=models.SET_NULL, null=True, blank=True)
     assignee_user_id = models.BigIntegerField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_started')
+    # Preview only when the full text was offloaded to artifact storage (actual_result_truncated)
     actual_result = models.TextField(blank=True, default='')
-    defects = models.JSONField(default=list, blank=True)
+    actual_result_truncated = models.BooleanField(default=False)
+    # Normalized hash of actual_result for failed/blocked instances (see core/signatures.py)
+    failure_signature = models.CharField(max_length=40, blank=True, default='')
     duration_seconds = models.IntegerField(null=True, blank=True)
     automation_ref = models.CharField(max_length=200, blank=True, default='')
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Set when claimed through the run work queue; expired leases are reclaimed by the sweeper
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # The user a work-queue claim assigned an unassigned instance to; the sweeper clears that assignment
+    claimed_by_user_id = models.BigIntegerField(null=True, blank=True)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
@@ -252,9 +284,144 @@ class TestInstance(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['run', 'status']),
             models.Index(fields=['automation_ref']),
+            models.Index(fields=['run', 'status', 'order']),
+            models.Index(fields=['lease_expires_at'], name='core_ti_lease_idx', condition=models.Q(status='in_progress')),
+            models.Index(fields=['run', 'failure_signature']),
+            models.Index(fields=['tenant_id', 'assignee_user_id', 'status'], name='core_ti_tenant_assignee_idx'),
+            # Per-case execution history, newest first (testcase `history` keyset pages)
+            models.Index(fields=['testcase', 'finished_at', 'id'], name='core_ti_case_history_idx',
+                         condition=models.Q(finished_at__isnull=False)),
         ]     
 
 
+class DefectLink(models.Model):
+    """External defect (tracker issue) linked to a test instance.
+
+    `key` is the tracker's id (ABC-123, owner/repo#45); when only a URL is given it is
+    derived from it (core/defects.py), so "what does BUG-123 affect" is an index lookup.
+    """
+    TRACKER_CHOICES = (
+        ('jira', 'Jira'),
+        ('github', 'GitHub'),
+        ('gitlab', 'GitLab'),
+        ('youtrack', 'YouTrack'),
+        ('other', 'Other'),
+    )
+    instance = models.ForeignKey(TestInstance, related_name='defect_links', on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, related_name='defect_links', on_delete=models.CASCADE)
+    tracker = models.CharField(max_length=20, choices=TRACKER_CHOICES, default='other')
+    key = models.CharField(max_length=100)
+    url = models.CharField(max_length=500, blank=True, default='')
+    title = models.CharField(max_length=255, blank=True, default='')
+    created_by_user_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'project']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['instance', 'key'], name='core_defect_link_unique'),
+        ]
+
+
+class InstanceArtifact(models.Model):
+    """File attached to a test instance (log, screenshot, full actual_result).
+
+    Bytes live in object storage under a content-addressed key (core/storage.py), so
+    identical files uploaded for many instances are stored once; rows only reference them.
+    """
+    KIND_CHOICES = (
+        ('actual_result', 'Actual result'),
+        ('log', 'Log'),
+        ('screenshot', 'Screenshot'),
+        ('attachment', 'Attachment'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending upload'),
+        ('uploaded', 'Uploaded'),
+    )
+    instance = models.ForeignKey(TestInstance, related_name='artifacts', on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, related_name='artifacts', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='attachment')
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by_user_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['instance']),
+            models.Index(fields=['sha256']),
+        ]
+
+
+class TestCaseStats(models.Model):
+    """Streaming duration statistics of a test case, maintained as instances finish.
+
+    `sketch` is a log-bucket histogram (bucket index -> count, see core/stats.py) from
+    which p50/p90 are derived without keeping individual samples. `recent_outcomes`
+    is the sliding pass/fail window ('P'/'F', oldest first) behind `flaky_score`.
+    """
+    testcase = models.OneToOneField(TestCase, related_name='stats', on_delete=models.CASCADE, primary_key=True)
+    project = models.ForeignKey(Project, related_name='testcase_stats', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+    mean_seconds = models.FloatField(default=0)
+    p50_seconds = models.FloatField(null=True, blank=True)
+    p90_seconds = models.FloatField(null=True, blank=True)
+    sketch = models.JSONField(default=dict, blank=True)
+    recent_outcomes = models.CharField(max_length=100, blank=True, default='')
+    flips = models.PositiveSmallIntegerField(default=0)
+    flaky_score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project']),
+            models.Index(fields=['project', 'flaky_score']),
+        ]
+
+
+class ExecutionRollup(models.Model):
+    """Finished-instance totals of a project per hour/day bucket, maintained as instances finish.
+
+    One row per (project, granularity, bucket, section, priority, assignee); section 0
+    and assignee 0 stand for "none" so the key stays unique. Trend charts sum these rows
+    instead of grouping instances (core/rollups.py). Durations only count timed results.
+    """
+    GRANULARITY_CHOICES = (
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    )
+    project = models.ForeignKey(Project, related_name='execution_rollups', on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    section_id = models.BigIntegerField(default=0)
+    priority = models.CharField(max_length=20, default='')
+    assignee_user_id = models.BigIntegerField(default=0)
+    executions = models.PositiveIntegerField(default=0)
+    passed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    blocked = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    duration_count = models.PositiveIntegerField(default=0)
+    duration_total = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the trends range scan (project, granularity, bucket)
+            models.UniqueConstraint(
+                fields=['project', 'granularity', 'bucket', 'section_id', 'priority', 'assignee_user_id'],
+                name='core_rollup_unique',
+            ),
+        ]
+
+
 class TestImportJob(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -10,3 +10,9 @@ class DefaultCursorPagination(CursorPagination):
 class CreatedAtCursorPagination(CursorPagination):
     page_size = int(os.getenv('PAGE_SIZE', '25'))
     ordering = '-created_at'
+
+
+class HistoryCursorPagination(CursorPagination):
+    """Keyset pages over finished instances, newest first (core_ti_case_history_idx)."""
+    page_size = int(os.getenv('PAGE_SIZE', '25'))
+    ordering = ('-finished_at', '-id')
@@ -5,11 +5,7 @@ from jose import jwt
 import time
 
 
-def _fetch_memberships(tenant_id: int, user_id: int):
-    if not tenant_id:
-        return []
-    base = getattr(settings, 'ORGS_BASE_URL', 'http://orgs:8000/api')
-    url = f"{base.rstrip('/')}/memberships/"
+def _service_headers():
     headers = {}
     # Prefer RS256 token from Auth; fallback to HS or shared token
     try:
@@ -36,8 +32,14 @@ def _fetch_memberships(tenant_id: int, user_id: int):
             svc = getattr(settings, 'ORGS_SERVICE_TOKEN', None)
             if svc:
                 headers['Authorization'] = f"Service {svc}"
+    return headers
+
+
+def _fetch_orgs_list(path: str, params: dict):
+    base = getattr(settings, 'ORGS_BASE_URL', 'http://orgs:8000/api')
+    url = f"{base.rstrip('/')}/{path}/"
+    headers = _service_headers()
     try:
-        params = {'tenant': tenant_id, 'user_id': user_id}
         resp = requests.get(url, params=params, headers=headers, timeout=3)
         if resp.status_code != 200:
             return []
@@ -57,6 +59,18 @@ def _fetch_memberships(tenant_id: int, user_id: int):
         return []
 
 
+def _fetch_memberships(tenant_id: int, user_id: int):
+    if not tenant_id:
+        return []
+    return _fetch_orgs_list('memberships', {'tenant': tenant_id, 'user_id': user_id})
+
+
+def _fetch_project_memberships(tenant_id: int, project_id: int, user_id: int):
+    if not tenant_id or not project_id:
+        return []
+    return _fetch_orgs_list('project-memberships', {'tenant': tenant_id, 'project_id': project_id, 'user_id': user_id})
+
+
 def _has_membership(request, tenant_id: int) -> bool:
     user_id = getattr(request.user, 'id', None)
     if not tenant_id or not user_id:
@@ -79,6 +93,25 @@ def _role_keys(request, tenant_id: int):
     return keys
 
 
+def _project_role_keys(request, tenant_id: int, project_id: int):
+    user_id = getattr(request.user, 'id', None)
+    items = _fetch_project_memberships(tenant_id, project_id, user_id)
+    keys = set()
+    for it in items:
+        if not isinstance(it, dict) or it.get('tenant') != tenant_id or it.get('project_id') != project_id:
+            continue
+        rk = it.get('role_key')
+        if rk:
+            keys.add(rk)
+    return keys
+
+
+def has_project_role(request, tenant_id: int, project_id: int, allowed) -> bool:
+    """Role check for one project: project-level roles win over tenant roles (as in TenantRBACPermission)."""
+    roles = _project_role_keys(request, tenant_id, project_id) or _role_keys(request, tenant_id)
+    return any(r in roles for r in allowed)
+
+
 class IsTenantMember(permissions.BasePermission):
     message = 'Tenant membership required.'
 
@@ -88,10 +121,10 @@ class IsTenantMember(permissions.BasePermission):
             return _has_membership(request, tenant_id)
         managed_basenames = ('testcase', 'suite', 'suitecase', 'release', 'testplan', 'planitem',
                              'testrun', 'testinstance', 'section', 'testtag', 'requirement',
-                             'importjob', 'exportjob')
-        if view.basename in managed_basenames and request.method in ('POST',):
+                             'importjob', 'exportjob', 'defectlink')
+        if view.basename in managed_basenames and request.method in ('POST',) and getattr(view, 'action', None) == 'create':
             # For create we need to resolve project -> tenant_id
-            from .models import Project, TestPlan, TestRun
+            from .models import Project, TestPlan, TestRun, TestInstance
             project_id = request.data.get('project')
             if not project_id:
                 # Try resolve via plan -> project
@@ -110,6 +143,14 @@ class IsTenantMember(permissions.BasePermission):
                         return _has_membership(request, r.project.tenant_id)
                     except TestRun.DoesNotExist:
                         return False
+                # Try resolve via instance -> run -> project (for defect links)
+                instance_id = request.data.get('instance')
+                if instance_id:
+                    try:
+                        inst = TestInstance.objects.select_related('run__project').get(id=instance_id)
+                        return _has_membership(request, inst.run.project.tenant_id)
+                    except (TestInstance.DoesNotExist, ValueError):
+                        return False
                 return False
             try:
                 p = Project.objects.get(id=project_id)
@@ -122,7 +163,8 @@ class IsTenantMember(permissions.BasePermission):
         # obj may be Project, TestCase, Suite, SuiteCase, Release, TestPlan, PlanItem, TestRun, TestInstance
         from .models import (
             Project, TestCase, Suite, SuiteCase, Release, TestPlan, PlanItem, TestRun, TestInstance,
-            TestSection, TestTag, Requirement, TestImportJob, TestExportJob
+            TestSection, TestTag, Requirement, TestImportJob, TestExportJob, TestCaseVersion,
+            InstanceArtifact, DefectLink,
         )
         tenant_id = None
         if isinstance(obj, Project):
@@ -153,6 +195,10 @@ class IsTenantMember(permissions.BasePermission):
             tenant_id = obj.project.tenant_id
         elif isinstance(obj, TestExportJob):
             tenant_id = obj.project.tenant_id
+        elif isinstance(obj, TestCaseVersion):
+            tenant_id = obj.testcase.project.tenant_id
+        elif isinstance(obj, (InstanceArtifact, DefectLink)):
+            tenant_id = obj.project.tenant_id
         return _has_membership(request, tenant_id)
 
 
@@ -217,7 +263,8 @@ class TenantRBACPermission(permissions.BasePermission):
         from .models import (
             Project, TestCase, Suite, SuiteCase,
             Release, TestPlan, PlanItem, TestRun, TestInstance,
-            TestSection, TestTag, Requirement, TestImportJob, TestExportJob
+            TestSection, TestTag, Requirement, TestImportJob, TestExportJob, TestCaseVersion,
+            InstanceArtifact, DefectLink,
         )
         tenant_id = None
         if isinstance(obj, Project):
@@ -248,6 +295,10 @@ class TenantRBACPermission(permissions.BasePermission):
             tenant_id = obj.project.tenant_id
         elif isinstance(obj, TestExportJob):
             tenant_id = obj.project.tenant_id
+        elif isinstance(obj, TestCaseVersion):
+            tenant_id = obj.testcase.project.tenant_id
+        elif isinstance(obj, (InstanceArtifact, DefectLink)):
+            tenant_id = obj.project.tenant_id
         if not tenant_id:
             return False
         if request.method in permissions.SAFE_METHODS:
@@ -296,6 +347,10 @@ class TenantRBACPermission(permissions.BasePermission):
             proj_roles = _project_role_keys(request, tenant_id, obj.project_id)
         elif isinstance(obj, TestExportJob):
             proj_roles = _project_role_keys(request, tenant_id, obj.project_id)
+        elif isinstance(obj, TestCaseVersion):
+            proj_roles = _project_role_keys(request, tenant_id, obj.testcase.project_id)
+        elif isinstance(obj, (InstanceArtifact, DefectLink)):
+            proj_roles = _project_role_keys(request, tenant_id, obj.project_id)
         if proj_roles:
             return any(r in proj_roles for r in allowed)
         roles = _role_keys(request, tenant_id)
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .counters import COUNTER_FIELDS, STATUS_FIELDS
+from .models import ExecutionRollup, TestCase, TestRun
+from .rollups import bucket_start
+
+
+ACTIVE_RUN_STATUSES = ('planned', 'running', 'paused')
+
+
+def _cases_key(project_id):
+    return f'tms:portfolio:cases:{project_id}'
+
+
+def case_breakdown(project_ids):
+    """Case counts per project in one grouped query: {project_id: {...}}.
+
+    `by_status` counts every case; `by_priority` and automation coverage only cases
+    that are not archived.
+    """
+    result = {
+        pid: {'total': 0, 'by_status': {}, 'by_priority': {}, 'automated': 0, 'automation_coverage': None}
+        for pid in project_ids
+    }
+    live = dict.fromkeys(project_ids, 0)
+    rows = (
+        TestCase.objects.filter(project_id__in=project_ids)
+        .values('project_id', 'status', 'priority', 'is_automated')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        entry, n = result[row['project_id']], row['n']
+        entry['total'] += n
+        entry['by_status'][row['status']] = entry['by_status'].get(row['status'], 0) + n
+        if row['status'] == 'archived':
+            continue
+        live[row['project_id']] += n
+        entry['by_priority'][row['priority']] = entry['by_priority'].get(row['priority'], 0) + n
+        if row['is_automated']:
+            entry['automated'] += n
+    for pid, entry in result.items():
+        if live[pid]:
+            entry['automation_coverage'] = round(entry['automated'] / live[pid], 4)
+    return result
+
+
+def invalidate(*project_ids):
+    """Drop the cached case breakdown of the projects once the transaction commits."""
+    keys = [_cases_key(pid) for pid in set(project_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def cached_case_breakdown(project_ids):
+    """case_breakdown with one cache entry per project; only missing projects are queried."""
+    keys = {pid: _cases_key(pid) for pid in project_ids}
+    cached = cache.get_many(keys.values())
+    result = {pid: cached[key] for pid, key in keys.items() if key in cached}
+    missing = [pid for pid in project_ids if pid not in result]
+    if missing:
+        fresh = case_breakdown(missing)
+        cache.set_many({keys[pid]: entry for pid, entry in fresh.items()}, settings.PORTFOLIO_CACHE_SECONDS)
+        result.update(fresh)
+    return result
+
+
+def build_portfolio(projects, days):
+    """Summary of the given projects (dicts with id/key/name) for the tenant landing page.
+
+    Cases come from the per-project cache; active runs from the run counters and recent
+    pass rates from the daily execution rollups, one grouped query each.
+    """
+    ids = [project['id'] for project in projects]
+    cases = cached_case_breakdown(ids)
+
+    runs = {pid: {'runs': dict.fromkeys(ACTIVE_RUN_STATUSES, 0), 'total': 0, **dict.fromkeys(STATUS_FIELDS, 0)}
+            for pid in ids}
+    rows = (
+        TestRun.objects.filter(project_id__in=ids, status__in=ACTIVE_RUN_STATUSES)
+        .values('project_id', 'status')
+        .annotate(n=Count('id'), **{f'sum_{f}': Sum(f) for f in COUNTER_FIELDS})
+        .order_by()
+    )
+    for row in rows:
+        entry = runs[row['project_id']]
+        entry['runs'][row['status']] = row['n']
+        entry['total'] += row['sum_total_count'] or 0
+        for status, field in STATUS_FIELDS.items():
+            entry[status] += row[f'sum_{field}'] or 0
+
+    since = bucket_start(timezone.now() - timedelta(days=days - 1), 'day')
+    recent = {
+        row['project_id']: row
+        for row in ExecutionRollup.objects.filter(project_id__in=ids, granularity='day', bucket__gte=since)
+        .values('project_id')
+        .annotate(executions=Sum('executions'), passed=Sum('passed'), failed=Sum('failed'), blocked=Sum('blocked'))
+        .order_by()
+    }
+
+    summary = {'projects': len(ids), 'cases': 0, 'active_runs': 0, 'executions': 0, 'passed': 0}
+    items = []
+    for project in projects:
+        pid = project['id']
+        active = runs[pid]
+        done = recent.get(pid, {})
+        executions, passed = done.get('executions') or 0, done.get('passed') or 0
+        items.append({
+            **project,
+            'cases': cases[pid],
+            'active_runs': {
+                **active['runs'], 'total': active['total'],
+                'remaining': active['not_started'] + active['in_progress'],
+                **{status: active[status] for status in STATUS_FIELDS},
+            },
+            'recent': {
+                'days': days, 'executions': executions, 'passed': passed,
+                'failed': done.get('failed') or 0, 'blocked': done.get('blocked') or 0,
+                'pass_rate': round(passed / executions, 4) if executions else None,
+            },
+        })
+        summary['cases'] += cases[pid]['total']
+        summary['active_runs'] += sum(active['runs'].values())
+        summary['executions'] += executions
+        summary['passed'] += passed
+    summary['pass_rate'] = round(summary['passed'] / summary['executions'], 4) if summary['executions'] else None
+    return {'days': days, 'summary': summary, 'projects': items}
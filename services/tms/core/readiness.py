@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .counters import STATUS_FIELDS
+from .models import DefectLink, TestRun
+
+
+FAILING = ('failed', 'blocked')
+# Statuses `rerun` copies by default; a rerun whose size matches them replaces that part
+RERUN_STATUSES = ('failed', 'blocked', 'skipped')
+
+
+def _counts(run):
+    return {status: run[field] for status, field in STATUS_FIELDS.items()}
+
+
+def _rate(part, total):
+    return round(part / total, 4) if total else None
+
+
+def _plan_state(runs, children):
+    """Effective counts of a plan and the run that holds its open failures.
+
+    The plan's latest executed root run (a root still `planned` or without instances
+    does not replace the previous one; it only counts when the plan has nothing
+    else), overlaid by its latest rerun chain: a rerun that covers exactly the
+    failed/blocked/skipped part of its parent replaces that part, so cases fixed in a
+    rerun count as passed. A rerun of some other subset is not merged.
+    """
+    ids = {run['id'] for run in runs}
+    roots = [run for run in runs if run['parent_run_id'] not in ids]
+    executed = [run for run in roots if run['status'] != 'planned' and run['total_count']]
+    root = (executed or roots)[-1]
+    state = _counts(root)
+    current = root
+    while children.get(current['id']):
+        child = children[current['id']][-1]
+        if sum(current[STATUS_FIELDS[s]] for s in RERUN_STATUSES) != child['total_count']:
+            break
+        rerun = _counts(child)
+        state['passed'] += rerun['passed']
+        state['not_started'] += rerun['not_started']
+        state['in_progress'] += rerun['in_progress']
+        for status in RERUN_STATUSES:
+            state[status] = rerun[status]
+        current = child
+    return state, current
+
+
+def _run_defects(runs):
+    """Defects linked to failed/blocked instances of the runs: {run_id: [defect, ...]}.
+
+    Only the links are read (instance PK join); passed instances are never touched.
+    """
+    rows = (
+        DefectLink.objects.filter(instance__run_id__in=[run['id'] for run in runs], instance__status__in=FAILING)
+        .values('instance__run_id', 'key', 'tracker')
+        .annotate(instances=Count('instance_id'), link_url=Max('url'), link_title=Max('title'))
+        .order_by()
+    )
+    result = {run['id']: [] for run in runs}
+    for row in rows:
+        result[row['instance__run_id']].append({
+            'key': row['key'], 'tracker': row['tracker'], 'url': row['link_url'], 'title': row['link_title'],
+            'instances': row['instances'],
+        })
+    return result
+
+
+def build_readiness(release, cached_defects=None):
+    """Go/no-go rollup of a release from the per-run counters of its plans' runs.
+
+    Reads the run rows only; defects come from `cached_defects` (run id -> {'stamp',
+    'defects'}) where a run's failed/blocked counters still match, so only runs with
+    new results are re-queried. Returns the rollup and the refreshed defect entries.
+    """
+    runs = list(
+        TestRun.objects.filter(plan__release_id=release.id).exclude(status='canceled')
+        .values('id', 'plan_id', 'plan__name', 'parent_run_id', 'name', 'status',
+                'started_at', 'finished_at', 'created_at', 'total_count', *STATUS_FIELDS.values())
+        .order_by('id')
+    )
+    by_plan, children = {}, {}
+    for run in runs:
+        by_plan.setdefault(run['plan_id'], []).append(run)
+        if run['parent_run_id']:
+            children.setdefault(run['parent_run_id'], []).append(run)
+
+    totals = dict.fromkeys(STATUS_FIELDS, 0)
+    plans, holders = [], []
+    for plan_runs in by_plan.values():
+        state, holder = _plan_state(plan_runs, children)
+        holders.append(holder)
+        for status, n in state.items():
+            totals[status] += n
+        total = sum(state.values())
+        plans.append({
+            'plan': plan_runs[0]['plan_id'], 'name': plan_runs[0]['plan__name'], 'runs': len(plan_runs),
+            'run': holder['id'], 'total': total, **state,
+            'pass_rate': _rate(state['passed'], total),
+        })
+
+    cached_defects = cached_defects or {}
+    entries, stale = {}, []
+    for run in holders:
+        stamp = [run['failed_count'], run['blocked_count']]
+        entry = cached_defects.get(run['id'])
+        if entry and entry['stamp'] == stamp:
+            entries[run['id']] = entry
+        else:
+            entries[run['id']] = {'stamp': stamp, 'defects': []}
+            if any(stamp):
+                stale.append(run)
+    if stale:
+        for run_id, defects in _run_defects(stale).items():
+            entries[run_id]['defects'] = defects
+
+    blocking = {}
+    for entry in entries.values():
+        for defect in entry['defects']:
+            merged = blocking.setdefault((defect['tracker'], defect['key']), dict(defect, instances=0))
+            merged['instances'] += defect['instances']
+
+    total = sum(totals.values())
+    remaining = totals['not_started'] + totals['in_progress']
+    failing = totals['failed'] + totals['blocked']
+    rollup = {
+        'release': {'id': release.id, 'name': release.name, 'version': release.version, 'due_date': release.due_date},
+        'ready': bool(total) and not remaining and not failing,
+        'summary': {
+            'plans': len(plans), 'runs': len(runs), 'total': total, **totals,
+            'remaining': remaining,
+            'pass_rate': _rate(totals['passed'], total),
+            'executed_rate': _rate(total - remaining, total),
+        },
+        'plans': plans,
+        'blocking_defects': sorted(blocking.values(), key=lambda d: (-d['instances'], d['key'])),
+        'trend': [
+            {
+                'run': run['id'], 'plan': run['plan_id'], 'parent_run': run['parent_run_id'], 'name': run['name'],
+                'status': run['status'], 'started_at': run['started_at'] or run['created_at'],
+                'finished_at': run['finished_at'], 'total': run['total_count'],
+                'passed': run['passed_count'], 'failed': run['failed_count'], 'blocked': run['blocked_count'],
+                'pass_rate': _rate(run['passed_count'], run['total_count']),
+            }
+            for run in sorted(runs, key=lambda r: (r['started_at'] or r['created_at'], r['id']))
+        ],
+    }
+    return rollup, entries
+
+
+def cached_readiness(release):
+    """build_readiness with the per-run defect entries kept in cache per release.
+
+    Counters are re-read on every call, so pass rate, remaining work and trend are
+    always current; the defect part of a run is refreshed when its failed/blocked
+    counters move, and at the latest after READINESS_CACHE_SECONDS.
+    """
+    key = f'tms:readiness:{release.id}'
+    cached = cache.get(key)
+    rollup, entries = build_readiness(release, cached)
+    if entries != cached:
+        cache.set(key, entries, settings.READINESS_CACHE_SECONDS)
+    return rollup
@@ -0,0 +1,92 @@
+import operator
+from collections import Counter, defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ExecutionRollup, TestCase
+
+
+GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+OUTCOMES = ('passed', 'failed', 'blocked', 'skipped')
+KEY_FIELDS = ('project_id', 'granularity', 'bucket', 'section_id', 'priority', 'assignee_user_id')
+VALUE_FIELDS = ('executions', *OUTCOMES, 'duration_count', 'duration_total')
+
+
+def bucket_start(moment, granularity):
+    """Start of the UTC hour/day containing `moment`."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def aggregate(rows, totals=None):
+    """Fold (project_id, section_id, priority, assignee_user_id, finished_at, status,
+    duration_seconds) rows into per-bucket totals, both granularities: {key: Counter}."""
+    totals = totals if totals is not None else defaultdict(Counter)
+    for project_id, section_id, priority, assignee, finished_at, status, seconds in rows:
+        for granularity in GRANULARITIES:
+            key = (project_id, granularity, bucket_start(finished_at, granularity),
+                   section_id or 0, priority or '', assignee or 0)
+            values = totals[key]
+            values['executions'] += 1
+            if status in OUTCOMES:
+                values[status] += 1
+            if seconds is not None:
+                values['duration_count'] += 1
+                values['duration_total'] += seconds
+    return totals
+
+
+def apply(totals):
+    """Add aggregated totals to their rollup rows (created on first use).
+
+    Rows are locked in id order so concurrent finishes in the same bucket add up
+    instead of overwriting each other.
+    """
+    if not totals:
+        return
+    with transaction.atomic():
+        ExecutionRollup.objects.bulk_create(
+            [ExecutionRollup(**dict(zip(KEY_FIELDS, key))) for key in totals], ignore_conflicts=True,
+        )
+        match = reduce(operator.or_, (Q(**dict(zip(KEY_FIELDS, key))) for key in totals))
+        rows = list(ExecutionRollup.objects.select_for_update().filter(match).order_by('id'))
+        now = timezone.now()
+        for row in rows:
+            row.updated_at = now
+            values = totals[tuple(getattr(row, field) for field in KEY_FIELDS)]
+            for field in VALUE_FIELDS:
+                setattr(row, field, getattr(row, field) + values[field])
+        ExecutionRollup.objects.bulk_update(rows, [*VALUE_FIELDS, 'updated_at'])
+
+
+def record(instances):
+    """Count instances that have just finished into the hourly and daily rollups.
+
+    Call with the same instances as stats.record_finished, inside the transaction that
+    finishes them. Instances updated in bulk without a timestamp count at now.
+
+    Only the transition into a finished state counts: callers pass instances whose
+    `finished_at` was empty under the row lock. Re-marking a finished instance
+    (`results` or `pass_case` again) neither adds an execution nor moves it to another
+    outcome, so a bucket keeps the first result. An instance reset to not_started and
+    executed again is a new execution and counts again.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+    cases = {
+        tc_id: (section_id, priority)
+        for tc_id, section_id, priority in TestCase.objects.filter(
+            id__in={inst.testcase_id for inst in instances},
+        ).values_list('id', 'section_id', 'priority')
+    }
+    now = timezone.now()
+    apply(aggregate(
+        (inst.run.project_id, *cases.get(inst.testcase_id, (None, '')), inst.assignee_user_id,
+         inst.finished_at or now, inst.status, inst.duration_seconds)
+        for inst in instances
+    ))
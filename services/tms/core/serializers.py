@@ -1,3 +1,5 @@
+import re
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     Project,
@@ -15,7 +17,10 @@ from .models import (
     Requirement,
     TestImportJob,
     TestExportJob,
+    InstanceArtifact,
+    DefectLink,
 )
+from .defects import parse_defect
 
 class TestSectionSerializer(serializers.ModelSerializer):
     child_count = serializers.SerializerMethodField()
@@ -26,6 +31,10 @@ class TestSectionSerializer(serializers.ModelSerializer):
         read_only_fields = ['path', 'child_count']
 
     def get_child_count(self, obj):
+        # Annotated by TestSectionViewSet's queryset; fall back for freshly created objects
+        annotated = getattr(obj, 'child_count', None)
+        if annotated is not None:
+            return annotated
         return obj.children.count()
 
 
@@ -49,17 +58,24 @@ class ProjectSerializer(serializers.ModelSerializer):
 
 
 class TestCaseSerializer(serializers.ModelSerializer):
+    # Free-form tags; same length limit as TestTag.name
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
     labels = serializers.PrimaryKeyRelatedField(queryset=TestTag.objects.all(), many=True, required=False)
     requirements = serializers.PrimaryKeyRelatedField(queryset=Requirement.objects.all(), many=True, required=False)
+    flaky_score = serializers.SerializerMethodField()
 
     class Meta:
         model = TestCase
         fields = [
             'id', 'project', 'section', 'title', 'description', 'steps', 'tags', 'labels',
             'requirements', 'status', 'priority', 'version', 'created_at', 'updated_at',
-            'is_automated', 'automation_type', 'automation_ref',
+            'is_automated', 'automation_type', 'automation_ref', 'flaky_score',
         ]
 
+    def get_flaky_score(self, obj):
+        # Annotated by TestCaseViewSet.get_queryset; absent on freshly created objects
+        return getattr(obj, 'flaky_score', None)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get('request')
@@ -88,6 +104,11 @@ class ReleaseSerializer(serializers.ModelSerializer):
 
 
 class TestCaseVersionSerializer(serializers.ModelSerializer):
+    # Content is stored once per distinct hash (TestCaseVersionContent)
+    description = serializers.CharField(source='content.description', read_only=True)
+    steps = serializers.JSONField(source='content.steps', read_only=True)
+    expected = serializers.JSONField(source='content.expected', read_only=True)
+
     class Meta:
         model = TestCaseVersion
         fields = ['id', 'testcase', 'version', 'title', 'description', 'steps', 'expected', 'created_at']
@@ -114,20 +135,84 @@ class TestRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = TestRun
         fields = [
-            'id', 'project', 'plan', 'name', 'status', 'scheduled_at', 'started_at', 'finished_at',
-            'is_automation', 'created_by_user_id', 'created_at'
+            'id', 'project', 'plan', 'parent_run', 'name', 'status', 'scheduled_at', 'started_at', 'finished_at',
+            'is_automation', 'created_by_user_id', 'created_at', 'total_count', 'not_started_count',
+            'in_progress_count', 'blocked_count', 'passed_count', 'failed_count', 'skipped_count',
+        ]
+        read_only_fields = [
+            'status', 'parent_run', 'started_at', 'finished_at', 'created_by_user_id', 'created_at', 'total_count',
+            'not_started_count', 'in_progress_count', 'blocked_count', 'passed_count', 'failed_count', 'skipped_count',
         ]
-        read_only_fields = ['status', 'started_at', 'finished_at', 'created_by_user_id', 'created_at']
+
+
+class DefectLinkSerializer(serializers.ModelSerializer):
+    key = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    tracker = serializers.ChoiceField(choices=DefectLink.TRACKER_CHOICES, required=False, allow_blank=True)
+
+    class Meta:
+        model = DefectLink
+        fields = ['id', 'instance', 'project', 'tracker', 'key', 'url', 'title', 'created_by_user_id', 'created_at']
+        read_only_fields = ['project', 'created_by_user_id', 'created_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        tenant_id = getattr(request, 'tenant_id', None) if request else None
+        if tenant_id and 'instance' in self.fields:
+            self.fields['instance'].queryset = TestInstance.objects.filter(tenant_id=tenant_id)
+
+    def validate(self, attrs):
+        fields = parse_defect(
+            {'key': attrs.get('key'), 'url': attrs.get('url')}, attrs.get('title', ''), attrs.get('tracker', ''),
+        )
+        if not fields:
+            raise serializers.ValidationError('key or url required')
+        return {**attrs, **fields}
 
 
 class TestInstanceSerializer(serializers.ModelSerializer):
+    defects = DefectLinkSerializer(source='defect_links', many=True, read_only=True)
+
     class Meta:
         model = TestInstance
         fields = [
             'id', 'run', 'testcase', 'testcase_version', 'assignee_user_id', 'status', 'actual_result',
-            'defects', 'duration_seconds', 'automation_ref', 'started_at', 'finished_at', 'order'
+            'defects', 'duration_seconds', 'automation_ref', 'started_at', 'finished_at', 'lease_expires_at', 'order',
+            'failure_signature', 'actual_result_truncated',
+        ]
+        read_only_fields = [
+            'duration_seconds', 'started_at', 'finished_at', 'lease_expires_at', 'order', 'failure_signature',
+            'actual_result_truncated',
+        ]
+
+    def validate(self, attrs):
+        # `defects` used to be a writable JSON list; refuse it instead of silently dropping the write
+        if 'defects' in getattr(self, 'initial_data', {}):
+            raise serializers.ValidationError({
+                'defects': 'Read-only; link defects with POST /api/instances/{id}/link_defect/ or /api/defect-links/',
+            })
+        return attrs
+
+
+class InstanceArtifactSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InstanceArtifact
+        fields = [
+            'id', 'instance', 'project', 'kind', 'name', 'content_type', 'size', 'sha256', 'status',
+            'created_by_user_id', 'created_at', 'uploaded_at',
         ]
-        read_only_fields = ['duration_seconds', 'started_at', 'finished_at', 'order']
+        read_only_fields = ['instance', 'project', 'status', 'created_by_user_id', 'created_at', 'uploaded_at']
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError('Must be a hex SHA-256 digest')
+        return value
+
+    def validate_size(self, value):
+        if value < 0 or value > settings.ARTIFACT_MAX_BYTES:
+            raise serializers.ValidationError(f'Must be between 0 and {settings.ARTIFACT_MAX_BYTES} bytes')
+        return value
 
 
 class TestImportJobSerializer(serializers.ModelSerializer):
@@ -0,0 +1,69 @@
+import heapq
+import statistics
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg
+from django.utils import timezone
+
+from .models import TestInstance
+
+
+def _history_key(project_id):
+    return f'tms:shards:durations:{project_id}'
+
+
+def project_duration_history(project_id):
+    """Mean duration (seconds) per automation_ref over the project's recent finished instances.
+
+    Computed with one grouped aggregate and cached per project for
+    SHARD_DURATIONS_CACHE_SECONDS, so shard planning never scans history on the hot path.
+    """
+    key = _history_key(project_id)
+    history = cache.get(key)
+    if history is not None:
+        return history
+    since = timezone.now() - timezone.timedelta(days=settings.SHARD_HISTORY_DAYS)
+    rows = (
+        TestInstance.objects
+        .filter(run__project_id=project_id, finished_at__gte=since, duration_seconds__isnull=False,
+                status__in=('passed', 'failed'))
+        .exclude(automation_ref='')
+        .values('automation_ref')
+        .annotate(mean=Avg('duration_seconds'))
+    )
+    history = {r['automation_ref']: float(r['mean']) for r in rows}
+    cache.set(key, history, settings.SHARD_DURATIONS_CACHE_SECONDS)
+    return history
+
+
+def invalidate_duration_history(project_id):
+    cache.delete(_history_key(project_id))
+
+
+def plan_shards(refs, durations, workers, fallback):
+    """Longest-processing-time-first assignment of refs to `workers` buckets.
+
+    `durations` maps ref -> expected seconds; refs without history use `fallback`.
+    Returns (shards, makespan) where each shard is {'index', 'predicted_seconds', 'automation_refs'}.
+    """
+    jobs = sorted(((durations.get(ref, fallback), ref) for ref in refs), key=lambda j: (-j[0], j[1]))
+    shards = [{'index': i, 'predicted_seconds': 0.0, 'automation_refs': []} for i in range(workers)]
+    heap = [(0.0, i) for i in range(workers)]
+    for seconds, ref in jobs:
+        load, idx = heapq.heappop(heap)
+        shards[idx]['automation_refs'].append(ref)
+        load += seconds
+        shards[idx]['predicted_seconds'] = load
+        heapq.heappush(heap, (load, idx))
+    for shard in shards:
+        shard['predicted_seconds'] = round(shard['predicted_seconds'], 1)
+    makespan = max((s['predicted_seconds'] for s in shards), default=0.0)
+    return shards, makespan
+
+
+def fallback_duration(history):
+    """Estimate for tests never seen before: median of known means, else the configured default."""
+    if history:
+        return float(statistics.median(history.values()))
+    return float(settings.SHARD_DEFAULT_DURATION_SECONDS)
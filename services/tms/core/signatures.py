@@ -0,0 +1,83 @@
+import hashlib
+import re
+
+
+# Statuses whose actual_result is fingerprinted for triage
+FAILING = ('failed', 'blocked')
+# Innermost stack frames that take part in the signature
+TOP_FRAMES = 5
+# Leading message lines (exception text, assertion) that take part in the signature
+MESSAGE_LINES = 3
+
+_PY_FRAME = re.compile(r'^\s*File "(?P<path>[^"]+)", line \d+, in (?P<func>\S+)')
+_JAVA_FRAME = re.compile(r'^\s*at (?P<func>[\w$.<>]+)\(')
+_JS_FRAME = re.compile(r'^\s*at (?:(?P<func>[^\s(]+) )?\(?(?P<path>[^()\s]+?)(?::\d+)+\)?$')
+
+# Order matters: strip the most specific volatile tokens before generic numbers
+_NORMALIZERS = (
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.I), '<id>'),
+    (re.compile(r'\b\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<ts>'),
+    (re.compile(r'\b[a-z][a-z0-9+.-]*://\S+', re.I), '<url>'),
+    (re.compile(r'(?:[a-z]:)?(?:[\\/][\w.@~-]+){2,}[\\/]?', re.I), '<path>'),
+    (re.compile(r'\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b', re.I), '<hex>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize_line(line):
+    line = line.strip()
+    for pattern, repl in _NORMALIZERS:
+        line = pattern.sub(repl, line)
+    return line.lower()
+
+
+def _frame(line):
+    """Normalized 'module:function' of a stack frame line, or None for other lines."""
+    m = _PY_FRAME.match(line)
+    if m:
+        module = re.split(r'[\\/]', m.group('path'))[-1]
+        return f"{module}:{m.group('func')}"
+    m = _JAVA_FRAME.match(line)
+    if m:
+        return m.group('func')
+    m = _JS_FRAME.match(line)
+    if m:
+        module = re.split(r'[\\/]', m.group('path'))[-1].split(':')[0]
+        return f"{module}:{m.group('func') or '<anonymous>'}"
+    return None
+
+
+def failure_signature(text):
+    """Stable fingerprint of a failure text (error message + stack trace).
+
+    Numbers, ids, timestamps, URLs and paths are masked so reruns of the same failure
+    hash identically; frames keep only file basename and function. Python tracebacks
+    list the innermost frame last, so their tail is used. Returns '' for empty input.
+    """
+    if not text or not text.strip():
+        return ''
+    frames, messages = [], []
+    python_order = after_py_frame = False
+    for line in text.splitlines():
+        if line.startswith('Traceback (most recent call last)'):
+            python_order = True
+            continue
+        frame = _frame(line)
+        if frame:
+            frames.append(frame)
+            after_py_frame = bool(_PY_FRAME.match(line))
+            continue
+        if after_py_frame:
+            # Source line echoed under a Python frame
+            after_py_frame = False
+            continue
+        normalized = normalize_line(line)
+        if normalized and normalized not in messages:
+            messages.append(normalized)
+    frames = frames[-TOP_FRAMES:] if python_order else frames[:TOP_FRAMES]
+    if python_order:
+        # The exception itself is printed after the traceback
+        messages = messages[::-1]
+    basis = '\n'.join(messages[:MESSAGE_LINES] + frames)
+    return hashlib.sha1(basis.encode('utf-8')).hexdigest()
@@ -0,0 +1,129 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TestCaseStats
+
+
+# Relative accuracy of quantiles read from the sketch (DDSketch-style log buckets):
+# every value in bucket i lies within +/-ALPHA of the bucket's representative value.
+ALPHA = 0.05
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_of(seconds):
+    if seconds <= 0:
+        return 0
+    # Shift by one so that bucket 0 stays reserved for zero durations
+    return max(1, math.ceil(math.log(seconds) / _LOG_GAMMA) + 1)
+
+
+def bucket_value(index):
+    if index <= 0:
+        return 0.0
+    return 2 * GAMMA ** (index - 1) / (GAMMA + 1)
+
+
+def sketch_add(sketch, seconds):
+    key = str(bucket_of(seconds))
+    sketch[key] = sketch.get(key, 0) + 1
+
+
+def sketch_merge(*sketches):
+    """Sketch of the union of the samples; bucket counts simply add up."""
+    merged = {}
+    for sketch in sketches:
+        for key, n in sketch.items():
+            merged[key] = merged.get(key, 0) + n
+    return merged
+
+
+def sketch_quantile(sketch, q):
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(sketch, key=int):
+        seen += sketch[key]
+        if seen > rank:
+            return round(bucket_value(int(key)), 2)
+    return round(bucket_value(max(map(int, sketch))), 2)
+
+
+def apply_samples(stats, samples):
+    """Fold new duration samples into a TestCaseStats row (running mean + sketch)."""
+    sketch = dict(stats.sketch or {})
+    count, mean = stats.count, stats.mean_seconds
+    for seconds in samples:
+        count += 1
+        mean += (seconds - mean) / count
+        sketch_add(sketch, seconds)
+    stats.count = count
+    stats.mean_seconds = mean
+    stats.sketch = sketch
+    stats.p50_seconds = sketch_quantile(sketch, 0.5)
+    stats.p90_seconds = sketch_quantile(sketch, 0.9)
+    stats.updated_at = timezone.now()
+
+
+# Pass/fail outcomes kept per case for flakiness scoring (oldest first, 'P'/'F')
+OUTCOME_CODES = {'passed': 'P', 'failed': 'F'}
+# One letter per finished status, for compact result strings (case history sparkline)
+RESULT_CODES = {**OUTCOME_CODES, 'blocked': 'B', 'skipped': 'S'}
+
+
+def apply_outcomes(stats, outcomes):
+    """Slide the recent-outcome window and rescore flakiness.
+
+    The score is the share of consecutive results in the window that flip between
+    pass and fail: 0 for stable cases (always passing or always failing), 1 for a case
+    that alternates on every run.
+    """
+    window = (stats.recent_outcomes + ''.join(outcomes))[-settings.FLAKY_WINDOW:]
+    flips = sum(1 for prev, cur in zip(window, window[1:]) if prev != cur)
+    stats.recent_outcomes = window
+    stats.flips = flips
+    stats.flaky_score = round(flips / (len(window) - 1), 4) if len(window) > 1 else 0.0
+    stats.updated_at = timezone.now()
+
+
+def record_finished(instances):
+    """Update duration and flakiness statistics for instances that have just finished.
+
+    Call with the instances (already saved) that finished in this request. Positive
+    durations feed the duration sketch, passed/failed outcomes the flakiness window.
+    Rows are locked so concurrent updates for the same case serialize instead of
+    losing samples.
+    """
+    samples = defaultdict(list)
+    outcomes = defaultdict(list)
+    projects = {}
+    for inst in instances:
+        if inst.duration_seconds and inst.duration_seconds > 0:
+            samples[inst.testcase_id].append(inst.duration_seconds)
+        if inst.status in OUTCOME_CODES:
+            outcomes[inst.testcase_id].append(OUTCOME_CODES[inst.status])
+        projects[inst.testcase_id] = inst.run.project_id
+    case_ids = set(samples) | set(outcomes)
+    if not case_ids:
+        return
+    with transaction.atomic():
+        TestCaseStats.objects.bulk_create(
+            [TestCaseStats(testcase_id=tc_id, project_id=projects[tc_id]) for tc_id in case_ids],
+            ignore_conflicts=True,
+        )
+        rows = list(TestCaseStats.objects.select_for_update().filter(testcase_id__in=case_ids).order_by('testcase_id'))
+        for stats in rows:
+            if samples.get(stats.testcase_id):
+                apply_samples(stats, samples[stats.testcase_id])
+            if outcomes.get(stats.testcase_id):
+                apply_outcomes(stats, outcomes[stats.testcase_id])
+        TestCaseStats.objects.bulk_update(rows, [
+            'count', 'mean_seconds', 'p50_seconds', 'p90_seconds', 'sketch',
+            'recent_outcomes', 'flips', 'flaky_score', 'updated_at',
+        ])
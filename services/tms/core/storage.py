@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import shutil
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+
+_LOCAL_SALT = 'tms.artifacts.local'
+
+
+def content_key(tenant_id, project_id, sha256):
+    """Content-addressed object key within a project: identical bytes are stored once per
+    project whatever their name. Projects never share objects, so knowing a digest does
+    not give access to another project's upload."""
+    return f't/{tenant_id}/p/{project_id}/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class S3ArtifactStorage:
+    """Artifacts in an S3-compatible bucket (MinIO in docker-compose).
+
+    Clients upload and download directly with presigned URLs; TMS only signs them.
+    `ARTIFACT_S3_PUBLIC_ENDPOINT_URL` is the address browsers/runners reach, which is
+    usually not the in-cluster endpoint the service itself talks to.
+    """
+
+    def __init__(self):
+        self.bucket = settings.ARTIFACT_S3_BUCKET
+        self._bucket_checked = False
+
+    def _client(self, public=False):
+        import boto3
+        from botocore.config import Config
+        endpoint = settings.ARTIFACT_S3_PUBLIC_ENDPOINT_URL if public else settings.ARTIFACT_S3_ENDPOINT_URL
+        return boto3.client(
+            's3',
+            endpoint_url=endpoint or settings.ARTIFACT_S3_ENDPOINT_URL or None,
+            aws_access_key_id=settings.ARTIFACT_S3_ACCESS_KEY,
+            aws_secret_access_key=settings.ARTIFACT_S3_SECRET_KEY,
+            region_name=settings.ARTIFACT_S3_REGION,
+            config=Config(signature_version='s3v4', s3={'addressing_style': 'path'}),
+        )
+
+    def ensure_bucket(self):
+        if self._bucket_checked:
+            return
+        client = self._client()
+        try:
+            client.head_bucket(Bucket=self.bucket)
+        except Exception:
+            client.create_bucket(Bucket=self.bucket)
+        self._bucket_checked = True
+
+    def upload_url(self, key, sha256, content_type, size):
+        self.ensure_bucket()
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self._client(public=True).generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket, 'Key': key, 'ContentType': content_type,
+                'ContentLength': size, 'ChecksumSHA256': checksum,
+            },
+            ExpiresIn=settings.ARTIFACT_URL_EXPIRES_SECONDS,
+        )
+        # The store rejects bodies whose digest differs from the key
+        return {'method': 'PUT', 'url': url, 'headers': {
+            'Content-Type': content_type, 'x-amz-checksum-sha256': checksum,
+        }}
+
+    def download_url(self, key, filename, content_type):
+        return self._client(public=True).generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket, 'Key': key,
+                'ResponseContentType': content_type,
+                'ResponseContentDisposition': f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=settings.ARTIFACT_URL_EXPIRES_SECONDS,
+        )
+
+    def size_of(self, key):
+        """Stored object size in bytes, or None when it has not been uploaded."""
+        try:
+            head = self._client().head_object(Bucket=self.bucket, Key=key)
+        except Exception:
+            return None
+        return head['ContentLength']
+
+    def put_bytes(self, key, data, content_type):
+        self.ensure_bucket()
+        self._client().put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+
+    def copy(self, source_key, key):
+        self._client().copy_object(Bucket=self.bucket, Key=key, CopySource={'Bucket': self.bucket, 'Key': source_key})
+
+    def delete(self, key):
+        self._client().delete_object(Bucket=self.bucket, Key=key)
+
+
+class LocalArtifactStorage:
+    """Filesystem stand-in for development and tests.
+
+    "Presigned" URLs point to TMS itself (`artifact_blob` view) and carry a signed,
+    expiring token, so clients use the same upload/download flow as with S3.
+    """
+
+    def __init__(self):
+        self.root = Path(settings.TEST_MANAGER_ARTIFACT_ROOT)
+
+    def path_of(self, key):
+        return self.root / key
+
+    def _signed_url(self, key, method, **extra):
+        token = signing.dumps({'key': key, 'method': method, **extra}, salt=_LOCAL_SALT)
+        return reverse('artifact-blob', args=[token])
+
+    def upload_url(self, key, sha256, content_type, size):
+        return {
+            'method': 'PUT', 'url': self._signed_url(key, 'PUT', size=size, sha256=sha256),
+            'headers': {'Content-Type': content_type},
+        }
+
+    def download_url(self, key, filename, content_type):
+        return self._signed_url(key, 'GET', filename=filename, content_type=content_type)
+
+    def size_of(self, key):
+        path = self.path_of(key)
+        return path.stat().st_size if path.exists() else None
+
+    def put_bytes(self, key, data, content_type):
+        path = self.path_of(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def copy(self, source_key, key):
+        path = self.path_of(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.path_of(source_key), path)
+
+    def delete(self, key):
+        self.path_of(key).unlink(missing_ok=True)
+
+    @staticmethod
+    def load_token(token):
+        return signing.loads(token, salt=_LOCAL_SALT, max_age=settings.ARTIFACT_URL_EXPIRES_SECONDS)
+
+
+@lru_cache(maxsize=1)
+def get_storage():
+    if settings.ARTIFACT_STORAGE == 's3':
+        return S3ArtifactStorage()
+    return LocalArtifactStorage()
+
+
+def offload_text(tenant_id, project_id, text):
+    """Store a long text (full actual_result log) of the project and return (sha256, size, key)."""
+    data = text.encode('utf-8')
+    sha = sha256_hex(data)
+    key = content_key(tenant_id, project_id, sha)
+    storage = get_storage()
+    if storage.size_of(key) is None:
+        storage.put_bytes(key, data, 'text/plain; charset=utf-8')
+    return sha, len(data), key
+
+
+def preview(text):
+    """Truncated actual_result kept in the instance row when the full text is offloaded."""
+    limit = settings.ACTUAL_RESULT_PREVIEW_CHARS
+    if len(text) <= limit:
+        return text, False
+    return text[:limit], True
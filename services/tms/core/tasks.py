@@ -0,0 +1,44 @@
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TestInstance
+from . import counters
+from . import events
+from . import launcher
+
+
+@shared_task(name='core.tasks.reclaim_expired_leases_task')
+def reclaim_expired_leases_task():
+    """Return in-progress instances whose work-queue lease expired to `not_started`.
+
+    An assignment made by the claim itself is dropped so any agent can pick the
+    instance up again; one that predates the claim or was changed since is kept.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        expired = list(
+            TestInstance.objects.select_for_update(skip_locked=True)
+            .select_related('run')
+            .filter(status='in_progress', lease_expires_at__lt=now)
+        )
+        for inst in expired:
+            inst.status = 'not_started'
+            inst.started_at = None
+            inst.lease_expires_at = None
+            if inst.claimed_by_user_id is not None and inst.assignee_user_id == inst.claimed_by_user_id:
+                inst.assignee_user_id = None
+            inst.claimed_by_user_id = None
+        TestInstance.objects.bulk_update(
+            expired, ['status', 'started_at', 'lease_expires_at', 'assignee_user_id', 'claimed_by_user_id'],
+        )
+        counters.transitions((inst.run_id, 'in_progress', 'not_started') for inst in expired)
+        for inst in expired:
+            events.publish_instances(inst.run, [inst], 'instance.reclaimed')
+    return len(expired)
+
+
+@shared_task(name='core.tasks.launch_scheduled_runs_task')
+def launch_scheduled_runs_task():
+    """Start planned runs whose scheduled_at is due (materializes their instances)."""
+    return launcher.launch_due_runs()
@@ -0,0 +1,35 @@
+"""Shared setup for API tests: orgs lookups are stubbed so every user owns every tenant."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.auth import ExternalUser
+
+
+def _memberships(tenant_id, user_id):
+    return [{'tenant': tenant_id, 'user_id': user_id, 'role_key': 'owner'}]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class APITestCase(TestCase):
+    tenant_id = 1
+    user_id = 1
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for patcher in (
+            mock.patch('core.permissions._fetch_memberships', side_effect=_memberships),
+            mock.patch('core.permissions._fetch_project_memberships', return_value=[]),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def client_for(self, user_id=None, tenant_id=None):
+        """API client authenticated as `user_id` in `tenant_id` (the class defaults)."""
+        client = APIClient()
+        client.force_authenticate(ExternalUser(user_id or self.user_id))
+        client.credentials(HTTP_X_TENANT_ID=str(tenant_id or self.tenant_id))
+        return client
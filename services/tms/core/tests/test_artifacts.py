@@ -0,0 +1,105 @@
+import hashlib
+import io
+import tempfile
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from core import storage
+from core.models import InstanceArtifact, Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+DATA = b'stack trace of tenant one\n'
+SHA = hashlib.sha256(DATA).hexdigest()
+
+
+class ArtifactTenantIsolationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(ARTIFACT_STORAGE='local', TEST_MANAGER_ARTIFACT_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        storage.get_storage.cache_clear()
+        self.addCleanup(storage.get_storage.cache_clear)
+        self.instances = {tenant_id: self._instance(tenant_id) for tenant_id in (1, 2)}
+
+    def _instance(self, tenant_id, key='P'):
+        project = Project.objects.create(tenant_id=tenant_id, key=key, name=f'Project {tenant_id} {key}')
+        run = TestRun.objects.create(project=project, name='Run', status='running')
+        case = Case.objects.create(project=project, title='Case')
+        return TestInstance.objects.create(run=run, tenant_id=tenant_id, testcase=case)
+
+    def _register(self, tenant_id, inst=None):
+        client = self.client_for(tenant_id=tenant_id)
+        resp = client.post(f'/api/instances/{(inst or self.instances[tenant_id]).id}/artifacts/',
+                           {'name': 'run.log', 'size': len(DATA), 'sha256': SHA}, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return client, resp.data
+
+    def _upload(self, tenant_id, inst=None):
+        client, artifact = self._register(tenant_id, inst)
+        spec = artifact['upload']
+        self.assertEqual(client.put(spec['url'], DATA, content_type='text/plain').status_code, 200)
+        self.assertEqual(client.post(f"/api/artifacts/{artifact['id']}/complete/").status_code, 200)
+        return artifact
+
+    def test_second_tenant_cannot_complete_or_download_with_a_known_digest(self):
+        first = self._upload(1)
+        client, artifact = self._register(2)
+        # Same digest, but nothing is stored for tenant 2 yet: no dedup, no completion
+        self.assertEqual(artifact['status'], 'pending')
+        self.assertIsNotNone(artifact['upload'])
+        self.assertEqual(client.post(f"/api/artifacts/{artifact['id']}/complete/").status_code, 409)
+        self.assertEqual(client.get(f"/api/artifacts/{artifact['id']}/download/").status_code, 409)
+        self.assertEqual(client.get(f"/api/artifacts/{first['id']}/download/").status_code, 404)
+
+    def test_digest_is_deduplicated_within_a_project(self):
+        self._upload(1)
+        _client, artifact = self._register(1)
+        self.assertEqual(artifact['status'], 'uploaded')
+        self.assertIsNone(artifact['upload'])
+
+    def test_another_project_must_upload_its_own_copy(self):
+        self._upload(1)
+        other = self._instance(1, key='Q')
+        client, artifact = self._register(1, other)
+        self.assertEqual(artifact['status'], 'pending')
+        self.assertIsNotNone(artifact['upload'])
+        self.assertEqual(client.post(f"/api/artifacts/{artifact['id']}/complete/").status_code, 409)
+        self.assertEqual(client.get(f"/api/artifacts/{artifact['id']}/download/").status_code, 409)
+        self.assertEqual(client.put(artifact['upload']['url'], DATA, content_type='text/plain').status_code, 200)
+        self.assertEqual(client.post(f"/api/artifacts/{artifact['id']}/complete/").status_code, 200)
+
+    def test_upload_must_match_the_signed_digest(self):
+        client, artifact = self._register(1)
+        resp = client.put(artifact['upload']['url'], b'x' * len(DATA), content_type='text/plain')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_deleting_keeps_bytes_other_tenants_rely_on(self):
+        first = self._upload(1)
+        second = self._upload(2)
+        self.assertEqual(self.client_for(tenant_id=1).delete(f"/api/artifacts/{first['id']}/").status_code, 204)
+        project_id = self.instances[1].run.project_id
+        self.assertIsNone(storage.get_storage().size_of(storage.content_key(1, project_id, SHA)))
+        self.assertEqual(self.client_for(tenant_id=2).get(f"/api/artifacts/{second['id']}/download/").status_code, 200)
+
+    def test_move_to_project_keys(self):
+        store = storage.get_storage()
+        suffix = f'sha256/{SHA[:2]}/{SHA[2:4]}/{SHA}'
+        # Tenant 1 already has a per-tenant copy, tenant 2 only the shared one
+        store.put_bytes(suffix, DATA, 'text/plain')
+        store.put_bytes(f't/1/{suffix}', DATA, 'text/plain')
+        instances = [*self.instances.values(), self._instance(1, key='Q')]
+        for inst in instances:
+            InstanceArtifact.objects.create(instance=inst, project_id=inst.run.project_id, name='run.log',
+                                            size=len(DATA), sha256=SHA, status='uploaded')
+        call_command('move_artifacts_to_project_keys', '--delete-legacy', stdout=io.StringIO())
+        self.assertEqual(
+            [store.size_of(storage.content_key(inst.tenant_id, inst.run.project_id, SHA)) for inst in instances],
+            [len(DATA)] * 3,
+        )
+        self.assertIsNone(store.size_of(suffix))
+        self.assertIsNone(store.size_of(f't/1/{suffix}'))
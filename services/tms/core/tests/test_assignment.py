@@ -0,0 +1,114 @@
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from core.assignment import effort_of, plan_assignment
+from core.models import Project, TestCase as Case, TestInstance, TestRun, TestSection
+from core.tests.helpers import APITestCase
+
+
+def _assigned(plan):
+    return sorted(inst_id for ids in plan.values() for inst_id in ids)
+
+
+class PlanAssignmentTests(SimpleTestCase):
+    def test_equal_work_is_split_evenly(self):
+        items = [(i, None, 60.0) for i in range(9)]
+        plan, loads = plan_assignment(items, [1, 2, 3], {}, affinity=False)
+        self.assertEqual([len(plan[uid]) for uid in (1, 2, 3)], [3, 3, 3])
+        self.assertEqual(loads, {1: 180.0, 2: 180.0, 3: 180.0})
+
+    def test_weighted_work_is_balanced(self):
+        rnd = random.Random(4)
+        items = [(i, None, float(rnd.randint(10, 600))) for i in range(200)]
+        plan, loads = plan_assignment(items, [1, 2, 3, 4], {}, affinity=False)
+        self.assertEqual(_assigned(plan), list(range(200)))
+        # LPT leaves users at most one (the smallest) item apart
+        self.assertLessEqual(max(loads.values()) - min(loads.values()), min(s for _i, _sec, s in items))
+        for uid, ids in plan.items():
+            self.assertAlmostEqual(loads[uid], sum(items[i][2] for i in ids))
+
+    def test_existing_load_counts(self):
+        items = [(i, None, 100.0) for i in range(4)]
+        plan, loads = plan_assignment(items, [1, 2], {1: 400.0}, affinity=False)
+        self.assertEqual(plan, {1: [], 2: [0, 1, 2, 3]})
+        self.assertEqual(loads, {1: 400.0, 2: 400.0})
+
+    def test_only_listed_users_get_work(self):
+        items = [(i, None, 100.0) for i in range(4)]
+        # User 9 holds work in the run but is not in the list: ignored, gets nothing
+        plan, loads = plan_assignment(items, [1, 2], {9: 1000.0, 2: 100.0}, affinity=False)
+        self.assertEqual(set(plan), {1, 2})
+        self.assertEqual(set(loads), {1, 2})
+        self.assertEqual((len(plan[1]), len(plan[2])), (3, 1))
+
+    def test_sections_stay_together_when_balance_allows(self):
+        items = [(1, 10, 60.0), (2, 10, 60.0), (3, 20, 60.0), (4, 20, 60.0)]
+        plan, _loads = plan_assignment(items, [1, 2], {}, affinity=True)
+        self.assertEqual(sorted(plan.values()), [[1, 2], [3, 4]])
+
+    def test_a_section_is_cut_only_to_keep_balance(self):
+        items = [(i, 10, 60.0) for i in range(1, 7)]
+        plan, loads = plan_assignment(items, [1, 2], {}, affinity=True)
+        self.assertEqual(loads, {1: 180.0, 2: 180.0})
+        # Each user gets a consecutive part of the section
+        self.assertEqual(sorted(plan.values()), [[1, 2, 3], [4, 5, 6]])
+
+    def test_no_items(self):
+        plan, loads = plan_assignment([], [1, 2], {1: 5.0}, affinity=True)
+        self.assertEqual(plan, {1: [], 2: []})
+        self.assertEqual(loads, {1: 5.0, 2: 0.0})
+
+    @override_settings(AUTO_ASSIGN_SECONDS_PER_STEP=30)
+    def test_effort_of(self):
+        self.assertEqual(effort_of(42, [{}, {}]), 42.0)
+        self.assertEqual(effort_of(None, [{}, {}, {}]), 90.0)
+        self.assertEqual(effort_of(0, []), 30.0)
+        self.assertEqual(effort_of(None, None), 30.0)
+
+
+@override_settings(AUTO_ASSIGN_SECONDS_PER_STEP=60)
+class AutoAssignTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        section = TestSection.objects.create(project=project, name='Area')
+        self.run = TestRun.objects.create(project=project, name='Run', status='running')
+        self.instances = {}
+        for name, status, assignee in (
+            ('held', 'not_started', 5), ('working', 'in_progress', 6), ('done', 'passed', None),
+            ('a', 'not_started', None), ('b', 'not_started', None), ('c', 'not_started', None),
+        ):
+            case = Case.objects.create(project=project, section=section, title=name, steps=[{'action': 'x'}])
+            self.instances[name] = TestInstance.objects.create(
+                run=self.run, tenant_id=self.tenant_id, testcase=case, status=status, assignee_user_id=assignee,
+                order=len(self.instances),
+            )
+
+    def _assign(self, **body):
+        resp = self.client_for().post(f'/api/runs/{self.run.id}/auto_assign/', body, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data
+
+    def _assignees(self):
+        return dict(TestInstance.objects.filter(run=self.run).values_list('testcase__title', 'assignee_user_id'))
+
+    def test_assigned_instances_are_kept_and_count_as_load(self):
+        data = self._assign(user_ids=[5, 7])
+        self.assertEqual((data['instances'], data['assigned']), (3, 3))
+        assignees = self._assignees()
+        self.assertEqual((assignees['held'], assignees['working'], assignees['done']), (5, 6, None))
+        # User 5 already holds one instance, so user 7 takes two of the three open ones
+        self.assertEqual(sorted(assignees[name] for name in 'abc'), [5, 7, 7])
+        self.assertEqual({u['user_id']: u['predicted_seconds'] for u in data['users']}, {5: 120.0, 7: 120.0})
+
+    def test_dry_run_writes_nothing(self):
+        data = self._assign(user_ids=[1, 2], dry_run=True)
+        self.assertEqual((data['instances'], data['assigned']), (3, 0))
+        self.assertEqual([self._assignees()[name] for name in 'abc'], [None, None, None])
+
+    def test_user_ids_are_validated(self):
+        for body in ({}, {'user_ids': []}, {'user_ids': ['x']}, {'user_ids': list(range(1001))}):
+            with self.subTest(body=str(body)[:40]):
+                resp = self.client_for().post(f'/api/runs/{self.run.id}/auto_assign/', body, format='json')
+                self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.utils import timezone
+
+from core import counters, signatures
+from core.models import (
+    ExecutionRollup, Project, TestCase as Case, TestCaseStats, TestInstance, TestRun, TestSection,
+)
+from core.tests.helpers import APITestCase
+
+
+class BulkInstanceTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.login, self.cart = (
+            TestSection.objects.create(project=self.project, name=name) for name in ('Login', 'Cart')
+        )
+        self.run = TestRun.objects.create(project=self.project, name='Run', status='running')
+        self.rows = [self._instance(self.run, section) for section in (self.login, self.login, self.cart, self.cart)]
+        counters.recount([self.run.id])
+
+    def _instance(self, run, section=None, **fields):
+        case = Case.objects.create(project=run.project, title='Case', section=section)
+        return TestInstance.objects.create(run=run, tenant_id=run.project.tenant_id, testcase=case, **fields)
+
+    def _finished(self, inst, status, **fields):
+        TestInstance.objects.filter(id=inst.id).update(status=status, finished_at=timezone.now(), **fields)
+        counters.recount([inst.run_id])
+
+    def _counts(self, run=None):
+        run = TestRun.objects.get(id=(run or self.run).id)
+        return {status: getattr(run, field) for status, field in counters.STATUS_FIELDS.items() if getattr(run, field)}
+
+    def _executions(self):
+        return sum(ExecutionRollup.objects.filter(granularity='day').values_list('executions', flat=True))
+
+    def _bulk(self, payload, action='bulk_status'):
+        return self.client_for().post(f'/api/instances/{action}/', payload, format='json')
+
+    def test_counters_follow_a_bulk_transition(self):
+        self._finished(self.rows[0], 'failed')
+        resp = self._bulk({'status': 'passed', 'instances': [inst.id for inst in self.rows[:3]]})
+        self.assertEqual(resp.data, {'updated': 3, 'status': 'passed'})
+        self.assertEqual(self._counts(), {'passed': 3, 'not_started': 1})
+        # Re-finishing finished rows with the same status moves nothing
+        self._bulk({'status': 'passed', 'instances': [inst.id for inst in self.rows[:3]]})
+        self.assertEqual(self._counts(), {'passed': 3, 'not_started': 1})
+        self._bulk({'status': 'blocked', 'instances': [self.rows[0].id, self.rows[3].id]})
+        self.assertEqual(self._counts(), {'passed': 2, 'blocked': 2})
+        # The incremental counters agree with a full recount
+        counters.recount([self.run.id])
+        self.assertEqual(self._counts(), {'passed': 2, 'blocked': 2})
+
+    def test_only_newly_finished_rows_feed_stats_and_rollups(self):
+        self._finished(self.rows[0], 'failed')
+        self._bulk({'status': 'passed', 'instances': [inst.id for inst in self.rows[:3]]})
+        self.assertEqual(self._executions(), 2)
+        self.assertEqual(
+            dict(TestCaseStats.objects.values_list('testcase_id', 'recent_outcomes')),
+            {self.rows[1].testcase_id: 'P', self.rows[2].testcase_id: 'P'},
+        )
+        self._bulk({'status': 'failed', 'instances': [inst.id for inst in self.rows[:3]]})
+        self.assertEqual(self._executions(), 2)
+        self.assertEqual(TestCaseStats.objects.get(testcase_id=self.rows[1].testcase_id).recent_outcomes, 'P')
+        # A reset and a new finish count again
+        self._bulk({'status': 'not_started', 'instances': [self.rows[1].id]})
+        self._bulk({'status': 'failed', 'instances': [self.rows[1].id]})
+        self.assertEqual(self._executions(), 3)
+        self.assertEqual(TestCaseStats.objects.get(testcase_id=self.rows[1].testcase_id).recent_outcomes, 'PF')
+
+    def test_signatures_without_actual_result_are_per_row(self):
+        texts = ['AssertionError: expected 1 got 2', 'TimeoutError: page did not load in 30s', '']
+        for inst, text in zip(self.rows, texts):
+            TestInstance.objects.filter(id=inst.id).update(actual_result=text)
+        ids = [inst.id for inst in self.rows[:3]]
+        self._bulk({'status': 'failed', 'instances': ids})
+        rows = dict(TestInstance.objects.filter(id__in=ids).values_list('id', 'failure_signature'))
+        self.assertEqual(rows, {inst.id: signatures.failure_signature(text) for inst, text in zip(self.rows, texts)})
+        self.assertNotEqual(rows[ids[0]], rows[ids[1]])
+        self.assertEqual(rows[ids[2]], '')
+        # A given actual_result replaces every text and its signature
+        self._bulk({'status': 'blocked', 'actual_result': 'Blocked by BUG-1', 'instances': ids})
+        self.assertEqual(
+            set(TestInstance.objects.filter(id__in=ids).values_list('actual_result', 'failure_signature')),
+            {('Blocked by BUG-1', signatures.failure_signature('Blocked by BUG-1'))},
+        )
+        self._bulk({'status': 'passed', 'instances': ids})
+        self.assertEqual(set(TestInstance.objects.filter(id__in=ids).values_list('failure_signature', flat=True)), {''})
+
+    def test_a_project_without_the_role_denies_the_whole_selection(self):
+        other = Project.objects.create(tenant_id=self.tenant_id, key='Q', name='Other')
+        other_inst = self._instance(TestRun.objects.create(project=other, name='Run', status='running'))
+
+        def project_roles(tenant_id, project_id, user_id):
+            if project_id != other.id:
+                return []
+            return [{'tenant': tenant_id, 'project_id': project_id, 'user_id': user_id, 'role_key': 'viewer'}]
+
+        ids = [self.rows[0].id, other_inst.id]
+        with mock.patch('core.permissions._fetch_project_memberships', side_effect=project_roles) as fetch:
+            self.assertEqual(self._bulk({'status': 'passed', 'instances': ids}).status_code, 403)
+            self.assertEqual(self._bulk({'assignee_user_id': 'me', 'instances': ids}, 'bulk_assign').status_code, 403)
+            # One lookup per project and request, not per row
+            looked_up = sorted(call.args[1] for call in fetch.call_args_list)
+            self.assertEqual(looked_up, sorted([self.project.id, other.id] * 2))
+            resp = self._bulk({'status': 'passed', 'instances': [inst.id for inst in self.rows]})
+            self.assertEqual(resp.status_code, 200)
+        self.assertEqual(TestInstance.objects.get(id=other_inst.id).status, 'not_started')
+        self.assertIsNone(TestInstance.objects.get(id=other_inst.id).assignee_user_id)
+
+    def test_filter_selects_by_run_status_and_section(self):
+        self._finished(self.rows[0], 'failed')
+        flt = {'run': self.run.id, 'status': ['not_started'], 'section': self.login.id}
+        resp = self._bulk({'assignee_user_id': 'me', 'filter': flt}, 'bulk_assign')
+        self.assertEqual(resp.data, {'updated': 1, 'assignee_user_id': self.user_id})
+        self.assertEqual(
+            list(TestInstance.objects.filter(assignee_user_id=self.user_id).values_list('id', flat=True)),
+            [self.rows[1].id],
+        )
+        resp = self._bulk({'status': 'skipped', 'filter': {'run': self.run.id, 'section': self.cart.id}})
+        self.assertEqual(resp.data['updated'], 2)
+        self.assertEqual(self._counts(), {'failed': 1, 'not_started': 1, 'skipped': 2})
+        bad_status = {'run': self.run.id, 'status': 'done'}
+        self.assertEqual(self._bulk({'status': 'passed', 'filter': bad_status}).status_code, 400)
+        self.assertEqual(self._bulk({'status': 'passed', 'filter': {'section': self.cart.id}}).status_code, 400)
+
+    def test_other_tenants_rows_are_not_selected(self):
+        foreign = Project.objects.create(tenant_id=2, key='P', name='Foreign')
+        foreign_inst = self._instance(TestRun.objects.create(project=foreign, name='Run', status='running'))
+        resp = self._bulk({'status': 'passed', 'instances': [self.rows[0].id, foreign_inst.id]})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(TestInstance.objects.get(id=foreign_inst.id).status, 'not_started')
@@ -0,0 +1,75 @@
+from core.comparison import compare_runs
+from core.models import Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+class CompareRunsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.base = TestRun.objects.create(project=self.project, name='Base', status='completed')
+        self.run = TestRun.objects.create(project=self.project, name='Run', status='completed')
+        self.cases = {}
+
+    def _results(self, run, **statuses):
+        for title, status in statuses.items():
+            case = self.cases.get(title) or Case.objects.create(project=self.project, title=title)
+            self.cases[title] = case
+            if isinstance(status, tuple):
+                status, duration = status
+            else:
+                duration = None
+            TestInstance.objects.create(run=run, tenant_id=self.tenant_id, testcase=case, status=status,
+                                        duration_seconds=duration)
+
+    def _titles(self, result, category):
+        return [item['title'] for item in result[category]]
+
+    def test_every_category(self):
+        self._results(self.base, broke='passed', fixed='failed', stuck='blocked', dropped='passed', same='passed')
+        self._results(self.run, broke='failed', fixed='passed', stuck='failed', same='passed', new='skipped')
+        result = compare_runs(self.run, self.base, ratio=0.5, min_delta=5)
+        self.assertEqual(self._titles(result, 'newly_failing'), ['broke'])
+        self.assertEqual(self._titles(result, 'newly_passing'), ['fixed'])
+        self.assertEqual(self._titles(result, 'still_failing'), ['stuck'])
+        self.assertEqual(self._titles(result, 'added'), ['new'])
+        self.assertEqual(self._titles(result, 'removed'), ['dropped'])
+        self.assertEqual(result['summary'], {
+            'newly_failing': 1, 'newly_passing': 1, 'still_failing': 1, 'added': 1, 'removed': 1,
+            'unchanged': 1, 'duration_regressions': 0, 'cases': 6,
+        })
+
+    def test_latest_instance_of_a_case_wins(self):
+        self._results(self.base, flaky='failed')
+        # Alphabetical MAX(status) would pick 'passed' over 'failed' both ways
+        self._results(self.run, flaky='passed')
+        self._results(self.run, flaky='failed')
+        result = compare_runs(self.run, self.base, ratio=0.5, min_delta=5)
+        self.assertEqual(self._titles(result, 'still_failing'), ['flaky'])
+        item = result['still_failing'][0]
+        latest = TestInstance.objects.filter(run=self.run).order_by('-id').first()
+        self.assertEqual((item['status'], item['instance']), ('failed', latest.id))
+        self.assertEqual(result['summary']['cases'], 1)
+
+    def test_duration_regressions(self):
+        self._results(self.base, slow=('passed', 10), fine=('passed', 10), tiny=('passed', 1))
+        self._results(self.run, slow=('passed', 16), fine=('passed', 14), tiny=('passed', 4))
+        result = compare_runs(self.run, self.base, ratio=0.5, min_delta=5)
+        self.assertEqual(self._titles(result, 'duration_regressions'), ['slow'])
+        self.assertEqual(result['summary']['unchanged'], 3)
+
+    def test_nothing_changed(self):
+        self._results(self.base, same='passed')
+        self._results(self.run, same='passed')
+        result = compare_runs(self.run, self.base, ratio=0.5, min_delta=5)
+        self.assertEqual(result['summary']['cases'], 1)
+        self.assertEqual(result['summary']['unchanged'], 1)
+
+    def test_base_must_be_an_id(self):
+        resp = self.client_for().get(f'/api/runs/{self.run.id}/compare/?base=latest')
+        self.assertEqual(resp.status_code, 400)
+        self._results(self.base, broke='passed')
+        self._results(self.run, broke='failed')
+        resp = self.client_for().get(f'/api/runs/{self.run.id}/compare/?base={self.base.id}')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['summary']['newly_failing'], 1)
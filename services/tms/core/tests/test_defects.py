@@ -0,0 +1,59 @@
+from core.models import DefectLink, Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+class AffectedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projects = []
+        for i in range(2):
+            project = Project.objects.create(tenant_id=self.tenant_id, key=f'P{i}', name=f'Project {i}')
+            run = TestRun.objects.create(project=project, name='Run', status='running')
+            inst = TestInstance.objects.create(run=run, tenant_id=self.tenant_id, status='failed',
+                                               testcase=Case.objects.create(project=project, title='Case'))
+            DefectLink.objects.create(instance=inst, project=project, key='BUG-1')
+            self.projects.append(project)
+
+    def _affected(self, query):
+        return self.client_for().get(f'/api/defect-links/affected/?key=BUG-1{query}')
+
+    def test_all_projects_of_the_tenant(self):
+        resp = self._affected('')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data['runs']), 2)
+        self.assertEqual([r['failing'] for r in resp.data['runs']], [1, 1])
+
+    def test_project_filter(self):
+        resp = self._affected(f'&project={self.projects[1].id}')
+        self.assertEqual([r['project'] for r in resp.data['runs']], [self.projects[1].id])
+
+    def test_invalid_params_are_rejected(self):
+        for query in ('&project=abc', '&project=1.5', '&limit=many'):
+            with self.subTest(query=query):
+                self.assertEqual(self._affected(query).status_code, 400)
+
+    def test_limit_is_clamped(self):
+        resp = self._affected('&limit=-3')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data['instances']), 1)
+
+
+class LegacyDefectsWriteTests(APITestCase):
+    def test_writing_defects_on_an_instance_is_rejected(self):
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        run = TestRun.objects.create(project=project, name='Run', status='running')
+        inst = TestInstance.objects.create(run=run, tenant_id=self.tenant_id,
+                                           testcase=Case.objects.create(project=project, title='Case'))
+        client = self.client_for()
+        resp = client.patch(f'/api/instances/{inst.id}/', {'defects': [{'key': 'BUG-1'}], 'actual_result': 'x'},
+                            format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('link_defect', str(resp.data['defects']))
+        inst.refresh_from_db()
+        self.assertEqual(inst.actual_result, '')
+        self.assertFalse(DefectLink.objects.exists())
+        # Other writes are unaffected and the links are still listed
+        DefectLink.objects.create(instance=inst, project=project, key='BUG-2')
+        resp = client.patch(f'/api/instances/{inst.id}/', {'actual_result': 'x'}, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual([d['key'] for d in resp.data['defects']], ['BUG-2'])
@@ -0,0 +1,98 @@
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import diffing
+
+
+def _lcs(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = 0
+        for j, y in enumerate(b):
+            prev, row[j + 1] = row[j + 1], prev + 1 if x == y else max(row[j + 1], row[j])
+    return row[-1]
+
+
+class EditScriptTests(SimpleTestCase):
+    def assertValidScript(self, a, b, ops):
+        # Every element of a and b is visited once, in order, and 'equal' pairs really match
+        self.assertEqual([i for op, i, _j in ops if op != 'insert'], list(range(len(a))))
+        self.assertEqual([j for op, _i, j in ops if op != 'delete'], list(range(len(b))))
+        for op, i, j in ops:
+            if op == 'equal':
+                self.assertEqual(a[i], b[j])
+
+    def test_scripts_are_valid_and_minimal(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            a = [rng.choice('abcd') for _ in range(rng.randint(0, 12))]
+            b = [rng.choice('abcd') for _ in range(rng.randint(0, 12))]
+            ops = diffing.edit_script(a, b)
+            self.assertValidScript(a, b, ops)
+            self.assertEqual(sum(op == 'equal' for op, _i, _j in ops), _lcs(a, b), (a, b))
+
+    def test_common_prefix_and_suffix(self):
+        ops = diffing.edit_script(list('abXcd'), list('abYcd'))
+        self.assertEqual(ops, [
+            ('equal', 0, 0), ('equal', 1, 1), ('delete', 2, None), ('insert', None, 2),
+            ('equal', 3, 3), ('equal', 4, 4),
+        ])
+
+    def test_empty_sides(self):
+        self.assertEqual(diffing.edit_script([], []), [])
+        self.assertEqual(diffing.edit_script(['a'], []), [('delete', 0, None)])
+        self.assertEqual(diffing.edit_script([], ['a']), [('insert', None, 0)])
+
+    def test_falls_back_to_delete_insert_beyond_max_edits(self):
+        a, b = list('xaxbxc'), list('yaybyd')
+        with mock.patch.object(diffing, 'MAX_EDITS', 2):
+            ops = diffing.edit_script(a, b)
+        self.assertValidScript(a, b, ops)
+        self.assertEqual([op for op, _i, _j in ops], ['delete'] * 6 + ['insert'] * 6)
+
+
+class DiffStepsTests(SimpleTestCase):
+    def test_changed_step_is_a_modification_with_fields(self):
+        a = [{'order': 1, 'action': 'Open', 'expected': 'Form'}, {'order': 2, 'action': 'Save', 'expected': 'Ok'}]
+        b = [{'order': 1, 'action': 'Open', 'expected': 'Form'}, {'order': 2, 'action': 'Save', 'expected': 'Saved'}]
+        result = diffing.diff_steps(a, b)
+        self.assertEqual((result['changed'], result['modified'], result['unchanged']), (True, 1, 1))
+        self.assertEqual(result['ops'], [
+            {'op': 'modify', 'from_index': 1, 'to_index': 1, 'from': a[1], 'to': b[1], 'fields': ['expected']},
+        ])
+
+    def test_renumbering_is_not_a_change(self):
+        a = [{'order': 1, 'action': 'Open'}, {'order': 2, 'action': 'Save'}]
+        b = [{'order': 1, 'action': 'Login'}, {'order': 2, 'action': 'Open'}, {'order': 3, 'action': 'Save'}]
+        result = diffing.diff_steps(a, b)
+        self.assertEqual((result['inserted'], result['modified'], result['unchanged']), (1, 0, 2))
+        self.assertEqual(result['ops'], [{'op': 'insert', 'to_index': 0, 'step': b[0]}])
+
+    def test_unpaired_changes_and_plain_steps(self):
+        result = diffing.diff_steps(['a', 'b', 'c'], ['x'])
+        self.assertEqual((result['modified'], result['deleted'], result['inserted']), (1, 2, 0))
+        self.assertIsNone(result['ops'][0]['fields'])
+        self.assertEqual([op['op'] for op in result['ops']], ['modify', 'delete', 'delete'])
+
+    def test_identical(self):
+        result = diffing.diff_steps([{'action': 'a'}], [{'action': 'a'}])
+        self.assertEqual(result, {'changed': False, 'inserted': 0, 'deleted': 0, 'modified': 0, 'unchanged': 1,
+                                  'ops': []})
+
+
+class DiffTextTests(SimpleTestCase):
+    def test_equal_lines_are_collapsed(self):
+        result = diffing.diff_text('one\ntwo\nthree\nfour', 'one\ntwo\n3\nfour')
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['ops'], [
+            {'op': 'equal', 'from_index': 0, 'to_index': 0, 'count': 2},
+            {'op': 'delete', 'from_index': 2, 'text': 'three'},
+            {'op': 'insert', 'to_index': 2, 'text': '3'},
+            {'op': 'equal', 'from_index': 3, 'to_index': 3, 'count': 1},
+        ])
+
+    def test_none_is_empty(self):
+        self.assertEqual(diffing.diff_text(None, ''), {'changed': False, 'ops': []})
+        self.assertEqual(diffing.diff_text(None, 'a')['ops'], [{'op': 'insert', 'to_index': 0, 'text': 'a'}])
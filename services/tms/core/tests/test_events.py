@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import events
+
+
+class EventStreamTests(SimpleTestCase):
+    def _stream(self, messages, **kwargs):
+        pubsub = mock.Mock()
+        pubsub.get_message.side_effect = messages
+        redis = mock.Mock()
+        redis.pubsub.return_value = pubsub
+        with mock.patch.object(events, '_redis', return_value=redis):
+            return list(events.event_stream(['tms:run:1'], **kwargs)), pubsub
+
+    def test_relays_messages_and_heartbeats(self):
+        clock = iter(range(0, 100))
+        with mock.patch.object(events.time, 'monotonic', side_effect=lambda: next(clock)):
+            chunks, pubsub = self._stream(
+                [{'data': b'{"type": "instance.updated"}'}, None], heartbeat=1, max_seconds=3,
+            )
+        self.assertEqual(chunks, [
+            'retry: 1000\n\n', 'event: instance.updated\ndata: {"type": "instance.updated"}\n\n', ': keepalive\n\n',
+        ])
+        pubsub.close.assert_called_once_with()
+
+    def test_stream_ends_after_max_seconds(self):
+        clock = iter([0, 0.5, 2])
+        with mock.patch.object(events.time, 'monotonic', side_effect=lambda: next(clock)):
+            chunks, pubsub = self._stream([None], heartbeat=5, max_seconds=1)
+        self.assertEqual(chunks, ['retry: 5000\n\n', ': keepalive\n\n'])
+        # The wait never outlives the deadline
+        pubsub.get_message.assert_called_once_with(timeout=0.5)
+        pubsub.close.assert_called_once_with()
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from core import versions
+from core.models import Project, TestCase as Case, TestInstance, TestRun
+from core.pagination import HistoryCursorPagination
+from core.tests.helpers import APITestCase
+
+
+class CaseHistoryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.case = Case.objects.create(project=project, title='Login')
+        self.version = versions.snapshot_version(self.case)
+        base = timezone.now() - timedelta(days=1)
+        # Three results share one finished_at: the id breaks the tie
+        self.results = [
+            self._result(project, 'Run 1', 'passed', base, 10),
+            self._result(project, 'Run 2', 'failed', base + timedelta(hours=1), 12),
+            self._result(project, 'Run 3', 'blocked', base + timedelta(hours=1), None),
+            self._result(project, 'Run 4', 'passed', base + timedelta(hours=1), 9),
+            self._result(project, 'Run 5', 'skipped', base + timedelta(hours=2), 0),
+        ]
+        # Unfinished instances and other cases are not part of the history
+        self._result(project, 'Run 6', 'in_progress', None, None)
+        other = Case.objects.create(project=project, title='Other')
+        TestInstance.objects.create(run=self.results[0].run, tenant_id=self.tenant_id, testcase=other,
+                                    status='passed', finished_at=base)
+
+    def _result(self, project, name, status, finished_at, seconds):
+        run = TestRun.objects.create(project=project, name=name, status='running')
+        return TestInstance.objects.create(
+            run=run, tenant_id=self.tenant_id, testcase=self.case, testcase_version=self.version, status=status,
+            finished_at=finished_at, duration_seconds=seconds, assignee_user_id=3,
+        )
+
+    def _get(self, url):
+        resp = self.client_for().get(url)
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data
+
+    def test_pages_are_newest_first_across_ties(self):
+        newest_first = sorted(self.results, key=lambda inst: (inst.finished_at, inst.id), reverse=True)
+        seen, url = [], f'/api/testcases/{self.case.id}/history/'
+        with mock.patch.object(HistoryCursorPagination, 'page_size', 2):
+            while url:
+                data = self._get(url)
+                self.assertLessEqual(len(data['results']), 2)
+                seen += [row['instance'] for row in data['results']]
+                url = data['next']
+        self.assertEqual(seen, [inst.id for inst in newest_first])
+
+    def test_row_fields(self):
+        row = self._get(f'/api/testcases/{self.case.id}/history/')['results'][-1]
+        first = self.results[0]
+        self.assertEqual(
+            {key: row[key] for key in ('instance', 'run', 'run_name', 'version', 'status', 'duration_seconds',
+                                       'assignee_user_id', 'failure_signature')},
+            {'instance': first.id, 'run': first.run_id, 'run_name': 'Run 1', 'version': self.version.version,
+             'status': 'passed', 'duration_seconds': 10, 'assignee_user_id': 3, 'failure_signature': ''},
+        )
+        self.assertIsNotNone(row['finished_at'])
+
+    def test_sparkline(self):
+        url = f'/api/testcases/{self.case.id}/history/?view=sparkline'
+        data = self._get(url)
+        # Oldest first; the tie keeps id order
+        self.assertEqual(data, {'testcase': self.case.id, 'count': 5, 'outcomes': 'PFBPS',
+                                'durations': [10, 12, None, 9, 0], 'pass_rate': 0.4})
+        self.assertEqual(self._get(f'{url}&limit=2')['outcomes'], 'PS')
+        self.assertEqual(self._get(f'{url}&limit=-3')['outcomes'], 'S')
+        self.assertEqual(self.client_for().get(f'{url}&limit=x').status_code, 400)
+        empty = Case.objects.create(project=self.case.project, title='Never run')
+        self.assertEqual(self._get(f'/api/testcases/{empty.id}/history/?view=sparkline'),
+                         {'testcase': empty.id, 'count': 0, 'outcomes': '', 'durations': [], 'pass_rate': None})
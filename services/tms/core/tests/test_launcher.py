@@ -0,0 +1,46 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import launcher
+from core.models import PlanItem, Project, TestCase as Case, TestPlan, TestRun
+
+
+@override_settings(SCHEDULED_RUN_RETRY_SECONDS=600)
+class LaunchDueRunsTests(TestCase):
+    def setUp(self):
+        project = Project.objects.create(tenant_id=1, key='P', name='Project')
+        plan = TestPlan.objects.create(project=project, name='Plan')
+        PlanItem.objects.create(plan=plan, testcase=Case.objects.create(project=project, title='Case'), order=1)
+        due = timezone.now() - timedelta(minutes=5)
+        self.runs = [
+            TestRun.objects.create(project=project, plan=plan, name=f'Run {i}', scheduled_at=due + timedelta(seconds=i))
+            for i in range(3)
+        ]
+
+    def test_failing_run_does_not_block_the_others(self):
+        real_start = launcher.start_run
+        broken = self.runs[0].id
+
+        def start(run):
+            real_start(run)
+            if run.id == broken:
+                raise RuntimeError('boom')
+
+        with mock.patch.object(launcher, 'start_run', side_effect=start), self.assertLogs('core.launcher', 'ERROR'):
+            self.assertEqual(launcher.launch_due_runs(limit=10), 2)
+        failed = TestRun.objects.get(id=broken)
+        # Rolled back to the savepoint: still planned, no instances, pushed back
+        self.assertEqual(failed.status, 'planned')
+        self.assertFalse(failed.instances.exists())
+        self.assertGreater(failed.scheduled_at, timezone.now() + timedelta(seconds=590))
+        for run in self.runs[1:]:
+            run.refresh_from_db()
+            self.assertEqual((run.status, run.total_count), ('running', 1))
+
+    def test_limit_bounds_the_attempts(self):
+        self.assertEqual(launcher.launch_due_runs(limit=2), 2)
+        self.assertEqual(TestRun.objects.filter(status='planned').count(), 1)
+        self.assertEqual(launcher.launch_due_runs(limit=2), 1)
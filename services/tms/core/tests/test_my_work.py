@@ -0,0 +1,78 @@
+from core.models import Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+class MyWorkTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.smoke = self._run('Smoke', 'running', ['passed', 'not_started', 'in_progress', 'blocked', 'failed'])
+        self.paused = self._run('Regression', 'paused', ['not_started', 'passed'])
+        self.done = self._run('Old', 'completed', ['not_started'])
+        self.canceled = self._run('Dropped', 'canceled', ['blocked'])
+        # Someone else's work in an active run
+        self._add(self.smoke, 'not_started', assignee=2)
+
+    def _run(self, name, status, statuses, project=None, assignee=None):
+        run = TestRun.objects.create(project=project or self.project, name=name, status=status)
+        for order, inst_status in enumerate(statuses, start=1):
+            self._add(run, inst_status, assignee=assignee or self.user_id, order=order)
+        return run
+
+    def _add(self, run, status, assignee, order=0):
+        case = Case.objects.create(project=run.project, title=f'{run.name} {status} {order}')
+        return TestInstance.objects.create(run=run, tenant_id=run.project.tenant_id, testcase=case, status=status,
+                                           assignee_user_id=assignee, order=order)
+
+    def _get(self, query='', **client):
+        return self.client_for(**client).get(f'/api/instances/my_work/{query}')
+
+    def test_groups_active_runs_with_counts(self):
+        resp = self._get()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data['user_id'], resp.data['open']), (self.user_id, 4))
+        self.assertEqual(resp.data['statuses'], ['not_started', 'in_progress', 'blocked'])
+        # Newest run first
+        paused, smoke = resp.data['runs']
+        self.assertEqual((paused['run'], smoke['run']), (self.paused.id, self.smoke.id))
+        self.assertEqual(
+            {key: smoke[key] for key in ('name', 'status', 'project', 'total', 'open')},
+            {'name': 'Smoke', 'status': 'running', 'project': self.project.id, 'total': 5, 'open': 3},
+        )
+        # Counts include finished instances; the list only the open ones, in run order
+        self.assertEqual(smoke['counts'], {'passed': 1, 'not_started': 1, 'in_progress': 1, 'blocked': 1, 'failed': 1})
+        self.assertEqual([inst['status'] for inst in smoke['instances']], ['not_started', 'in_progress', 'blocked'])
+        self.assertEqual(smoke['instances'][0]['title'], 'Smoke not_started 2')
+        self.assertEqual((paused['counts'], paused['open']), ({'not_started': 1, 'passed': 1}, 1))
+
+    def test_other_users_and_tenants(self):
+        foreign = Project.objects.create(tenant_id=2, key='P', name='Foreign')
+        self._run('Foreign', 'running', ['not_started'], project=foreign)
+        resp = self._get('?user_id=2')
+        self.assertEqual(resp.data['user_id'], 2)
+        self.assertEqual([(run['run'], run['open']) for run in resp.data['runs']], [(self.smoke.id, 1)])
+        # Without user_id the caller's own work is listed
+        self.assertEqual(self._get(user_id=2).data, resp.data)
+        # The same user in tenant 2 only sees tenant 2's runs
+        resp = self._get(tenant_id=2)
+        self.assertEqual([run['name'] for run in resp.data['runs']], ['Foreign'])
+
+    def test_status_filter(self):
+        resp = self._get('?status=failed,passed')
+        self.assertEqual(resp.data['statuses'], ['failed', 'passed'])
+        self.assertEqual([(run['run'], run['open']) for run in resp.data['runs']],
+                         [(self.paused.id, 1), (self.smoke.id, 2)])
+        # A run whose instances are all outside the filter is left out
+        self.assertEqual([run['run'] for run in self._get('?status=in_progress').data['runs']], [self.smoke.id])
+        self.assertEqual(self._get('?status=passed,done').status_code, 400)
+        self.assertEqual(self._get('?user_id=me').status_code, 400)
+
+    def test_limit_applies_per_run(self):
+        for order in range(10, 13):
+            self._add(self.paused, 'not_started', assignee=self.user_id, order=order)
+        resp = self._get('?limit=2')
+        paused, smoke = resp.data['runs']
+        self.assertEqual([len(smoke['instances']), len(paused['instances'])], [2, 2])
+        self.assertEqual((smoke['open'], paused['open']), (3, 4))
+        self.assertEqual([inst['status'] for inst in smoke['instances']], ['not_started', 'in_progress'])
+        self.assertEqual([len(run['instances']) for run in self._get('?limit=0').data['runs']], [1, 1])
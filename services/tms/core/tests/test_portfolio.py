@@ -0,0 +1,100 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from core import portfolio, rollups
+from core.models import Project, TestCase as Case, TestRun
+from core.tests.helpers import APITestCase
+
+
+class PortfolioTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.web = Project.objects.create(tenant_id=self.tenant_id, key='WEB', name='Web')
+        self.api = Project.objects.create(tenant_id=self.tenant_id, key='API', name='Api')
+        Project.objects.create(tenant_id=2, key='WEB', name='Foreign')
+        for priority, automated, status in (('high', True, 'active'), ('high', False, 'active'),
+                                            ('low', True, 'active'), ('critical', True, 'archived')):
+            Case.objects.create(project=self.web, title='Case', priority=priority, is_automated=automated,
+                                status=status)
+
+    def _get(self, query=''):
+        resp = self.client_for().get(f'/api/projects/portfolio/{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data
+
+    def _project(self, data, project):
+        return next(item for item in data['projects'] if item['id'] == project.id)
+
+    def test_case_breakdown(self):
+        data = self._get()
+        self.assertEqual([item['key'] for item in data['projects']], ['WEB', 'API'])
+        cases = self._project(data, self.web)['cases']
+        self.assertEqual(cases['total'], 4)
+        self.assertEqual(cases['by_status'], {'active': 3, 'archived': 1})
+        # Archived cases are left out of priorities and coverage
+        self.assertEqual(cases['by_priority'], {'high': 2, 'low': 1})
+        self.assertEqual((cases['automated'], cases['automation_coverage']), (2, round(2 / 3, 4)))
+        empty = self._project(data, self.api)['cases']
+        self.assertEqual((empty['total'], empty['automation_coverage']), (0, None))
+        self.assertEqual((data['summary']['projects'], data['summary']['cases']), (2, 4))
+
+    def test_active_runs_come_from_the_counters(self):
+        # Counters only, no instances: the report must not count rows
+        TestRun.objects.create(project=self.web, name='A', status='running', total_count=10, passed_count=4,
+                               failed_count=1, in_progress_count=1, not_started_count=4)
+        TestRun.objects.create(project=self.web, name='B', status='planned', total_count=2, not_started_count=2)
+        TestRun.objects.create(project=self.web, name='C', status='completed', total_count=50, passed_count=50)
+        active = self._project(self._get(), self.web)['active_runs']
+        self.assertEqual((active['planned'], active['running'], active['paused']), (1, 1, 0))
+        self.assertEqual((active['total'], active['remaining'], active['passed'], active['failed']), (12, 7, 4, 1))
+        self.assertEqual(self._get()['summary']['active_runs'], 2)
+
+    def test_recent_pass_rate_from_daily_rollups(self):
+        now = timezone.now()
+
+        def bucket(granularity, ago, **values):
+            start = rollups.bucket_start(now - timedelta(days=ago), granularity)
+            return {(self.web.id, granularity, start, 0, '', 0): Counter(values)}
+
+        rollups.apply(bucket('day', 0, executions=4, passed=3, failed=1))
+        rollups.apply(bucket('day', 20, executions=6, blocked=6))
+        # Hourly rows repeat the same executions and are not read
+        rollups.apply(bucket('hour', 0, executions=4, passed=3, failed=1))
+        recent = self._project(self._get(), self.web)['recent']
+        self.assertEqual(recent, {'days': 14, 'executions': 4, 'passed': 3, 'failed': 1, 'blocked': 0,
+                                  'pass_rate': 0.75})
+        data = self._get('?days=30')
+        self.assertEqual(self._project(data, self.web)['recent']['executions'], 10)
+        self.assertEqual((data['summary']['executions'], data['summary']['pass_rate']), (10, 0.3))
+        self.assertIsNone(self._project(data, self.api)['recent']['pass_rate'])
+        for days in ('0', '91', 'x'):
+            self.assertEqual(self.client_for().get(f'/api/projects/portfolio/?days={days}').status_code, 400)
+
+    def test_case_changes_invalidate_only_their_project(self):
+        client = self.client_for()
+        case = Case.objects.filter(project=self.web).first()
+        changes = [
+            lambda: client.post('/api/testcases/', {'project': self.web.id, 'title': 'New'}, format='json'),
+            lambda: client.patch(f'/api/testcases/{case.id}/', {'priority': 'low'}, format='json'),
+            lambda: client.post(f'/api/testcases/{case.id}/archive/'),
+            lambda: client.post('/api/testcases/bulk_update/', {'testcases': [case.id], 'status': 'active'},
+                                format='json'),
+            lambda: client.delete(f'/api/testcases/{case.id}/'),
+        ]
+        for change in changes:
+            self._get()
+            self.assertIsNotNone(cache.get(portfolio._cases_key(self.web.id)))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertLess(change().status_code, 300)
+            self.assertIsNone(cache.get(portfolio._cases_key(self.web.id)))
+            self.assertIsNotNone(cache.get(portfolio._cases_key(self.api.id)))
+        # The next report reflects the changes: one case created, one deleted
+        self.assertEqual(self._project(self._get(), self.web)['cases']['total'], 4)
+
+    def test_cached_breakdown_is_reused(self):
+        self._get()
+        Case.objects.create(project=self.web, title='Written behind the API')
+        self.assertEqual(self._project(self._get(), self.web)['cases']['total'], 4)
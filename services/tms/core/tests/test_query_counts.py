@@ -0,0 +1,347 @@
+"""Query-count and latency regression harness for every router endpoint.
+
+Each endpoint is exercised against the same fixture built with 10, 100 and 1000
+children (cases, sections, plan items, instances, ...). The query count must not
+grow with N: a growing count means an N+1 crept in. Wall time is recorded and
+printed as a report; set QUERY_BUDGET_REPORT=<path> to also dump it as JSON.
+
+Run against Postgres (the production backend), e.g.
+    docker compose -f docker-compose.dev.yml exec -T tms python manage.py test core
+"""
+import json
+import os
+import re
+import sys
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import counters
+from core.models import (
+    Project, TestSection, TestTag, Requirement, TestCase as Case, Suite, SuiteCase, Release,
+    TestPlan, PlanItem, TestRun, TestInstance, TestImportJob, TestExportJob, InstanceArtifact,
+    DefectLink,
+)
+from core.tests.helpers import APITestCase
+from core.versions import snapshot_versions
+from tms_service.urls import router
+
+
+SIZES = (10, 100, 1000)
+USER_ID = 1
+
+
+_INSERT_RE = re.compile(r'^INSERT(?: OR IGNORE)? INTO ("[^"]+") \(([^)]*)\) VALUES')
+_UPDATE_RE = re.compile(r'^UPDATE ("[^"]+") SET ')
+_CASE_RE = re.compile(r'("[^"]+") = (?:CAST\()?CASE')
+
+
+def _write_chunk(sql):
+    """(shape, rows, params per row) of a bulk_create/bulk_update statement, else None.
+
+    Rows sent in one statement share its shape: the table and the written columns.
+    """
+    match = _INSERT_RE.match(sql)
+    if match:
+        columns = match.group(2).split(', ')
+        return ('insert', match.group(1), *columns), sql.count('), (') + 1, len(columns)
+    match = _UPDATE_RE.match(sql)
+    columns = _CASE_RE.findall(sql) if match else None
+    if columns:
+        # bulk_update binds the pk twice per row: in the WHEN and in the IN filter
+        return ('update', match.group(1), *columns), sql.count(' WHEN ') // len(columns), len(columns) + 2
+    return None
+
+
+def _full_chunk(width):
+    # Rows the backend puts in one statement before splitting; 0 when it never splits
+    return connection.ops.bulk_batch_size([None] * width, ())
+
+
+def count_statements(captured):
+    """Number of queries, with the chunks of one bulk write counted once.
+
+    Backends split bulk writes differently (sqlite caps bound parameters per
+    statement), so a chunk that directly follows a full chunk of the same shape is
+    folded into it. Anything else, including a loop of writes right after a bulk
+    write on the same table, counts statement by statement.
+    """
+    total, previous = 0, None
+    for query in captured.captured_queries:
+        chunk = _write_chunk(query['sql'])
+        if chunk and previous and chunk[0] == previous[0] and previous[1] == _full_chunk(previous[2]):
+            previous = chunk
+            continue
+        previous = chunk
+        total += 1
+    return total
+
+
+def build_fixture(n):
+    """One tenant per size so list endpoints only see this fixture's rows."""
+    tenant_id = 1000 + n
+    projects = Project.objects.bulk_create([
+        Project(tenant_id=tenant_id, key=f'P{i}', name=f'Project {i}') for i in range(n)
+    ])
+    project = projects[0]
+    root = TestSection.objects.create(project=project, name='root')
+    TestSection.objects.bulk_create([
+        TestSection(project=project, parent=root, name=f'child {i}', order=i) for i in range(n)
+    ])
+    tags = TestTag.objects.bulk_create([TestTag(project=project, name=f'tag{i}') for i in range(n)])
+    reqs = Requirement.objects.bulk_create([Requirement(project=project, title=f'Req {i}') for i in range(n)])
+    cases = Case.objects.bulk_create([
+        Case(project=project, section=root, title=f'Case {i}', steps=[{'order': 1, 'action': 'a', 'expected': 'b'}],
+             is_automated=True, automation_ref=f'suite.test_{i}')
+        for i in range(n)
+    ])
+    Case.labels.through.objects.bulk_create([
+        Case.labels.through(testcase_id=tc.id, testtag_id=tag.id) for tc, tag in zip(cases, tags)
+    ])
+    Case.requirements.through.objects.bulk_create([
+        Case.requirements.through(testcase_id=tc.id, requirement_id=req.id) for tc, req in zip(cases, reqs)
+    ])
+    snapshots = snapshot_versions(cases)
+    versions = [snapshots[(tc.id, tc.version)] for tc in cases]
+    suite = Suite.objects.create(project=project, name='Suite')
+    SuiteCase.objects.bulk_create([SuiteCase(suite=suite, test_case=tc, order=i) for i, tc in enumerate(cases, start=1)])
+    release = Release.objects.create(project=project, name='R1')
+    plan = TestPlan.objects.create(project=project, name='Pinned plan', release=release)
+    PlanItem.objects.bulk_create([
+        PlanItem(plan=plan, testcase=tc, testcase_version=v, order=i)
+        for i, (tc, v) in enumerate(zip(cases, versions), start=1)
+    ])
+    # Items without a pinned version exercise the snapshot path of run start
+    unpinned_plan = TestPlan.objects.create(project=project, name='Unpinned plan')
+    PlanItem.objects.bulk_create([PlanItem(plan=unpinned_plan, testcase=tc, order=i) for i, tc in enumerate(cases, start=1)])
+    planned_run = TestRun.objects.create(project=project, plan=unpinned_plan, name='Planned')
+    running_run = TestRun.objects.create(project=project, plan=plan, name='Running', status='running')
+    TestInstance.objects.bulk_create([
+        TestInstance(run=running_run, tenant_id=tenant_id, testcase=tc, testcase_version=v, order=i, automation_ref=tc.automation_ref)
+        for i, (tc, v) in enumerate(zip(cases, versions), start=1)
+    ])
+    # Failures spread over a couple of signatures so grouping returns several groups with examples
+    failed_run = TestRun.objects.create(project=project, plan=plan, name='Failed', status='completed')
+    TestInstance.objects.bulk_create([
+        TestInstance(run=failed_run, tenant_id=tenant_id, testcase=tc, order=i, status='failed',
+                     actual_result=f'Error: timeout after {i}ms', failure_signature=f'sig{i % 3}')
+        for i, tc in enumerate(cases, start=1)
+    ])
+    # Same log attached to every failure: one stored object, n artifact rows
+    InstanceArtifact.objects.bulk_create([
+        InstanceArtifact(instance=inst, project=project, kind='log', name='run.log', size=42,
+                         sha256='ab' * 32, status='uploaded')
+        for inst in TestInstance.objects.filter(run=failed_run)
+    ])
+    # Every failure is blamed on the same defect, plus a defect of its own
+    failed_instances = list(TestInstance.objects.filter(run=failed_run))
+    DefectLink.objects.bulk_create(
+        [DefectLink(instance=inst, project=project, key='BUG-1', tracker='jira') for inst in failed_instances]
+        + [DefectLink(instance=inst, project=project, key=f'BUG-{inst.id + 1}') for inst in failed_instances]
+    )
+    counters.recount([running_run.id, failed_run.id])
+    TestImportJob.objects.bulk_create([TestImportJob(project=project, file_path=f'in{i}.csv') for i in range(n)])
+    TestExportJob.objects.bulk_create([TestExportJob(project=project, status='completed') for i in range(n)])
+    return {
+        'n': n,
+        'tenant': tenant_id,
+        'project': project.id,
+        'section': root.id,
+        'tag': tags[0].id,
+        'requirement': reqs[0].id,
+        'case': cases[0].id,
+        'version': versions[0].id,
+        'suite': suite.id,
+        'suite_case': SuiteCase.objects.filter(suite=suite).order_by('order').values_list('id', flat=True).first(),
+        'release': release.id,
+        'plan': plan.id,
+        'plan_item': PlanItem.objects.filter(plan=plan).order_by('order').values_list('id', flat=True).first(),
+        'planned_run': planned_run.id,
+        'running_run': running_run.id,
+        'failed_run': failed_run.id,
+        'failed_instance': TestInstance.objects.filter(run=failed_run).order_by('id').values_list('id', flat=True).first(),
+        'defect_link': DefectLink.objects.filter(project=project).values_list('id', flat=True).first(),
+        'failed_instances': [inst.id for inst in failed_instances],
+        'artifact': InstanceArtifact.objects.filter(project=project).values_list('id', flat=True).first(),
+        'instance': TestInstance.objects.filter(run=running_run).order_by('id').values_list('id', flat=True).first(),
+        'import_job': TestImportJob.objects.filter(project=project).values_list('id', flat=True).first(),
+        'export_job': TestExportJob.objects.filter(project=project).values_list('id', flat=True).first(),
+        'refs': [tc.automation_ref for tc in cases],
+    }
+
+
+# (basename, label, method, path, payload) -- path/payload are callables of the fixture context
+SCENARIOS = [
+    ('project', 'list', 'get', lambda c: '/api/projects/', None),
+    ('project', 'retrieve', 'get', lambda c: f"/api/projects/{c['project']}/", None),
+    ('project', 'flaky', 'get', lambda c: f"/api/projects/{c['project']}/flaky/?min_score=0", None),
+    ('project', 'traceability', 'get', lambda c: f"/api/projects/{c['project']}/traceability/", None),
+    ('project', 'traceability by release', 'get',
+     lambda c: f"/api/projects/{c['project']}/traceability/?release={c['release']}", None),
+    ('project', 'portfolio', 'get', lambda c: '/api/projects/portfolio/', None),
+    ('project', 'trends', 'get', lambda c: f"/api/projects/{c['project']}/trends/?granularity=hour&group_by=section", None),
+    ('testcase', 'list', 'get', lambda c: f"/api/testcases/?project={c['project']}", None),
+    ('testcase', 'list by flakiness', 'get',
+     lambda c: f"/api/testcases/?project={c['project']}&ordering=-flaky_score&flaky_min=0", None),
+    ('testcase', 'retrieve', 'get', lambda c: f"/api/testcases/{c['case']}/", None),
+    ('testcase', 'diff', 'get', lambda c: f"/api/testcases/{c['case']}/diff/?from=1", None),
+    ('testcase', 'history', 'get', lambda c: f"/api/testcases/{c['case']}/history/", None),
+    ('testcase', 'history sparkline', 'get', lambda c: f"/api/testcases/{c['case']}/history/?view=sparkline", None),
+    ('testcase', 'partial_update', 'patch', lambda c: f"/api/testcases/{c['case']}/", lambda c: {'title': 'Renamed'}),
+    ('testcase', 'archive', 'post', lambda c: f"/api/testcases/{c['case']}/archive/", None),
+    ('testcase', 'bulk_update', 'post', lambda c: '/api/testcases/bulk_update/',
+     lambda c: {'filter': {'project': c['project']}, 'priority': 'high', 'labels': {'add': [c['tag']]},
+                'tags': {'add': ['regression']}}),
+    ('section', 'list', 'get', lambda c: f"/api/sections/?project={c['project']}", None),
+    ('section', 'retrieve', 'get', lambda c: f"/api/sections/{c['section']}/", None),
+    ('testtag', 'list', 'get', lambda c: f"/api/tags/?project={c['project']}", None),
+    ('testtag', 'retrieve', 'get', lambda c: f"/api/tags/{c['tag']}/", None),
+    ('suite', 'list', 'get', lambda c: f"/api/suites/?project={c['project']}", None),
+    ('suite', 'retrieve', 'get', lambda c: f"/api/suites/{c['suite']}/", None),
+    ('suitecase', 'list', 'get', lambda c: f"/api/suite-cases/?suite={c['suite']}", None),
+    ('suitecase', 'move', 'post', lambda c: f"/api/suite-cases/{c['suite_case']}/move/", lambda c: {'order': c['n']}),
+    ('release', 'list', 'get', lambda c: f"/api/releases/?project={c['project']}", None),
+    ('release', 'retrieve', 'get', lambda c: f"/api/releases/{c['release']}/", None),
+    ('release', 'readiness', 'get', lambda c: f"/api/releases/{c['release']}/readiness/", None),
+    ('requirement', 'list', 'get', lambda c: f"/api/requirements/?project={c['project']}", None),
+    ('requirement', 'retrieve', 'get', lambda c: f"/api/requirements/{c['requirement']}/", None),
+    ('testcaseversion', 'list', 'get', lambda c: '/api/testcase-versions/', None),
+    ('testcaseversion', 'retrieve', 'get', lambda c: f"/api/testcase-versions/{c['version']}/", None),
+    ('testplan', 'list', 'get', lambda c: f"/api/plans/?project={c['project']}", None),
+    ('testplan', 'clone', 'post', lambda c: f"/api/plans/{c['plan']}/clone/", None),
+    ('planitem', 'list', 'get', lambda c: f"/api/plan-items/?plan={c['plan']}", None),
+    ('planitem', 'move', 'post', lambda c: f"/api/plan-items/{c['plan_item']}/move/", lambda c: {'order': c['n']}),
+    ('testrun', 'list', 'get', lambda c: f"/api/runs/?project={c['project']}", None),
+    ('testrun', 'retrieve', 'get', lambda c: f"/api/runs/{c['running_run']}/", None),
+    ('testrun', 'schedule', 'post', lambda c: f"/api/runs/{c['planned_run']}/schedule/",
+     lambda c: {'scheduled_at': '2030-01-01T06:00:00Z'}),
+    ('testrun', 'start', 'post', lambda c: f"/api/runs/{c['planned_run']}/start/", None),
+    ('testrun', 'failures', 'get', lambda c: f"/api/runs/{c['failed_run']}/failures/", None),
+    ('testrun', 'compare', 'get', lambda c: f"/api/runs/{c['running_run']}/compare/?base={c['planned_run']}", None),
+    ('testrun', 'eta', 'get', lambda c: f"/api/runs/{c['running_run']}/eta/", None),
+    ('testrun', 'shards', 'get', lambda c: f"/api/runs/{c['running_run']}/shards/?workers=4", None),
+    ('testrun', 'auto_assign', 'post', lambda c: f"/api/runs/{c['running_run']}/auto_assign/",
+     lambda c: {'user_ids': [USER_ID, USER_ID + 1, USER_ID + 2]}),
+    ('testrun', 'next', 'post', lambda c: f"/api/runs/{c['running_run']}/next/", None),
+    ('testrun', 'results', 'post', lambda c: f"/api/runs/{c['running_run']}/results/",
+     lambda c: {'results': [{'automation_ref': ref, 'status': 'passed', 'actual_result': 'ok', 'duration_seconds': 5,
+                                  'defects': ['BUG-9']} for ref in c['refs']]}),
+    ('testrun', 'rerun', 'post', lambda c: f"/api/runs/{c['running_run']}/rerun/", lambda c: {'statuses': ['passed']}),
+    ('testinstance', 'list', 'get', lambda c: f"/api/instances/?run={c['running_run']}", None),
+    ('testinstance', 'retrieve', 'get', lambda c: f"/api/instances/{c['instance']}/", None),
+    ('testinstance', 'assign', 'post', lambda c: f"/api/instances/{c['instance']}/assign/", lambda c: {'assignee_user_id': USER_ID}),
+    ('testinstance', 'pass_case', 'post', lambda c: f"/api/instances/{c['instance']}/pass_case/", None),
+    ('testinstance', 'artifacts', 'get', lambda c: f"/api/instances/{c['failed_instance']}/artifacts/", None),
+    ('testinstance', 'register artifact', 'post', lambda c: f"/api/instances/{c['failed_instance']}/artifacts/",
+     lambda c: {'name': 'again.log', 'size': 42, 'sha256': 'ab' * 32}),
+    ('testinstance', 'link_defect', 'post', lambda c: f"/api/instances/{c['instance']}/link_defect/",
+     lambda c: {'url': 'https://acme.atlassian.net/browse/BUG-7'}),
+    ('testinstance', 'list of failures', 'get', lambda c: f"/api/instances/?run={c['failed_run']}", None),
+    ('testinstance', 'my_work', 'get', lambda c: '/api/instances/my_work/', None),
+    ('testinstance', 'bulk_assign', 'post', lambda c: '/api/instances/bulk_assign/', lambda c: {
+        'assignee_user_id': 'me', 'filter': {'run': c['running_run'], 'section': c['section']},
+    }),
+    ('testinstance', 'bulk_status', 'post', lambda c: '/api/instances/bulk_status/', lambda c: {
+        'status': 'blocked', 'actual_result': 'Blocked by BUG-1', 'filter': {'run': c['failed_run'], 'status': 'failed'},
+    }),
+    ('defectlink', 'list', 'get', lambda c: f"/api/defect-links/?key=BUG-1", None),
+    ('defectlink', 'retrieve', 'get', lambda c: f"/api/defect-links/{c['defect_link']}/", None),
+    ('defectlink', 'create', 'post', lambda c: '/api/defect-links/', lambda c: {'instance': c['instance'], 'key': 'BUG-2'}),
+    ('defectlink', 'affected', 'get', lambda c: '/api/defect-links/affected/?key=BUG-1', None),
+    ('defectlink', 'bulk', 'post', lambda c: '/api/defect-links/bulk/',
+     lambda c: {'key': 'BUG-3', 'instances': c['failed_instances']}),
+    ('defectlink', 'bulk by filter', 'post', lambda c: '/api/defect-links/bulk/',
+     lambda c: {'key': 'BUG-4', 'filter': {'run': c['failed_run']}}),
+    ('artifact', 'list', 'get', lambda c: f"/api/artifacts/?instance__run={c['failed_run']}", None),
+    ('artifact', 'retrieve', 'get', lambda c: f"/api/artifacts/{c['artifact']}/", None),
+    ('artifact', 'download', 'get', lambda c: f"/api/artifacts/{c['artifact']}/download/", None),
+    ('importjob', 'list', 'get', lambda c: f"/api/import-jobs/?project={c['project']}", None),
+    ('importjob', 'retrieve', 'get', lambda c: f"/api/import-jobs/{c['import_job']}/", None),
+    ('exportjob', 'list', 'get', lambda c: f"/api/export-jobs/?project={c['project']}", None),
+    ('exportjob', 'retrieve', 'get', lambda c: f"/api/export-jobs/{c['export_job']}/", None),
+]
+
+
+class CountStatementsTests(SimpleTestCase):
+    def _count(self, *sqls):
+        return count_statements(mock.Mock(captured_queries=[{'sql': sql} for sql in sqls]))
+
+    def _insert(self, rows):
+        return 'INSERT INTO "t" ("a", "b") VALUES ' + ', '.join(['(1, 2)'] * rows)
+
+    def test_chunks_of_one_bulk_write_count_once(self):
+        full = _full_chunk(2)
+        if not full:
+            self.skipTest('backend does not split bulk writes')
+        self.assertEqual(self._count(self._insert(full), self._insert(full), self._insert(3)), 1)
+
+    def test_writes_after_a_partial_chunk_count_individually(self):
+        self.assertEqual(self._count(self._insert(3), self._insert(1), self._insert(1)), 3)
+
+    def test_other_shapes_are_not_folded(self):
+        full = _full_chunk(2) or 2
+        other = 'INSERT INTO "t" ("a", "c") VALUES (1, 2)'
+        self.assertEqual(self._count(self._insert(full), other), 2)
+
+
+class QueryBudgetTests(APITestCase):
+    report = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.report:
+            return
+        sys.stderr.write('\n{:<16}{:<16}{:>22}{:>30}\n'.format('endpoint', 'action', 'queries @ ' + '/'.join(map(str, SIZES)), 'ms'))
+        for row in cls.report:
+            sys.stderr.write('{:<16}{:<16}{:>22}{:>30}\n'.format(
+                row['basename'], row['action'], '/'.join(map(str, row['queries'])), '/'.join(f'{ms:.1f}' for ms in row['ms']),
+            ))
+        path = os.getenv('QUERY_BUDGET_REPORT')
+        if path:
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump(cls.report, fh, indent=2)
+
+    def setUp(self):
+        # Orgs lookups are stubbed by APITestCase: the user owns every tenant
+        super().setUp()
+        self.fixtures = [build_fixture(n) for n in SIZES]
+
+    def _measure(self, ctx, method, path, payload):
+        cache.clear()  # keep throttling out of the picture
+        client = self.client_for(USER_ID, ctx['tenant'])
+        kwargs = {}
+        if payload is not None:
+            kwargs['data'] = payload
+            kwargs['format'] = 'json'
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            resp = getattr(client, method)(path, **kwargs)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.assertLess(resp.status_code, 400, f'{method.upper()} {path} -> {resp.status_code}: {getattr(resp, "data", "")}')
+        return count_statements(captured), elapsed, captured
+
+    def test_every_router_endpoint_has_a_scenario(self):
+        covered = {basename for basename, *_rest in SCENARIOS}
+        registered = {basename for _prefix, _viewset, basename in router.registry}
+        self.assertEqual(registered - covered, set(), 'Add query-budget scenarios for new viewsets')
+
+    def test_query_count_does_not_grow_with_fixture_size(self):
+        for basename, action, method, path, payload in SCENARIOS:
+            with self.subTest(endpoint=basename, action=action):
+                counts, timings, samples = [], [], []
+                for ctx in self.fixtures:
+                    n_queries, ms, captured = self._measure(ctx, method, path(ctx), payload(ctx) if payload else None)
+                    counts.append(n_queries)
+                    timings.append(ms)
+                    samples.append(captured)
+                self.report.append({'basename': basename, 'action': action, 'queries': counts, 'ms': timings})
+                self.assertEqual(
+                    len(set(counts)), 1,
+                    f'{basename}.{action}: query count grows with N {dict(zip(SIZES, counts))}; '
+                    f'largest run executed:\n' + '\n'.join(q['sql'][:200] for q in samples[-1].captured_queries),
+                )
@@ -0,0 +1,88 @@
+from django.test import TestCase
+
+from core.models import DefectLink, Project, Release, TestCase as Case, TestInstance, TestPlan, TestRun
+from core.readiness import build_readiness
+
+
+class ReadinessTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(tenant_id=1, key='P', name='Project')
+        self.release = Release.objects.create(project=self.project, name='R1')
+        self.plan = TestPlan.objects.create(project=self.project, name='Plan', release=self.release)
+
+    def _run(self, parent=None, status='completed', **counts):
+        counts = {f'{key}_count': n for key, n in counts.items()}
+        return TestRun.objects.create(project=self.project, plan=self.plan, parent_run=parent, name='Run',
+                                      status=status, total_count=sum(counts.values()), **counts)
+
+    def _plan(self):
+        rollup, _entries = build_readiness(self.release)
+        self.assertEqual(len(rollup['plans']), 1)
+        return rollup, rollup['plans'][0]
+
+    def test_planned_or_empty_root_does_not_replace_the_executed_one(self):
+        executed = self._run(passed=8, failed=2)
+        self._run(status='planned', not_started=10)
+        self._run(status='running')
+        _rollup, plan = self._plan()
+        self.assertEqual(plan['run'], executed.id)
+        self.assertEqual((plan['total'], plan['passed'], plan['failed'], plan['not_started']), (10, 8, 2, 0))
+
+    def test_only_planned_roots(self):
+        planned = self._run(status='planned', not_started=4)
+        rollup, plan = self._plan()
+        self.assertEqual((plan['run'], plan['not_started']), (planned.id, 4))
+        self.assertFalse(rollup['ready'])
+
+    def test_newer_executed_root_wins(self):
+        self._run(passed=5, failed=5)
+        latest = self._run(passed=9, in_progress=1, status='running')
+        _rollup, plan = self._plan()
+        self.assertEqual((plan['run'], plan['passed'], plan['in_progress']), (latest.id, 9, 1))
+
+    def test_rerun_of_the_failures_overlays_its_parent(self):
+        root = self._run(passed=6, failed=2, blocked=1, skipped=1)
+        rerun = self._run(parent=root, passed=3, failed=1)
+        rollup, plan = self._plan()
+        self.assertEqual(plan['run'], rerun.id)
+        self.assertEqual((plan['total'], plan['passed'], plan['failed'], plan['blocked'], plan['skipped']),
+                         (10, 9, 1, 0, 0))
+        self.assertEqual(rollup['summary']['pass_rate'], 0.9)
+        self.assertFalse(rollup['ready'])
+
+    def test_rerun_chain_and_readiness(self):
+        root = self._run(passed=8, failed=2)
+        first = self._run(parent=root, passed=1, failed=1)
+        self._run(parent=first, passed=1)
+        rollup, plan = self._plan()
+        self.assertEqual((plan['passed'], plan['failed']), (10, 0))
+        self.assertTrue(rollup['ready'])
+        self.assertEqual(rollup['summary']['runs'], 3)
+
+    def test_running_rerun_counts_its_open_work(self):
+        root = self._run(passed=8, failed=2)
+        self._run(parent=root, status='running', passed=1, not_started=1)
+        rollup, plan = self._plan()
+        self.assertEqual((plan['passed'], plan['failed'], plan['not_started']), (9, 0, 1))
+        self.assertEqual(rollup['summary']['remaining'], 1)
+        self.assertFalse(rollup['ready'])
+
+    def test_rerun_of_another_subset_is_not_merged(self):
+        root = self._run(passed=8, failed=2)
+        self._run(parent=root, passed=8)
+        rollup, plan = self._plan()
+        self.assertEqual((plan['run'], plan['passed'], plan['failed']), (root.id, 8, 2))
+        self.assertEqual(rollup['summary']['runs'], 2)
+
+    def test_blocking_defects_come_from_the_run_holding_the_failures(self):
+        root = self._run(passed=1, failed=1)
+        case = Case.objects.create(project=self.project, title='Case')
+        inst = TestInstance.objects.create(run=root, tenant_id=1, testcase=case, status='failed')
+        DefectLink.objects.create(instance=inst, project=self.project, key='BUG-1')
+        rollup, _plan = self._plan()
+        self.assertEqual([(d['key'], d['instances']) for d in rollup['blocking_defects']], [('BUG-1', 1)])
+        rerun = self._run(parent=root, passed=1)
+        TestInstance.objects.create(run=rerun, tenant_id=1, testcase=case, status='passed')
+        rollup, _plan = self._plan()
+        self.assertEqual(rollup['blocking_defects'], [])
+        self.assertTrue(rollup['ready'])
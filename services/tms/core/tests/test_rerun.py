@@ -0,0 +1,78 @@
+from unittest import mock
+
+from core import counters, events, versions
+from core.models import Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+class RerunTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.run = TestRun.objects.create(project=self.project, name='Nightly', status='completed', is_automation=True)
+        # Inserted out of order: the copy follows `order`, not the id
+        self.rows = {}
+        for order, status in ((5, 'failed'), (1, 'passed'), (3, 'blocked'), (2, 'skipped'), (4, 'not_started')):
+            case = Case.objects.create(project=self.project, title=f'Case {status}')
+            self.rows[status] = TestInstance.objects.create(
+                run=self.run, tenant_id=self.tenant_id, testcase=case, status=status, order=order,
+                testcase_version=versions.snapshot_version(case), automation_ref=f'suite.test_{status}',
+                assignee_user_id=7,
+            )
+        counters.recount([self.run.id])
+
+    def _rerun(self, **payload):
+        return self.client_for().post(f'/api/runs/{self.run.id}/rerun/', payload, format='json')
+
+    def _copied(self, run_id):
+        return list(
+            TestInstance.objects.filter(run_id=run_id).order_by('order')
+            .values_list('testcase_id', 'testcase_version_id', 'automation_ref', 'assignee_user_id', 'order', 'status')
+        )
+
+    def _expected(self, *statuses, assignee=7):
+        return [
+            (self.rows[s].testcase_id, self.rows[s].testcase_version_id, self.rows[s].automation_ref, assignee,
+             idx, 'not_started')
+            for idx, s in enumerate(statuses, start=1)
+        ]
+
+    def test_default_copies_failed_blocked_and_skipped_in_order(self):
+        resp = self._rerun()
+        self.assertEqual(resp.status_code, 201, resp.data)
+        new_run = TestRun.objects.get(id=resp.data['id'])
+        self.assertEqual(self._copied(new_run.id), self._expected('skipped', 'blocked', 'failed'))
+        self.assertEqual(new_run.parent_run_id, self.run.id)
+        self.assertEqual((new_run.project_id, new_run.name), (self.project.id, 'Nightly (rerun)'))
+        self.assertTrue(new_run.is_automation)
+        self.assertEqual((new_run.status, new_run.started_at), ('planned', None))
+        self.assertEqual((new_run.total_count, new_run.not_started_count, new_run.failed_count), (3, 3, 0))
+        # The counters written on insert match a recount
+        counters.recount([new_run.id])
+        new_run.refresh_from_db()
+        self.assertEqual((new_run.total_count, new_run.not_started_count), (3, 3))
+
+    def test_statuses_name_and_assignee(self):
+        resp = self._rerun(statuses=['failed', 'not_started'], name='Retry', keep_assignee=False)
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(resp.data['name'], 'Retry')
+        self.assertEqual(self._copied(resp.data['id']), self._expected('not_started', 'failed', assignee=None))
+
+    def test_start_runs_at_once_and_announces_it(self):
+        with mock.patch.object(events, 'publish_run') as publish:
+            resp = self._rerun(start=True)
+        new_run = TestRun.objects.get(id=resp.data['id'])
+        self.assertEqual(new_run.status, 'running')
+        self.assertIsNotNone(new_run.started_at)
+        publish.assert_called_once_with(new_run, 'run.started')
+        with mock.patch.object(events, 'publish_run') as publish:
+            self._rerun(start='false')
+        publish.assert_not_called()
+
+    def test_invalid_or_empty_selection(self):
+        for statuses in (['failed', 'done'], 'failed'):
+            self.assertEqual(self._rerun(statuses=statuses).status_code, 400, statuses)
+        TestInstance.objects.filter(run=self.run).update(status='passed')
+        resp = self._rerun()
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(TestRun.objects.count(), 1)
@@ -0,0 +1,125 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from core import rollups
+from core.models import ExecutionRollup, Project, TestCase as Case, TestInstance, TestRun
+from core.tests.helpers import APITestCase
+
+
+UTC = dt_timezone.utc
+
+
+class BucketTests(TestCase):
+    def test_hour_and_day_boundaries(self):
+        last = datetime(2024, 3, 1, 10, 59, 59, 999999, tzinfo=UTC)
+        first = datetime(2024, 3, 1, 11, 0, tzinfo=UTC)
+        self.assertEqual(rollups.bucket_start(last, 'hour'), datetime(2024, 3, 1, 10, tzinfo=UTC))
+        self.assertEqual(rollups.bucket_start(first, 'hour'), first)
+        self.assertEqual(rollups.bucket_start(datetime(2024, 3, 1, 23, 59, 59, tzinfo=UTC), 'day'),
+                         datetime(2024, 3, 1, tzinfo=UTC))
+        self.assertEqual(rollups.bucket_start(datetime(2024, 3, 2, tzinfo=UTC), 'day'), datetime(2024, 3, 2, tzinfo=UTC))
+
+    def test_buckets_are_utc(self):
+        # 23:30 at UTC-2 is already the next day in UTC
+        local = datetime(2024, 3, 1, 23, 30, tzinfo=dt_timezone(timedelta(hours=-2)))
+        self.assertEqual(rollups.bucket_start(local, 'day'), datetime(2024, 3, 2, tzinfo=UTC))
+        self.assertEqual(rollups.bucket_start(local, 'hour'), datetime(2024, 3, 2, 1, tzinfo=UTC))
+
+    def test_aggregate_splits_at_the_hour(self):
+        rows = [
+            (1, 5, 'high', 7, datetime(2024, 3, 1, 10, 59, 59, tzinfo=UTC), 'passed', 10),
+            (1, 5, 'high', 7, datetime(2024, 3, 1, 11, 0, tzinfo=UTC), 'failed', None),
+            (1, None, '', None, datetime(2024, 3, 1, 11, 30, tzinfo=UTC), 'in_progress', 4),
+        ]
+        totals = rollups.aggregate(rows)
+        hour = lambda h, *rest: (1, 'hour', datetime(2024, 3, 1, h, tzinfo=UTC), *rest)
+        day = (1, 'day', datetime(2024, 3, 1, tzinfo=UTC), 5, 'high', 7)
+        self.assertEqual(totals[hour(10, 5, 'high', 7)], Counter(executions=1, passed=1, duration_count=1, duration_total=10))
+        self.assertEqual(totals[hour(11, 5, 'high', 7)], Counter(executions=1, failed=1))
+        self.assertEqual(totals[day], Counter(executions=2, passed=1, failed=1, duration_count=1, duration_total=10))
+        # Missing dimensions are stored as 0/'' so they take part in the unique key
+        self.assertEqual(totals[hour(11, 0, '', 0)], Counter(executions=1, duration_count=1, duration_total=4))
+
+
+class ApplyTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(tenant_id=1, key='P', name='Project')
+
+    def _totals(self, **values):
+        key = (self.project.id, 'hour', datetime(2024, 3, 1, 10, tzinfo=UTC), 0, '', 0)
+        return {key: Counter(values)}
+
+    def test_apply_adds_to_existing_rows(self):
+        rollups.apply(self._totals(executions=2, passed=2))
+        rollups.apply(self._totals(executions=1, failed=1, duration_count=1, duration_total=30))
+        row = ExecutionRollup.objects.get()
+        self.assertEqual((row.executions, row.passed, row.failed, row.duration_total), (3, 2, 1, 30))
+
+    def test_empty_totals(self):
+        rollups.apply({})
+        self.assertFalse(ExecutionRollup.objects.exists())
+
+
+class RefinishTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.run = TestRun.objects.create(project=project, name='Run', status='running', total_count=1,
+                                          not_started_count=1)
+        case = Case.objects.create(project=project, title='Case')
+        self.inst = TestInstance.objects.create(run=self.run, tenant_id=self.tenant_id, testcase=case,
+                                                automation_ref='suite.test_a')
+
+    def _executions(self):
+        row = ExecutionRollup.objects.filter(granularity='day').values('executions', 'passed', 'failed').get()
+        return row['executions'], row['passed'], row['failed']
+
+    def test_finishing_again_does_not_count_again(self):
+        client = self.client_for()
+        client.post(f'/api/instances/{self.inst.id}/pass_case/')
+        client.post(f'/api/instances/{self.inst.id}/fail_case/', {'actual_result': 'boom'}, format='json')
+        client.post(f'/api/runs/{self.run.id}/results/',
+                    {'results': [{'automation_ref': 'suite.test_a', 'status': 'passed'}]}, format='json')
+        self.assertEqual(self._executions(), (1, 1, 0))
+
+    def test_a_reset_instance_counts_as_a_new_execution(self):
+        client = self.client_for()
+        client.post(f'/api/instances/{self.inst.id}/pass_case/')
+        resp = client.post('/api/instances/bulk_status/', {'status': 'not_started', 'instances': [self.inst.id]},
+                           format='json')
+        self.assertEqual(resp.status_code, 200)
+        client.post(f'/api/runs/{self.run.id}/results/',
+                    {'results': [{'automation_ref': 'suite.test_a', 'status': 'failed'}]}, format='json')
+        self.assertEqual(self._executions(), (2, 1, 1))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentApplyTests(TransactionTestCase):
+    """Real row locks are needed, so this only runs against Postgres."""
+
+    def test_concurrent_applies_to_one_bucket_add_up(self):
+        project = Project.objects.create(tenant_id=1, key='P', name='Project')
+        key = (project.id, 'hour', datetime(2024, 3, 1, 10, tzinfo=UTC), 0, '', 0)
+        workers, barrier, errors = 8, threading.Barrier(8), []
+
+        def work():
+            try:
+                barrier.wait()
+                rollups.apply({key: Counter(executions=1, passed=1)})
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        row = ExecutionRollup.objects.get()
+        self.assertEqual((row.executions, row.passed), (workers, workers))
@@ -0,0 +1,67 @@
+import itertools
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from core.sharding import fallback_duration, plan_shards
+
+
+class PlanShardsTests(SimpleTestCase):
+    def _loads(self, shards, durations):
+        return sorted(sum(durations[ref] for ref in shard['automation_refs']) for shard in shards)
+
+    def test_longest_first_balances_the_shards(self):
+        durations = {'a': 7, 'b': 5, 'c': 4, 'd': 3, 'e': 3, 'f': 2}
+        shards, makespan = plan_shards(durations, durations, 2, fallback=1)
+        self.assertEqual(self._loads(shards, durations), [12, 12])
+        self.assertEqual(makespan, 12)
+        # The longest test opens the first shard
+        self.assertEqual(shards[0]['automation_refs'][0], 'a')
+
+    def test_makespan_within_the_lpt_bound(self):
+        rnd = random.Random(7)
+        for _ in range(50):
+            durations = {f't{i}': rnd.randint(1, 60) for i in range(rnd.randint(1, 8))}
+            workers = rnd.randint(1, 3)
+            _shards, makespan = plan_shards(durations, durations, workers, fallback=1)
+            best = min(
+                max(sum(durations[ref] for ref, w in zip(durations, split) if w == i) for i in range(workers))
+                for split in itertools.product(range(workers), repeat=len(durations))
+            )
+            self.assertLessEqual(makespan, best * (4 / 3 - 1 / (3 * workers)) + 1e-9)
+
+    def test_refs_without_history_use_the_fallback(self):
+        shards, makespan = plan_shards(['a', 'b', 'c', 'd', 'e'], {'a': 10}, 2, fallback=4)
+        self.assertEqual(sorted(s['predicted_seconds'] for s in shards), [12.0, 14.0])
+        self.assertEqual(makespan, 14.0)
+
+    def test_more_workers_than_refs_leaves_empty_shards(self):
+        shards, makespan = plan_shards(['a', 'b'], {'a': 3, 'b': 5}, 4, fallback=1)
+        self.assertEqual([s['index'] for s in shards], [0, 1, 2, 3])
+        self.assertEqual([s['automation_refs'] for s in shards], [['b'], ['a'], [], []])
+        self.assertEqual([s['predicted_seconds'] for s in shards], [5.0, 3.0, 0.0, 0.0])
+        self.assertEqual(makespan, 5.0)
+
+    def test_no_refs(self):
+        shards, makespan = plan_shards([], {}, 2, fallback=1)
+        self.assertEqual([s['automation_refs'] for s in shards], [[], []])
+        self.assertEqual(makespan, 0.0)
+
+    def test_output_does_not_depend_on_input_order(self):
+        refs = [f't{i}' for i in range(40)]
+        durations = {ref: float(i % 7) for i, ref in enumerate(refs)}
+        expected = plan_shards(refs, durations, 5, fallback=2)
+        rnd = random.Random(3)
+        for _ in range(5):
+            shuffled = refs[:]
+            rnd.shuffle(shuffled)
+            self.assertEqual(plan_shards(shuffled, durations, 5, fallback=2), expected)
+
+
+class FallbackDurationTests(SimpleTestCase):
+    def test_median_of_known_means(self):
+        self.assertEqual(fallback_duration({'a': 1.0, 'b': 9.0, 'c': 4.0}), 4.0)
+
+    @override_settings(SHARD_DEFAULT_DURATION_SECONDS=42)
+    def test_configured_default_without_history(self):
+        self.assertEqual(fallback_duration({}), 42.0)
@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase
+
+from core.signatures import failure_signature, normalize_line
+
+
+PY_TRACE = '''Traceback (most recent call last):
+  File "{root}/tests/test_checkout.py", line {line}, in test_pay
+    client.pay(order)
+  File "{root}/app/payments.py", line 88, in pay
+    raise TimeoutError(msg)
+TimeoutError: gateway {host} did not answer after {ms}ms (order {order})
+'''
+
+JAVA_TRACE = '''java.lang.IllegalStateException: session {session} expired at {ts}
+\tat com.acme.Session.check(Session.java:{line})
+\tat com.acme.Cart.add(Cart.java:17)
+'''
+
+
+class FailureSignatureTests(SimpleTestCase):
+    def test_volatile_tokens_normalize_away(self):
+        cases = [
+            ('order 42 failed after 1500ms', 'order 7 failed after 31.5ms'),
+            ('object at 0x7f3a2c10 is gone', 'object at 0xdeadbeef is gone'),
+            ('row 3f2b8e6a-0c1d-4e5f-9a8b-7c6d5e4f3a2b missing', 'row 00000000-0000-0000-0000-000000000000 missing'),
+            ('started 2024-01-02T03:04:05.123Z', 'started 2025-12-31 23:59:59+02:00'),
+            ('cannot open /tmp/build-123/out/report.xml', 'cannot open C:\\ci\\work\\report.xml'),
+            ('GET https://api.example.com/v1/items?id=5 failed', 'GET http://localhost:8000/v2/x failed'),
+            ('commit a94a8fe5ccb19ba61c4c0873d391e987982fbbd3 broke it', 'commit 0123456789abcdef0123 broke it'),
+            ('Timeout   after\tthe  wait', 'timeout after the wait'),
+        ]
+        for a, b in cases:
+            with self.subTest(a=a):
+                self.assertEqual(normalize_line(a), normalize_line(b))
+                self.assertEqual(failure_signature(a), failure_signature(b))
+
+    def test_python_traceback_reruns_share_a_signature(self):
+        first = PY_TRACE.format(root='/home/ci/build-1', line=12, host='10.0.0.5', ms=3000, order=981)
+        second = PY_TRACE.format(root='/srv/agent/work/77', line=14, host='10.0.0.9', ms=2999, order=5)
+        self.assertEqual(failure_signature(first), failure_signature(second))
+
+    def test_java_trace_reruns_share_a_signature(self):
+        first = JAVA_TRACE.format(session='a1b2c3d4e5f6a7b8', ts='2024-05-01 10:00:00', line=40)
+        second = JAVA_TRACE.format(session='ffffeeeeddddcccc', ts='2024-05-02 11:30:00', line=41)
+        self.assertEqual(failure_signature(first), failure_signature(second))
+
+    def test_different_errors_do_not_collide(self):
+        texts = [
+            'AssertionError: expected 200, got 500',
+            'AssertionError: expected status ok',
+            'TimeoutError: gateway did not answer after 3000ms',
+            'ConnectionRefusedError: [Errno 111] Connection refused',
+            PY_TRACE.format(root='/ci', line=1, host='h', ms=1, order=1),
+            PY_TRACE.format(root='/ci', line=1, host='h', ms=1, order=1).replace('in pay', 'in refund'),
+            JAVA_TRACE.format(session='abc', ts='2024-05-01 10:00:00', line=1),
+            JAVA_TRACE.format(session='abc', ts='2024-05-01 10:00:00', line=1).replace('Cart.add', 'Cart.remove'),
+        ]
+        signatures = [failure_signature(text) for text in texts]
+        self.assertEqual(len(set(signatures)), len(texts))
+
+    def test_same_message_from_different_frames_differs(self):
+        js = 'TypeError: x is undefined\n    at render (/app/src/{}.js:10:5)'
+        self.assertNotEqual(failure_signature(js.format('list')), failure_signature(js.format('detail')))
+
+    def test_empty_text(self):
+        self.assertEqual(failure_signature(''), '')
+        self.assertEqual(failure_signature('  \n '), '')
@@ -0,0 +1,113 @@
+import json
+import math
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from core.models import TestCaseStats
+from core.stats import ALPHA, apply_outcomes, bucket_of, bucket_value, sketch_add, sketch_merge, sketch_quantile
+
+
+def _sketch(samples):
+    sketch = {}
+    for seconds in samples:
+        sketch_add(sketch, seconds)
+    return sketch
+
+
+def _exact(samples, q):
+    # The sample sketch_quantile targets: rank q * (n - 1), rounded down
+    return sorted(samples)[math.floor(q * (len(samples) - 1))]
+
+
+class SketchTests(SimpleTestCase):
+    # Quantiles are rounded to 2 decimals on top of the bucket error
+    def assertWithinBound(self, estimate, exact):
+        self.assertLessEqual(abs(estimate - exact), ALPHA * exact + 0.005, f'{estimate} vs {exact}')
+
+    # Durations are whole seconds; everything up to 1s shares the first bucket
+    def test_bucket_representative_within_alpha(self):
+        for seconds in (1, 1.04, 2, 17, 59.9, 600, 86400):
+            value = bucket_value(bucket_of(seconds))
+            self.assertLessEqual(abs(value - seconds), ALPHA * seconds * (1 + 1e-12))
+
+    def test_quantiles_of_a_lognormal_distribution(self):
+        rnd = random.Random(11)
+        samples = [max(1, round(rnd.lognormvariate(3, 1))) for _ in range(5000)]
+        sketch = _sketch(samples)
+        for q in (0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1):
+            self.assertWithinBound(sketch_quantile(sketch, q), _exact(samples, q))
+
+    def test_merge_equals_sketch_of_all_samples(self):
+        rnd = random.Random(5)
+        a = [rnd.uniform(1, 100) for _ in range(300)]
+        b = [1 + rnd.expovariate(0.05) for _ in range(700)]
+        merged = sketch_merge(_sketch(a), _sketch(b))
+        self.assertEqual(merged, _sketch(a + b))
+        for q in (0.5, 0.9):
+            self.assertWithinBound(sketch_quantile(merged, q), _exact(a + b, q))
+
+    def test_merge_leaves_its_inputs_alone(self):
+        a, b = _sketch([1, 2]), _sketch([2, 3])
+        sketch_merge(a, b)
+        self.assertEqual((a, b), (_sketch([1, 2]), _sketch([2, 3])))
+        self.assertEqual(sketch_merge(), {})
+
+    def test_empty_sketch(self):
+        self.assertIsNone(sketch_quantile({}, 0.5))
+
+    def test_single_sample(self):
+        sketch = _sketch([42])
+        for q in (0, 0.5, 1):
+            self.assertWithinBound(sketch_quantile(sketch, q), 42)
+
+    def test_zero_durations_have_their_own_bucket(self):
+        sketch = _sketch([0, 0, 0, 5])
+        self.assertEqual(sketch_quantile(sketch, 0.5), 0.0)
+        self.assertWithinBound(sketch_quantile(sketch, 1), 5)
+
+    def test_json_round_trip(self):
+        rnd = random.Random(2)
+        sketch = _sketch([rnd.randint(1, 500) for _ in range(1000)])
+        restored = json.loads(json.dumps(sketch))
+        self.assertEqual(restored, sketch)
+        for q in (0.5, 0.9):
+            self.assertEqual(sketch_quantile(restored, q), sketch_quantile(sketch, q))
+        sketch_add(restored, 3)
+        self.assertEqual(sum(restored.values()), 1001)
+
+
+@override_settings(FLAKY_WINDOW=5)
+class ApplyOutcomesTests(SimpleTestCase):
+    def _apply(self, *batches):
+        stats = TestCaseStats(recent_outcomes='', flips=0, flaky_score=0.0)
+        for outcomes in batches:
+            apply_outcomes(stats, outcomes)
+        return stats
+
+    def test_stable_cases_score_zero(self):
+        for outcomes in ('PPPP', 'FFFF', 'P'):
+            stats = self._apply(list(outcomes))
+            self.assertEqual((stats.flips, stats.flaky_score), (0, 0.0))
+
+    def test_pass_fail_pass(self):
+        stats = self._apply(['P'], ['F'], ['P'])
+        self.assertEqual(stats.recent_outcomes, 'PFP')
+        self.assertEqual((stats.flips, stats.flaky_score), (2, 1.0))
+
+    def test_flip_rate_over_the_window(self):
+        stats = self._apply(['P', 'P', 'F', 'F', 'P'])
+        self.assertEqual((stats.flips, stats.flaky_score), (2, 0.5))
+
+    def test_window_keeps_the_latest_outcomes(self):
+        stats = self._apply(['F', 'P', 'F', 'P'], ['P', 'P', 'P'])
+        self.assertEqual(stats.recent_outcomes, 'FPPPP')
+        self.assertEqual((stats.flips, stats.flaky_score), (1, 0.25))
+        # Old flips age out once the window has moved past them
+        stats = self._apply(['F', 'P', 'F', 'P'], ['P'] * 5)
+        self.assertEqual((stats.recent_outcomes, stats.flips, stats.flaky_score), ('PPPPP', 0, 0.0))
+
+    def test_batch_longer_than_the_window(self):
+        stats = self._apply(list('PFPFPFPPPP'))
+        self.assertEqual(stats.recent_outcomes, 'FPPPP')
+        self.assertEqual(len(stats.recent_outcomes), 5)
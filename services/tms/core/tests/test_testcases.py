@@ -0,0 +1,28 @@
+from core.models import Project, TestCase as Case
+from core.tests.helpers import APITestCase
+
+
+class BulkUpdateTagsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.case = Case.objects.create(project=project, title='Case', tags=['smoke', 'legacy'])
+
+    def _bulk(self, tags):
+        return self.client_for().post('/api/testcases/bulk_update/', {'testcases': [self.case.id], 'tags': tags},
+                                      format='json')
+
+    def test_tags_are_added_and_removed(self):
+        resp = self._bulk({'add': ['api'], 'remove': ['legacy']})
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.tags, ['smoke', 'api'])
+
+    def test_invalid_tags_are_rejected_like_a_single_update(self):
+        for bad in ([{'x': 1}], [None], ['t' * 51]):
+            self.assertEqual(self._bulk({'add': bad}).status_code, 400, bad)
+            resp = self.client_for().patch(f'/api/testcases/{self.case.id}/', {'tags': bad}, format='json')
+            self.assertEqual(resp.status_code, 400, bad)
+        self.assertEqual(self._bulk({'remove': [{'x': 1}]}).status_code, 400)
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.tags, ['smoke', 'legacy'])
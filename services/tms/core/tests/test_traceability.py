@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import traceability
+from core.models import (
+    Project, Release, Requirement, TestCase as Case, TestInstance, TestPlan, TestRun,
+)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TraceabilityMatrixTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(tenant_id=1, key='P', name='Project')
+        self.release = Release.objects.create(project=self.project, name='R1')
+        self.plan = TestPlan.objects.create(project=self.project, name='Plan', release=self.release)
+        self.run = TestRun.objects.create(project=self.project, plan=self.plan, name='Run')
+        self.other_run = TestRun.objects.create(project=self.project, name='Ad hoc')
+        self.now = timezone.now()
+
+    def _requirement(self, title, *cases):
+        req = Requirement.objects.create(project=self.project, title=title)
+        for case in cases:
+            case.requirements.add(req)
+        return req
+
+    def _case(self, title, *results, run=None, status='active'):
+        """A case with finished results given oldest first."""
+        case = Case.objects.create(project=self.project, title=title, status=status)
+        for age, result in enumerate(reversed(results)):
+            TestInstance.objects.create(run=run or self.run, tenant_id=1, testcase=case, status=result,
+                                        finished_at=self.now - timedelta(minutes=age))
+        return case
+
+    def _coverage(self, matrix):
+        return {req['title']: req['coverage'] for req in matrix['requirements']}
+
+    def test_verdicts(self):
+        self._requirement('uncovered')
+        self._requirement('failing', self._case('ok', 'passed'), self._case('bad', 'failed'))
+        self._requirement('blocked', self._case('stuck', 'blocked'))
+        self._requirement('not run', self._case('done', 'passed'), self._case('new'))
+        self._requirement('passed', self._case('p1', 'passed'), self._case('p2', 'passed'))
+        self._requirement('partial', self._case('p3', 'passed'), self._case('skip', 'skipped'))
+        matrix = traceability.build_matrix(self.project.id)
+        self.assertEqual(self._coverage(matrix), {
+            'uncovered': 'uncovered', 'failing': 'failing', 'blocked': 'failing', 'not run': 'not_run',
+            'passed': 'passed', 'partial': 'partial',
+        })
+        self.assertEqual(matrix['summary'], {
+            'requirements': 6, 'uncovered': 1, 'failing': 2, 'not_run': 1, 'passed': 1, 'partial': 1,
+        })
+        failing = next(req for req in matrix['requirements'] if req['title'] == 'failing')
+        self.assertEqual((failing['cases'], failing['passed'], failing['failing'], failing['not_run']), (2, 1, 1, 0))
+
+    def test_latest_result_wins(self):
+        self._requirement('fixed', self._case('flaky', 'failed', 'passed'))
+        self._requirement('broken', self._case('regressed', 'passed', 'failed'))
+        self.assertEqual(self._coverage(traceability.build_matrix(self.project.id)),
+                         {'fixed': 'passed', 'broken': 'failing'})
+
+    def test_archived_cases_do_not_count(self):
+        self._requirement('req', self._case('live', 'passed'), self._case('old', 'failed', status='archived'))
+        matrix = traceability.build_matrix(self.project.id)
+        self.assertEqual(self._coverage(matrix), {'req': 'passed'})
+        self.assertEqual([t['title'] for t in matrix['requirements'][0]['tests']], ['live'])
+
+    def test_release_and_plan_scope(self):
+        case = self._case('case', 'passed')
+        # A later failure outside the release's plans
+        TestInstance.objects.create(run=self.other_run, tenant_id=1, testcase=case, status='failed',
+                                    finished_at=self.now + timedelta(minutes=1))
+        self._requirement('req', case)
+        self.assertEqual(self._coverage(traceability.build_matrix(self.project.id)), {'req': 'failing'})
+        self.assertEqual(self._coverage(traceability.build_matrix(self.project.id, release_id=self.release.id)),
+                         {'req': 'passed'})
+        self.assertEqual(self._coverage(traceability.build_matrix(self.project.id, plan_id=self.plan.id)),
+                         {'req': 'passed'})
+
+    def test_cache_is_dropped_on_commit_of_invalidate(self):
+        case = self._case('case', 'passed')
+        self._requirement('req', case)
+        self.assertEqual(self._coverage(traceability.cached_matrix(self.project.id)), {'req': 'passed'})
+        TestInstance.objects.create(run=self.run, tenant_id=1, testcase=case, status='failed',
+                                    finished_at=self.now + timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            traceability.invalidate(self.project.id)
+        # Not committed yet: the cached matrix is still served
+        self.assertEqual(self._coverage(traceability.cached_matrix(self.project.id)), {'req': 'passed'})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._coverage(traceability.cached_matrix(self.project.id)), {'req': 'failing'})
+
+    def test_invalidate_is_per_project(self):
+        other = Project.objects.create(tenant_id=1, key='Q', name='Other')
+        self._requirement('req', self._case('case', 'passed'))
+        traceability.cached_matrix(self.project.id)
+        Requirement.objects.create(project=self.project, title='added')
+        with self.captureOnCommitCallbacks(execute=True):
+            traceability.invalidate(other.id)
+        self.assertEqual(len(traceability.cached_matrix(self.project.id)['requirements']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            traceability.invalidate(self.project.id)
+        self.assertEqual(len(traceability.cached_matrix(self.project.id)['requirements']), 2)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import Project, TestCase as Case, TestInstance, TestRun
+from core.tasks import reclaim_expired_leases_task
+from core.tests.helpers import APITestCase
+
+
+class ReclaimExpiredLeasesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.run = TestRun.objects.create(project=project, name='Run', status='running', total_count=1,
+                                          not_started_count=1)
+        case = Case.objects.create(project=project, title='Case')
+        self.inst = TestInstance.objects.create(run=self.run, tenant_id=self.tenant_id, testcase=case, order=1)
+
+    def _claim(self, user_id):
+        return self.client_for(user_id).post(f'/api/runs/{self.run.id}/next/', {}, format='json')
+
+    def _expire(self):
+        TestInstance.objects.filter(id=self.inst.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(reclaim_expired_leases_task(), 1)
+        self.inst.refresh_from_db()
+
+    def test_reclaim_drops_the_assignment_made_by_the_claim(self):
+        self.assertEqual(self._claim(1).data['assignee_user_id'], 1)
+        self._expire()
+        self.assertEqual(self.inst.status, 'not_started')
+        self.assertIsNone(self.inst.assignee_user_id)
+        self.assertIsNone(self.inst.claimed_by_user_id)
+        resp = self._claim(2)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data['id'], resp.data['assignee_user_id']), (self.inst.id, 2))
+        self.run.refresh_from_db()
+        self.assertEqual((self.run.not_started_count, self.run.in_progress_count), (0, 1))
+
+    def test_reclaim_keeps_an_explicit_assignment(self):
+        TestInstance.objects.filter(id=self.inst.id).update(assignee_user_id=1)
+        self._claim(1)
+        self._expire()
+        self.assertEqual(self.inst.assignee_user_id, 1)
+        self.assertEqual(self._claim(2).status_code, 204)
+
+    def test_reassignment_during_the_lease_is_kept(self):
+        self._claim(1)
+        TestInstance.objects.filter(id=self.inst.id).update(assignee_user_id=3)
+        self._expire()
+        self.assertEqual(self.inst.assignee_user_id, 3)
+
+
+@override_settings(TEST_INSTANCE_LEASE_MAX_SECONDS=3600)
+class LeaseLengthTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(tenant_id=self.tenant_id, key='P', name='Project')
+        self.run = TestRun.objects.create(project=project, name='Run', status='running', total_count=1,
+                                          not_started_count=1)
+        TestInstance.objects.create(run=self.run, tenant_id=self.tenant_id, order=1,
+                                    testcase=Case.objects.create(project=project, title='Case'))
+
+    def _claim(self, lease_seconds):
+        return self.client_for().post(f'/api/runs/{self.run.id}/next/', {'lease_seconds': lease_seconds},
+                                      format='json')
+
+    def test_lease_longer_than_the_maximum_is_rejected(self):
+        resp = self._claim(10 ** 9)
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('3600', resp.data['detail'])
+        self.assertFalse(TestInstance.objects.filter(status='in_progress').exists())
+
+    def test_lease_within_bounds(self):
+        before = timezone.now()
+        resp = self._claim(3600)
+        self.assertEqual(resp.status_code, 200)
+        lease = TestInstance.objects.get().lease_expires_at - before
+        self.assertTrue(timedelta(seconds=3599) < lease <= timedelta(seconds=3601))
@@ -0,0 +1,132 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Requirement, TestCase, TestInstance, TestPlan, TestRun
+
+
+FAILING = ('failed', 'blocked')
+
+# One statement: ROW_NUMBER picks each case's most recent finished instance within the
+# scope, the matrix joins requirements to their (non-archived) cases and those results,
+# and windows partitioned by requirement attach its per-result totals to every row.
+_MATRIX_SQL = """
+WITH latest AS (
+    SELECT i.testcase_id, i.id, i.run_id, i.status, i.finished_at,
+           ROW_NUMBER() OVER (PARTITION BY i.testcase_id ORDER BY i.finished_at DESC, i.id DESC) AS rn
+    FROM {instances} i
+    JOIN {runs} r ON r.id = i.run_id
+    {plan_join}
+    WHERE r.project_id = %(project)s AND i.finished_at IS NOT NULL {scope}
+), linked AS (
+    SELECT m.requirement_id, t.id AS testcase_id, t.title
+    FROM {links} m
+    JOIN {testcases} t ON t.id = m.testcase_id
+    WHERE t.project_id = %(project)s AND t.status <> 'archived'
+), matrix AS (
+    SELECT q.id AS req_id, q.external_id, q.title AS req_title, q.status AS req_status,
+           c.testcase_id, c.title AS case_title, l.id AS instance_id, l.run_id, l.status AS result, l.finished_at
+    FROM {requirements} q
+    LEFT JOIN linked c ON c.requirement_id = q.id
+    LEFT JOIN latest l ON l.testcase_id = c.testcase_id AND l.rn = 1
+    WHERE q.project_id = %(project)s
+)
+SELECT x.req_id, x.external_id, x.req_title, x.req_status, x.testcase_id, x.case_title,
+       x.instance_id, x.run_id, x.result, x.finished_at,
+       COUNT(x.testcase_id) OVER w AS cases,
+       COUNT(CASE WHEN x.result = 'passed' THEN 1 END) OVER w AS passed,
+       COUNT(CASE WHEN x.result IN {failing} THEN 1 END) OVER w AS failing,
+       COUNT(CASE WHEN x.testcase_id IS NOT NULL AND x.result IS NULL THEN 1 END) OVER w AS not_run
+FROM matrix x
+WINDOW w AS (PARTITION BY x.req_id)
+ORDER BY x.req_id, x.testcase_id
+"""
+
+
+def _verdict(cases, passed, failing, not_run):
+    if not cases:
+        return 'uncovered'
+    if failing:
+        return 'failing'
+    if not_run:
+        return 'not_run'
+    return 'passed' if passed == cases else 'partial'
+
+
+def build_matrix(project_id, release_id=None, plan_id=None):
+    """Requirements of a project with their cases and each case's latest result.
+
+    Results come from finished instances of the project's runs, optionally only runs
+    of plans in `release_id` or of `plan_id`.
+    """
+    plan_join, scope = '', ''
+    params = {'project': project_id}
+    if release_id:
+        plan_join = f'JOIN {TestPlan._meta.db_table} p ON p.id = r.plan_id'
+        scope = 'AND p.release_id = %(release)s'
+        params['release'] = release_id
+    elif plan_id:
+        scope = 'AND r.plan_id = %(plan)s'
+        params['plan'] = plan_id
+    sql = _MATRIX_SQL.format(
+        instances=TestInstance._meta.db_table,
+        runs=TestRun._meta.db_table,
+        links=TestCase.requirements.through._meta.db_table,
+        testcases=TestCase._meta.db_table,
+        requirements=Requirement._meta.db_table,
+        failing="('" + "', '".join(FAILING) + "')",
+        plan_join=plan_join,
+        scope=scope,
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    requirements = []
+    summary = {'requirements': 0, 'uncovered': 0, 'failing': 0, 'not_run': 0, 'passed': 0, 'partial': 0}
+    current = None
+    for (req_id, external_id, req_title, req_status, tc_id, case_title, inst_id, run_id, result, finished_at,
+         cases, passed, failing, not_run) in rows:
+        if current is None or current['id'] != req_id:
+            verdict = _verdict(cases, passed, failing, not_run)
+            current = {
+                'id': req_id, 'external_id': external_id, 'title': req_title, 'status': req_status,
+                'coverage': verdict, 'cases': cases, 'passed': passed, 'failing': failing, 'not_run': not_run,
+                'tests': [],
+            }
+            requirements.append(current)
+            summary['requirements'] += 1
+            summary[verdict] += 1
+        if tc_id is not None:
+            current['tests'].append({
+                'testcase': tc_id, 'title': case_title, 'result': result,
+                'instance': inst_id, 'run': run_id, 'finished_at': finished_at,
+            })
+    return {'summary': summary, 'requirements': requirements}
+
+
+def _version_key(project_id):
+    return f'tms:trace:version:{project_id}'
+
+
+def invalidate(*project_ids):
+    """Drop cached matrices of the projects (new results, changed cases or requirements).
+
+    Takes effect when the surrounding transaction commits, so a rebuild never caches
+    the state before the write.
+    """
+    versions = {_version_key(pid): time.time_ns() for pid in set(project_ids)}
+    transaction.on_commit(lambda: cache.set_many(versions, None))
+
+
+def cached_matrix(project_id, release_id=None, plan_id=None):
+    """build_matrix, cached per project until `invalidate` or TRACEABILITY_CACHE_SECONDS."""
+    version = cache.get(_version_key(project_id), 0)
+    key = f'tms:trace:{project_id}:{version}:{release_id or 0}:{plan_id or 0}'
+    result = cache.get(key)
+    if result is None:
+        result = build_matrix(project_id, release_id, plan_id)
+        cache.set(key, result, settings.TRACEABILITY_CACHE_SECONDS)
+    return result
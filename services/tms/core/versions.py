@@ -0,0 +1,89 @@
+import hashlib
+import json
+
+from .models import TestCaseVersion, TestCaseVersionContent
+
+
+def content_hash(description, steps, expected):
+    """SHA-256 of a version's description/steps/expected as canonical JSON."""
+    payload = json.dumps([description or '', steps or [], expected or []],
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def case_content(testcase):
+    """The versioned content of a case as (description, steps, expected)."""
+    return testcase.description or '', testcase.steps or [], []
+
+
+def content_ids(contents):
+    """Content row ids for {sha256: (description, steps, expected)}, creating missing rows."""
+    ids = dict(TestCaseVersionContent.objects.filter(sha256__in=contents).values_list('sha256', 'id'))
+    missing = [sha for sha in contents if sha not in ids]
+    if missing:
+        # A concurrent writer may store the same content first; the re-read picks its row
+        TestCaseVersionContent.objects.bulk_create([
+            TestCaseVersionContent(sha256=sha, description=contents[sha][0], steps=contents[sha][1],
+                                   expected=contents[sha][2])
+            for sha in missing
+        ], ignore_conflicts=True)
+        ids.update(TestCaseVersionContent.objects.filter(sha256__in=missing).values_list('sha256', 'id'))
+    return ids
+
+
+def snapshot_versions(testcases):
+    """Version rows of the cases' current `version`: {(testcase_id, version): TestCaseVersion}.
+
+    Existing snapshots are reused; missing ones are created in bulk from the cases'
+    current title and content, sharing content rows with identical versions.
+    """
+    cases = {tc.id: tc for tc in testcases}
+    if not cases:
+        return {}
+    wanted = {(tc.id, tc.version) for tc in cases.values()}
+    result = {
+        (vobj.testcase_id, vobj.version): vobj
+        for vobj in TestCaseVersion.objects.filter(
+            testcase_id__in=cases.keys(), version__in={ver for _tc, ver in wanted},
+        ).only('id', 'testcase_id', 'version', 'title', 'content_id')
+        if (vobj.testcase_id, vobj.version) in wanted
+    }
+    missing = [tc for tc in cases.values() if (tc.id, tc.version) not in result]
+    if missing:
+        contents = {tc.id: case_content(tc) for tc in missing}
+        hashes = {tc_id: content_hash(*content) for tc_id, content in contents.items()}
+        ids = content_ids({hashes[tc_id]: content for tc_id, content in contents.items()})
+        for vobj in TestCaseVersion.objects.bulk_create([
+            TestCaseVersion(testcase_id=tc.id, version=tc.version, title=tc.title, content_id=ids[hashes[tc.id]])
+            for tc in missing
+        ]):
+            result[(vobj.testcase_id, vobj.version)] = vobj
+    return result
+
+
+def snapshot_version(testcase):
+    """Version row of the case's current `version`, created on demand."""
+    return snapshot_versions([testcase])[(testcase.id, testcase.version)]
+
+
+def record_version(testcase):
+    """Snapshot an edited case as a new version unless its title and content are unchanged.
+
+    An edit that only touched other fields (status, priority, labels...) keeps the
+    current version. Otherwise `version` is bumped and the new snapshot points at the
+    content row of its hash. Returns whether a version was created. Call in a transaction.
+    """
+    content = case_content(testcase)
+    sha = content_hash(*content)
+    current = (
+        TestCaseVersion.objects.filter(testcase=testcase, version=testcase.version)
+        .values_list('title', 'content__sha256').first()
+    )
+    if current == (testcase.title, sha):
+        return False
+    testcase.version = (testcase.version or 1) + 1
+    testcase.save(update_fields=['version'])
+    TestCaseVersion.objects.create(
+        testcase=testcase, version=testcase.version, title=testcase.title, content_id=content_ids({sha: content})[sha],
+    )
+    return True
@@ -1,7 +1,12 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.core import signing
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
 import os
 
+from . import storage
+
 
 @api_view(['GET'])
 def health(_request):
@@ -10,3 +15,33 @@ def health(_request):
         'service': os.getenv('SERVICE_NAME', 'tms'),
     })
 
+
+@csrf_exempt
+def artifact_blob(request, token):
+    """Upload/download endpoint behind LocalArtifactStorage "presigned" URLs.
+
+    Only used with ARTIFACT_STORAGE=local; the signed token is the authorization, like
+    an S3 presigned URL. Uploaded bytes must hash to the digest the URL was signed for.
+    """
+    store = storage.get_storage()
+    if not isinstance(store, storage.LocalArtifactStorage):
+        return JsonResponse({'detail': 'Not found'}, status=404)
+    try:
+        claims = store.load_token(token)
+    except signing.BadSignature:
+        return JsonResponse({'detail': 'Invalid or expired link'}, status=403)
+    if request.method != claims['method']:
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+    key = claims['key']
+    if request.method == 'PUT':
+        data = request.body
+        if len(data) != claims['size'] or storage.sha256_hex(data) != claims['sha256']:
+            return JsonResponse({'detail': 'Content does not match the declared size/sha256'}, status=400)
+        store.put_bytes(key, data, request.content_type)
+        return HttpResponse(status=200)
+    path = store.path_of(key)
+    if not path.exists():
+        return JsonResponse({'detail': 'Not found'}, status=404)
+    return FileResponse(
+        path.open('rb'), as_attachment=True, filename=claims['filename'], content_type=claims['content_type'],
+    )
@@ -1,32 +1,193 @@
 import csv
 import json
+from collections import defaultdict
 from pathlib import Path
 
 from django.conf import settings
-from rest_framework import viewsets, mixins
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, mixins, serializers
 from rest_framework.permissions import IsAuthenticated
-from .permissions import IsTenantMember, TenantRBACPermission
+from .permissions import IsTenantMember, TenantRBACPermission, has_project_role
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Max
+from django.db import connection, transaction
+from django.db.models import Avg, Case, Count, Max, Min, Q, Sum, F, Value, When, Window
+from django.db.models.functions import Coalesce, RowNumber, Substr
 from .models import (
     Project, TestCase, Suite, SuiteCase,
-    Release, TestCaseVersion, TestPlan, PlanItem, TestRun, TestInstance,
-    TestSection, TestTag, Requirement, TestImportJob, TestExportJob
+    Release, TestCaseVersion, TestCaseVersionContent, TestPlan, PlanItem, TestRun, TestInstance,
+    TestSection, TestTag, Requirement, TestImportJob, TestExportJob, TestCaseStats, InstanceArtifact,
+    DefectLink, ExecutionRollup,
 )
 from .serializers import (
     ProjectSerializer, TestCaseSerializer, SuiteSerializer, SuiteCaseSerializer,
     ReleaseSerializer, TestCaseVersionSerializer, TestPlanSerializer,
-    PlanItemSerializer, TestRunSerializer, TestInstanceSerializer,
+    PlanItemSerializer, TestRunSerializer, TestInstanceSerializer, InstanceArtifactSerializer, DefectLinkSerializer,
     TestSectionSerializer, TestTagSerializer, RequirementSerializer,
     TestImportJobSerializer, TestExportJobSerializer
 )
-from .pagination import CreatedAtCursorPagination
+from .pagination import CreatedAtCursorPagination, HistoryCursorPagination
+from . import assignment
+from . import events
+from . import launcher
+from . import portfolio
+from . import readiness
+from . import rollups
+from . import sharding
+from . import stats
+from . import comparison
+from . import counters
+from . import diffing
+from . import signatures
+from . import storage
+from . import traceability
+from . import versions
+from .defects import parse_defect
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+
+def _event_stream_response(channels):
+    # The stream only talks to Redis; hand the DB connection back now rather than
+    # holding it open until the client disconnects
+    if not connection.in_atomic_block:
+        connection.close()
+    resp = StreamingHttpResponse(events.event_stream(channels), content_type='text/event-stream')
+    resp['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx/traefik) so events are flushed immediately
+    resp['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+def _signature_of(inst):
+    if inst.status not in signatures.FAILING:
+        return ''
+    return signatures.failure_signature(inst.actual_result)
+
+
+def _offload_actual_results(instances, user_id=None):
+    """Move oversized actual_result texts to artifact storage, keeping a preview in the rows.
+
+    Call with instances whose actual_result was just written (signatures already computed
+    from the full text), before saving them. Returns unsaved InstanceArtifact rows for the
+    caller to bulk-create.
+    """
+    artifacts = []
+    now = timezone.now()
+    for inst in instances:
+        text, truncated = storage.preview(inst.actual_result)
+        inst.actual_result_truncated = truncated
+        if not truncated:
+            continue
+        sha, size, _key = storage.offload_text(inst.tenant_id, inst.run.project_id, inst.actual_result)
+        inst.actual_result = text
+        artifacts.append(InstanceArtifact(
+            instance=inst, project_id=inst.run.project_id, kind='actual_result',
+            name=f'actual_result_{inst.id}.txt', content_type='text/plain; charset=utf-8',
+            size=size, sha256=sha, status='uploaded', uploaded_at=now, created_by_user_id=user_id,
+        ))
+    return artifacts
+
+
+def _select_instances(request, data):
+    """Instances addressed by a bulk request, as (queryset, requested ids or None).
+
+    Either `instances`, a list of ids, or `filter`: {run, status?, section?} where status
+    may be a list. The queryset is tenant-scoped; evaluate it with `_bulk_rows`.
+    """
+    qs = TestInstance.objects.filter(tenant_id=getattr(request, 'tenant_id', None))
+    ids = data.get('instances')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({'instances': 'Must be a non-empty list of ids'})
+        try:
+            ids = {int(i) for i in ids}
+        except (TypeError, ValueError):
+            raise ValidationError({'instances': 'Must be a non-empty list of ids'})
+        return qs.filter(id__in=ids), ids
+    flt = data.get('filter')
+    if not isinstance(flt, dict) or not flt.get('run'):
+        raise ValidationError({'filter': 'Give instances (ids) or filter with at least run'})
+    try:
+        qs = qs.filter(run_id=int(flt['run']))
+        if flt.get('section'):
+            qs = qs.filter(testcase__section_id=int(flt['section']))
+    except (TypeError, ValueError):
+        raise ValidationError({'filter': 'run and section must be ids'})
+    statuses = flt.get('status')
+    if statuses:
+        statuses = statuses if isinstance(statuses, list) else [statuses]
+        valid = {key for key, _label in TestInstance.STATUS_CHOICES}
+        if not set(statuses) <= valid:
+            raise ValidationError({'filter': f'status must be one of {sorted(valid)}'})
+        qs = qs.filter(status__in=statuses)
+    return qs, None
+
+
+def _select_testcases(request, data):
+    """Test cases addressed by a bulk request, as (queryset, requested ids or None).
+
+    Either `testcases`, a list of ids, or `filter`: {project, status?, priority?,
+    section?, label?} where status/priority may be lists. The queryset is tenant-scoped.
+    """
+    qs = TestCase.objects.filter(project__tenant_id=getattr(request, 'tenant_id', None))
+    ids = data.get('testcases')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({'testcases': 'Must be a non-empty list of ids'})
+        try:
+            ids = {int(i) for i in ids}
+        except (TypeError, ValueError):
+            raise ValidationError({'testcases': 'Must be a non-empty list of ids'})
+        return qs.filter(id__in=ids), ids
+    flt = data.get('filter')
+    if not isinstance(flt, dict) or not flt.get('project'):
+        raise ValidationError({'filter': 'Give testcases (ids) or filter with at least project'})
+    try:
+        qs = qs.filter(project_id=int(flt['project']))
+        if flt.get('section'):
+            qs = qs.filter(section_id=int(flt['section']))
+        if flt.get('label'):
+            qs = qs.filter(labels__id=int(flt['label']))
+    except (TypeError, ValueError):
+        raise ValidationError({'filter': 'project, section and label must be ids'})
+    for field, choices in (('status', TestCase.STATUS_CHOICES), ('priority', TestCase.PRIORITY_CHOICES)):
+        values = flt.get(field)
+        if values:
+            values = values if isinstance(values, list) else [values]
+            valid = {key for key, _label in choices}
+            if not set(values) <= valid:
+                raise ValidationError({'filter': f'{field} must be one of {sorted(valid)}'})
+            qs = qs.filter(**{f'{field}__in': values})
+    return qs, None
+
+
+def _bulk_rows(qs, ids, limit=None, noun='instances'):
+    """Evaluate a bulk selection, rejecting unknown ids and selections over the limit.
+
+    The limit defaults to TEST_INSTANCE_BULK_MAX.
+    """
+    limit = limit or settings.TEST_INSTANCE_BULK_MAX
+    rows = list(qs.order_by('id')[:limit + 1])
+    if len(rows) > limit:
+        raise ValidationError({'detail': f'More than {limit} {noun} selected; narrow the filter'})
+    if ids is not None:
+        missing = sorted(ids - {row.id for row in rows})
+        if missing:
+            raise ValidationError({'detail': f'{noun.capitalize()} not found', 'missing': missing[:50]})
+    return rows
+
+
+def _require_project_roles(request, project_ids, allowed):
+    """A bulk selection may span projects: check the caller's role once per distinct project."""
+    tenant_id = getattr(request, 'tenant_id', None)
+    denied = sorted(p for p in set(project_ids) if not has_project_role(request, tenant_id, p, allowed))
+    if denied:
+        raise PermissionDenied(f'Insufficient role in projects {denied}')
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -51,9 +212,133 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return qs
     pagination_class = CreatedAtCursorPagination
 
+    @action(detail=False, methods=['get'])
+    def portfolio(self, request):
+        """All projects of the tenant in one call: cases, active runs, recent pass rate.
+
+        Query params: days (recent window, default PORTFOLIO_DAYS, max 90). Case counts
+        are cached per project until its cases change (core/portfolio.py).
+        """
+        try:
+            days = int(request.query_params.get('days', settings.PORTFOLIO_DAYS))
+        except (TypeError, ValueError):
+            return Response({'detail': 'days must be a number'}, status=400)
+        if not 1 <= days <= 90:
+            return Response({'detail': 'days must be between 1 and 90'}, status=400)
+        projects = list(self.filter_queryset(self.get_queryset()).values('id', 'key', 'name'))
+        return Response(portfolio.build_portfolio(projects, days))
+
+    @action(detail=True, methods=['get'], url_path='events', renderer_classes=[events.EventStreamRenderer, JSONRenderer])
+    def event_stream(self, request, pk=None):
+        """SSE stream of run state transitions (started/finished/canceled) in this project."""
+        project = self.get_object()
+        return _event_stream_response([events.project_channel(project.id)])
+
+    @action(detail=True, methods=['get'])
+    def traceability(self, request, pk=None):
+        """Requirements x linked cases x each case's latest result (traceability matrix).
+
+        Query params: release or plan to only count results of runs of that release's
+        plans / that plan. Built in one SQL statement and cached until new results or
+        case/requirement changes in the project (see core/traceability.py).
+        """
+        project = self.get_object()
+        release_id, plan_id = request.query_params.get('release'), request.query_params.get('plan')
+        try:
+            if release_id:
+                release_id = Release.objects.values_list('id', flat=True).get(id=int(release_id), project=project)
+            if plan_id:
+                plan_id = TestPlan.objects.values_list('id', flat=True).get(id=int(plan_id), project=project)
+        except (TypeError, ValueError, Release.DoesNotExist, TestPlan.DoesNotExist):
+            return Response({'detail': 'release/plan must be ids of this project'}, status=400)
+        matrix = traceability.cached_matrix(project.id, release_id, plan_id)
+        return Response({'project': project.id, 'release': release_id, 'plan': plan_id, **matrix})
+
+    @action(detail=True, methods=['get'])
+    def flaky(self, request, pk=None):
+        """Most flaky test cases of the project by pass/fail flip rate over the recent window.
+
+        Query params: min_score (default 0.1), limit (default 50, max 500).
+        """
+        project = self.get_object()
+        try:
+            min_score = float(request.query_params.get('min_score', 0.1))
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except (TypeError, ValueError):
+            return Response({'detail': 'min_score/limit must be numbers'}, status=400)
+        rows = (
+            TestCaseStats.objects.filter(project=project, flaky_score__gte=min_score)
+            .exclude(testcase__status='archived')
+            .order_by('-flaky_score', 'testcase_id')
+            .values('testcase_id', 'testcase__title', 'testcase__automation_ref',
+                    'flaky_score', 'flips', 'recent_outcomes')[:limit]
+        )
+        items = [{
+            'testcase': r['testcase_id'],
+            'title': r['testcase__title'],
+            'automation_ref': r['testcase__automation_ref'],
+            'flaky_score': r['flaky_score'],
+            'flips': r['flips'],
+            'window': len(r['recent_outcomes']),
+            'recent_outcomes': r['recent_outcomes'],
+        } for r in rows]
+        return Response({'project': project.id, 'min_score': min_score, 'results': items})
+
+    @action(detail=True, methods=['get'])
+    def trends(self, request, pk=None):
+        """Executions, outcomes and average duration per hour/day bucket.
+
+        Query params: granularity (day|hour, default day), from/to (ISO datetimes, default
+        the last 30 buckets), group_by (section|priority|assignee), section, priority,
+        assignee. Summed from ExecutionRollup rows, not from instances (core/rollups.py);
+        buckets without executions are omitted.
+        """
+        project = self.get_object()
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        if granularity not in rollups.GRANULARITIES:
+            return Response({'detail': f'granularity must be one of {sorted(rollups.GRANULARITIES)}'}, status=400)
+        group_fields = {'section': 'section_id', 'priority': 'priority', 'assignee': 'assignee_user_id'}
+        group_by = params.get('group_by')
+        if group_by and group_by not in group_fields:
+            return Response({'detail': f'group_by must be one of {sorted(group_fields)}'}, status=400)
+        step = rollups.GRANULARITIES[granularity]
+        parse = serializers.DateTimeField().to_internal_value
+        end = parse(params['to']) if params.get('to') else timezone.now()
+        start = rollups.bucket_start(parse(params['from']) if params.get('from') else end - 30 * step, granularity)
+        if end <= start or (end - start) / step > settings.TRENDS_MAX_BUCKETS:
+            return Response({'detail': f'from/to must span 1..{settings.TRENDS_MAX_BUCKETS} buckets'}, status=400)
+        qs = ExecutionRollup.objects.filter(project=project, granularity=granularity, bucket__gte=start, bucket__lt=end)
+        try:
+            if params.get('section'):
+                qs = qs.filter(section_id=int(params['section']))
+            if params.get('assignee'):
+                qs = qs.filter(assignee_user_id=int(params['assignee']))
+        except (TypeError, ValueError):
+            return Response({'detail': 'section/assignee must be ids'}, status=400)
+        if params.get('priority'):
+            qs = qs.filter(priority=params['priority'])
+        keys = ['bucket'] + ([group_fields[group_by]] if group_by else [])
+        rows = qs.values(*keys).annotate(**{f: Sum(f) for f in rollups.VALUE_FIELDS}).order_by(*keys)
+        items = []
+        for r in rows:
+            item = {'bucket': r['bucket']}
+            if group_by:
+                item[group_by] = r[group_fields[group_by]] or None
+            item.update({f: r[f] for f in ('executions', *rollups.OUTCOMES)})
+            item['pass_rate'] = round(r['passed'] / r['executions'], 4) if r['executions'] else None
+            item['avg_duration_seconds'] = (
+                round(r['duration_total'] / r['duration_count'], 2) if r['duration_count'] else None
+            )
+            items.append(item)
+        return Response({
+            'project': project.id, 'granularity': granularity, 'from': start, 'to': end,
+            'group_by': group_by, 'results': items,
+        })
+
 
 class TestSectionViewSet(viewsets.ModelViewSet):
-    queryset = TestSection.objects.select_related('project', 'parent').all().order_by('order', 'id')
+    queryset = TestSection.objects.select_related('project', 'parent').annotate(child_count=Count('children')).order_by('order', 'id')
     serializer_class = TestSectionSerializer
     permission_classes = [IsAuthenticated, IsTenantMember, TenantRBACPermission]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -120,6 +405,16 @@ class RequirementViewSet(viewsets.ModelViewSet):
             qs = qs.filter(project__tenant_id=tenant_id)
         return qs
 
+    def perform_create(self, serializer):
+        traceability.invalidate(serializer.save().project_id)
+
+    def perform_update(self, serializer):
+        traceability.invalidate(serializer.save().project_id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        traceability.invalidate(instance.project_id)
+
 
 class TestCaseViewSet(viewsets.ModelViewSet):
     queryset = TestCase.objects.select_related('project', 'section').prefetch_related('labels', 'requirements').all().order_by('id')
@@ -128,7 +423,7 @@ class TestCaseViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['project', 'status', 'section', 'priority', 'labels', 'requirements']
     search_fields = ['title', 'description']
-    ordering_fields = ['id', 'title', 'updated_at']
+    ordering_fields = ['id', 'title', 'updated_at', 'flaky_score']
     allowed_roles_write = ('owner', 'admin')
     # Member can create, but not delete
     allowed_roles_create = ('owner', 'admin', 'member')
@@ -137,6 +432,7 @@ class TestCaseViewSet(viewsets.ModelViewSet):
     allowed_roles_actions = {
         'archive': ('owner', 'admin'),
         'unarchive': ('owner', 'admin'),
+        'bulk_update': ('owner', 'admin'),
     }
 
     def get_queryset(self):
@@ -144,6 +440,14 @@ class TestCaseViewSet(viewsets.ModelViewSet):
         tenant_id = getattr(self.request, 'tenant_id', None)
         if tenant_id:
             qs = qs.filter(project__tenant_id=tenant_id)
+        # Flakiness comes from the per-case stats row (one LEFT JOIN); cases never run score 0
+        qs = qs.annotate(flaky_score=Coalesce(F('stats__flaky_score'), Value(0.0)))
+        flaky_min = self.request.query_params.get('flaky_min')
+        if flaky_min:
+            try:
+                qs = qs.filter(flaky_score__gte=float(flaky_min))
+            except ValueError:
+                raise ValidationError({'flaky_min': 'Must be a number'})
         return qs
     pagination_class = CreatedAtCursorPagination
 
@@ -152,6 +456,7 @@ class TestCaseViewSet(viewsets.ModelViewSet):
         obj = self.get_object()
         obj.status = 'archived'
         obj.save(update_fields=['status'])
+        portfolio.invalidate(obj.project_id)
         return Response(self.get_serializer(obj).data)
 
     @action(detail=True, methods=['post'])
@@ -159,22 +464,212 @@ class TestCaseViewSet(viewsets.ModelViewSet):
         obj = self.get_object()
         obj.status = 'active'
         obj.save(update_fields=['status'])
+        portfolio.invalidate(obj.project_id)
         return Response(self.get_serializer(obj).data)
 
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """Change many cases at once: {testcases | filter, status?, priority?, section?, labels?, tags?}.
+
+        `labels` is {add?: [tag ids], remove?: [tag ids]}, `tags` {add?: [..], remove?: [..]}.
+        Fields change with one UPDATE and labels with one bulk insert/delete; roles are
+        checked once per project (see `_select_testcases`). None of these fields are
+        part of the versioned content, so no version snapshots are taken.
+        """
+        data = request.data
+        changes = {}
+        for field, choices in (('status', TestCase.STATUS_CHOICES), ('priority', TestCase.PRIORITY_CHOICES)):
+            if data.get(field) is not None:
+                valid = {key for key, _label in choices}
+                if data[field] not in valid:
+                    return Response({'detail': f'{field} must be one of {sorted(valid)}'}, status=400)
+                changes[field] = data[field]
+        if 'section' in data:
+            try:
+                changes['section_id'] = int(data['section']) if data['section'] is not None else None
+            except (TypeError, ValueError):
+                return Response({'detail': 'section must be an id or null'}, status=400)
+        ops = {}
+        for name in ('labels', 'tags'):
+            spec = data.get(name) or {}
+            if not isinstance(spec, dict) or not all(isinstance(spec.get(k, []), list) for k in ('add', 'remove')):
+                return Response({'detail': f'{name} must be {{add?: [..], remove?: [..]}}'}, status=400)
+            ops[name] = (spec.get('add') or [], spec.get('remove') or [])
+        try:
+            label_add, label_remove = ({int(i) for i in ids} for ids in ops['labels'])
+        except (TypeError, ValueError):
+            return Response({'detail': 'labels must hold tag ids'}, status=400)
+        # Added tags follow the same rules as a single-case update; removals only need to match
+        try:
+            tag_add = TestCaseSerializer().fields['tags'].run_validation(ops['tags'][0])
+        except ValidationError as exc:
+            return Response({'tags': {'add': exc.detail}}, status=400)
+        tag_remove = ops['tags'][1]
+        if not all(isinstance(tag, str) for tag in tag_remove):
+            return Response({'tags': {'remove': 'must hold strings'}}, status=400)
+        if not (changes or label_add or label_remove or tag_add or tag_remove):
+            return Response({'detail': 'Nothing to change'}, status=400)
+
+        qs, ids = _select_testcases(request, data)
+        with transaction.atomic():
+            fields = ('id', 'project_id', 'tags') if tag_add or tag_remove else ('id', 'project_id')
+            rows = _bulk_rows(
+                qs.select_for_update(of=('self',)).only(*fields), ids, settings.TEST_CASE_BULK_MAX, 'test cases',
+            )
+            projects = {row.project_id for row in rows}
+            _require_project_roles(request, projects, self.allowed_roles_actions['bulk_update'])
+            if changes.get('section_id') or label_add or label_remove:
+                # Sections and labels belong to a project; they only fit cases of that project
+                if len(projects) > 1:
+                    return Response({'detail': 'section/labels need cases of a single project'}, status=400)
+                pid = next(iter(projects), None)
+                if changes.get('section_id') and not TestSection.objects.filter(id=changes['section_id'], project_id=pid).exists():
+                    return Response({'detail': 'section must belong to the cases\' project'}, status=400)
+                wanted = label_add | label_remove
+                if wanted and TestTag.objects.filter(id__in=wanted, project_id=pid).count() != len(wanted):
+                    return Response({'detail': 'labels must be tags of the cases\' project'}, status=400)
+            case_ids = [row.id for row in rows]
+            now = timezone.now()
+            TestCase.objects.filter(id__in=case_ids).update(updated_at=now, **changes)
+            through = TestCase.labels.through
+            if label_remove:
+                through.objects.filter(testcase_id__in=case_ids, testtag_id__in=label_remove).delete()
+            # Links a case already has are kept as they are
+            through.objects.bulk_create([
+                through(testcase_id=case_id, testtag_id=tag_id) for case_id in case_ids for tag_id in label_add
+            ], ignore_conflicts=True)
+            retagged = []
+            for row in rows if tag_add or tag_remove else ():
+                tags = row.tags if isinstance(row.tags, list) else []
+                new = [t for t in tags if t not in tag_remove]
+                new += [t for t in tag_add if t not in new]
+                if new != tags:
+                    row.tags = new
+                    retagged.append(row)
+            TestCase.objects.bulk_update(retagged, ['tags'], batch_size=1000)
+            if 'status' in changes:
+                traceability.invalidate(*projects)
+            portfolio.invalidate(*projects)
+        return Response({
+            'updated': len(rows),
+            'changes': {('section' if k == 'section_id' else k): v for k, v in changes.items()},
+            'labels': {'add': sorted(label_add), 'remove': sorted(label_remove)},
+            'tags_changed': len(retagged),
+        })
+
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        """Structured diff between two versions of this case, or a version and the case now.
+
+        Query params: from (version number), to (version number, default the current
+        case). Title, description lines and step-level insert/delete/modify; the
+        content part is cached by the two content hashes (core/diffing.py).
+        """
+        testcase = self.get_object()
+        try:
+            numbers = [int(request.query_params['from'])]
+            if request.query_params.get('to'):
+                numbers.append(int(request.query_params['to']))
+        except (KeyError, TypeError, ValueError):
+            return Response({'detail': 'from (and optional to) must be version numbers'}, status=400)
+        found = {
+            number: (title, sha, content_id)
+            for number, title, sha, content_id in TestCaseVersion.objects.filter(testcase=testcase, version__in=numbers)
+            .values_list('version', 'title', 'content__sha256', 'content_id')
+        }
+        missing = [number for number in numbers if number not in found]
+        if missing:
+            return Response({'detail': f'Unknown versions: {missing}'}, status=404)
+        side_a = found[numbers[0]]
+        if len(numbers) > 1:
+            side_b = found[numbers[1]]
+            current = None
+        else:
+            current = versions.case_content(testcase)
+            side_b = (testcase.title, versions.content_hash(*current), None)
+
+        def load():
+            ids = [side[2] for side in (side_a, side_b) if side[2]]
+            contents = {
+                cid: (description, steps)
+                for cid, description, steps in TestCaseVersionContent.objects.filter(id__in=ids)
+                .values_list('id', 'description', 'steps')
+            }
+            return contents[side_a[2]], (contents[side_b[2]] if current is None else current[:2])
+
+        return Response({
+            'testcase': testcase.id,
+            'from': numbers[0],
+            'to': numbers[1] if len(numbers) > 1 else None,
+            'title': {'changed': side_a[0] != side_b[0], 'from': side_a[0], 'to': side_b[0]},
+            **diffing.cached_diff_content(side_a[1], side_b[1], load),
+        })
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Finished results of this case across runs, newest first.
+
+        Keyset pages (`cursor`) over the (testcase, finished_at, id) index; only the
+        version number is joined, not its steps. With view=sparkline returns the last
+        `limit` (default 30, max 200) outcomes oldest first as one code string
+        (P/F/B/S) with their durations and a pass rate.
+        """
+        testcase = self.get_object()
+        qs = TestInstance.objects.filter(testcase_id=testcase.id, finished_at__isnull=False)
+        if request.query_params.get('view') == 'sparkline':
+            try:
+                limit = min(max(int(request.query_params.get('limit', 30)), 1), 200)
+            except (TypeError, ValueError):
+                return Response({'detail': 'limit must be a number'}, status=400)
+            rows = list(qs.order_by('-finished_at', '-id').values_list('status', 'duration_seconds')[:limit])[::-1]
+            passed = sum(1 for status, _seconds in rows if status == 'passed')
+            return Response({
+                'testcase': testcase.id,
+                'count': len(rows),
+                'outcomes': ''.join(stats.RESULT_CODES.get(status, '?') for status, _seconds in rows),
+                'durations': [seconds for _status, seconds in rows],
+                'pass_rate': round(passed / len(rows), 4) if rows else None,
+            })
+        rows = qs.values(
+            'id', 'run_id', 'run__name', 'testcase_version__version', 'status', 'duration_seconds',
+            'assignee_user_id', 'started_at', 'finished_at', 'failure_signature',
+        )
+        paginator = HistoryCursorPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response([{
+            'instance': r['id'],
+            'run': r['run_id'],
+            'run_name': r['run__name'],
+            'version': r['testcase_version__version'],
+            'status': r['status'],
+            'duration_seconds': r['duration_seconds'],
+            'assignee_user_id': r['assignee_user_id'],
+            'started_at': r['started_at'],
+            'finished_at': r['finished_at'],
+            'failure_signature': r['failure_signature'],
+        } for r in page])
+
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        traceability.invalidate(instance.project_id)
+        portfolio.invalidate(instance.project_id)
+
+    def perform_destroy(self, instance):
+        # Deleting a case cascades to its run instances; recount the runs that had one
+        with transaction.atomic():
+            run_ids = list(instance.instances.values_list('run_id', flat=True).distinct())
+            instance.delete()
+            counters.recount(run_ids)
+            traceability.invalidate(instance.project_id)
+            portfolio.invalidate(instance.project_id)
+
     def perform_update(self, serializer):
         instance = serializer.save()
+        traceability.invalidate(instance.project_id)
+        portfolio.invalidate(instance.project_id)
         with transaction.atomic():
-            instance.version = (instance.version or 1) + 1
-            instance.save(update_fields=['version'])
-            # Ensure we snapshot the new version
-            TestCaseVersion.objects.create(
-                testcase=instance,
-                version=instance.version,
-                title=instance.title,
-                description=instance.description,
-                steps=instance.steps,
-                expected=[],
-            )
+            # New version only when title/description/steps changed
+            versions.record_version(instance)
 
 
 class SuiteViewSet(viewsets.ModelViewSet):
@@ -241,10 +736,12 @@ class SuiteCaseViewSet(viewsets.ModelViewSet):
             # Insert at new position (1-based)
             items.insert(new_pos - 1, obj)
             # Reindex
+            changed = []
             for idx, it in enumerate(items, start=1):
                 if it.order != idx:
                     it.order = idx
-                    it.save(update_fields=['order'])
+                    changed.append(it)
+            SuiteCase.objects.bulk_update(changed, ['order'])
         obj.refresh_from_db()
         return Response(self.get_serializer(obj).data)
 
@@ -270,9 +767,19 @@ class ReleaseViewSet(viewsets.ModelViewSet):
             qs = qs.filter(project__tenant_id=tenant_id)
         return qs
 
+    @action(detail=True, methods=['get'])
+    def readiness(self, request, pk=None):
+        """Go/no-go rollup over all plans of the release and their runs.
+
+        Pass rate, remaining work, per-plan state and per-run trend come from the run
+        counters (no instance scan); reruns that cover a run's failures count over it.
+        Blocking defects are the links on open failures, cached per run (core/readiness.py).
+        """
+        return Response(readiness.cached_readiness(self.get_object()))
+
 
 class TestCaseVersionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = TestCaseVersion.objects.select_related('testcase').all().order_by('-created_at')
+    queryset = TestCaseVersion.objects.select_related('testcase', 'content').all().order_by('-created_at')
     serializer_class = TestCaseVersionSerializer
     permission_classes = [IsAuthenticated, IsTenantMember, TenantRBACPermission]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -327,14 +834,11 @@ class TestPlanViewSet(viewsets.ModelViewSet):
                 release=plan.release,
                 created_by_user_id=getattr(request.user, 'id', None),
             )
-            items = list(plan.items.select_related('testcase_version').order_by('order', 'id'))
-            for idx, it in enumerate(items, start=1):
-                PlanItem.objects.create(
-                    plan=new_plan,
-                    testcase=it.testcase,
-                    testcase_version=it.testcase_version,
-                    order=idx,
-                )
+            items = plan.items.order_by('order', 'id').values_list('testcase_id', 'testcase_version_id')
+            PlanItem.objects.bulk_create([
+                PlanItem(plan=new_plan, testcase_id=tc_id, testcase_version_id=ver_id, order=idx)
+                for idx, (tc_id, ver_id) in enumerate(items, start=1)
+            ])
         return Response(TestPlanSerializer(new_plan).data, status=201)
 
 
@@ -366,18 +870,7 @@ class PlanItemViewSet(viewsets.ModelViewSet):
         testcase_version = data.get('testcase_version')
         if not testcase_version:
             # Ensure snapshot for current version exists
-            ver = testcase.version
-            vobj = TestCaseVersion.objects.filter(testcase=testcase, version=ver).first()
-            if not vobj:
-                vobj = TestCaseVersion.objects.create(
-                    testcase=testcase,
-                    version=ver,
-                    title=testcase.title,
-                    description=testcase.description,
-                    steps=testcase.steps,
-                    expected=[],
-                )
-            testcase_version = vobj
+            testcase_version = versions.snapshot_version(testcase)
         # Assign order to end of list
         plan = data['plan']
         max_order = PlanItem.objects.filter(plan=plan).aggregate(m=Max('order'))['m'] or 0
@@ -398,10 +891,12 @@ class PlanItemViewSet(viewsets.ModelViewSet):
             if new_pos > len(items) + 1:
                 new_pos = len(items) + 1
             items.insert(new_pos - 1, obj)
+            changed = []
             for idx, it in enumerate(items, start=1):
                 if it.order != idx:
                     it.order = idx
-                    it.save(update_fields=['order'])
+                    changed.append(it)
+            PlanItem.objects.bulk_update(changed, ['order'])
         obj.refresh_from_db()
         return Response(self.get_serializer(obj).data)
 
@@ -424,6 +919,9 @@ class TestRunViewSet(viewsets.ModelViewSet):
         'finish': ('owner', 'admin'),
         'cancel': ('owner', 'admin'),
         'results': ('owner', 'admin', 'member'),
+        'next': ('owner', 'admin', 'member'),
+        'rerun': ('owner', 'admin', 'member'),
+        'auto_assign': ('owner', 'admin'),
     }
     pagination_class = CreatedAtCursorPagination
 
@@ -437,60 +935,26 @@ class TestRunViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by_user_id=getattr(self.request.user, 'id', None))
 
-    def _ensure_instances(self, run: TestRun):
-        if run.instances.exists():
-            return
-        items = []
-        if run.plan_id:
-            items = list(PlanItem.objects.filter(plan_id=run.plan_id).select_related('testcase', 'testcase_version').order_by('order', 'id'))
-        with transaction.atomic():
-            for idx, it in enumerate(items, start=1):
-                tc = it.testcase
-                vobj = it.testcase_version
-                if not vobj:
-                    ver = tc.version
-                    vobj = TestCaseVersion.objects.filter(testcase=tc, version=ver).first()
-                    if not vobj:
-                        vobj = TestCaseVersion.objects.create(
-                            testcase=tc,
-                            version=ver,
-                            title=tc.title,
-                            description=tc.description,
-                            steps=tc.steps,
-                            expected=[],
-                        )
-                TestInstance.objects.create(
-                    run=run,
-                    testcase=tc,
-                    testcase_version=vobj,
-                    order=idx,
-                    automation_ref=(tc.automation_ref or ''),
-                )
-
     @action(detail=True, methods=['post'])
     def schedule(self, request, pk=None):
         run = self.get_object()
+        if run.status != 'planned':
+            return Response({'detail': 'Only planned runs can be scheduled'}, status=400)
         when = request.data.get('scheduled_at')
-        if when:
-            try:
-                # Let DRF parse? fallback to now
-                run.scheduled_at = when
-            except Exception:
-                run.scheduled_at = timezone.now()
-        else:
-            run.scheduled_at = timezone.now()
+        # Started by launch_scheduled_runs_task (tms-beat) once due
+        run.scheduled_at = serializers.DateTimeField().to_internal_value(when) if when else timezone.now()
         run.save(update_fields=['scheduled_at'])
         return Response(self.get_serializer(run).data)
 
     @action(detail=True, methods=['post'])
     def start(self, request, pk=None):
         run = self.get_object()
-        if run.status not in ('planned', 'paused'):
-            return Response({'detail': 'Invalid status transition'}, status=400)
-        self._ensure_instances(run)
-        run.status = 'running'
-        run.started_at = timezone.now()
-        run.save(update_fields=['status', 'started_at'])
+        with transaction.atomic():
+            # Locked so the scheduled-run launcher cannot start it at the same time
+            run = TestRun.objects.select_for_update().select_related('project', 'plan').get(pk=run.pk)
+            if run.status not in ('planned', 'paused'):
+                return Response({'detail': 'Invalid status transition'}, status=400)
+            launcher.start_run(run)
         return Response(self.get_serializer(run).data)
 
     @action(detail=True, methods=['post'])
@@ -501,6 +965,9 @@ class TestRunViewSet(viewsets.ModelViewSet):
         run.status = 'completed'
         run.finished_at = timezone.now()
         run.save(update_fields=['status', 'finished_at'])
+        events.publish_run(run, 'run.finished')
+        # Fresh durations are available for the next shard plan
+        sharding.invalidate_duration_history(run.project_id)
         return Response(self.get_serializer(run).data)
 
     @action(detail=True, methods=['post'])
@@ -511,6 +978,7 @@ class TestRunViewSet(viewsets.ModelViewSet):
         run.status = 'canceled'
         run.finished_at = timezone.now()
         run.save(update_fields=['status', 'finished_at'])
+        events.publish_run(run, 'run.canceled')
         return Response(self.get_serializer(run).data)
 
     @action(detail=True, methods=['post'])
@@ -519,42 +987,411 @@ class TestRunViewSet(viewsets.ModelViewSet):
         results = request.data.get('results')
         if not isinstance(results, list):
             return Response({'detail': 'results must be a list'}, status=400)
-        updated = 0
-        for item in results:
-            if not isinstance(item, dict):
-                continue
-            aref = item.get('automation_ref')
-            if not aref:
-                continue
-            inst = run.instances.filter(automation_ref=aref).first()
-            if not inst:
-                continue
-            status_val = item.get('status')
-            if status_val in ('in_progress', 'blocked', 'passed', 'failed', 'skipped'):
-                inst.status = status_val
-            ar = item.get('actual_result')
-            if isinstance(ar, str):
-                inst.actual_result = ar
-            defects = item.get('defects')
-            if isinstance(defects, list):
-                inst.defects = defects
-            now = timezone.now()
-            if inst.status in ('passed', 'failed', 'skipped', 'blocked'):
-                if not inst.started_at:
-                    inst.started_at = now
-                inst.finished_at = now
-                inst.duration_seconds = int((inst.finished_at - inst.started_at).total_seconds())
-            inst.save()
-            updated += 1
+        refs = {item.get('automation_ref') for item in results if isinstance(item, dict) and item.get('automation_ref')}
+        with transaction.atomic():
+            by_ref = {}
+            for inst in run.instances.filter(automation_ref__in=refs).select_for_update().order_by('id'):
+                by_ref.setdefault(inst.automation_ref, inst)
+            before = {inst.pk: inst.status for inst in by_ref.values()}
+            updated = 0
+            changed = {}
+            newly_finished = {}
+            texts = {}
+            links = []
+            for item in results:
+                if not isinstance(item, dict):
+                    continue
+                aref = item.get('automation_ref')
+                if not aref:
+                    continue
+                inst = by_ref.get(aref)
+                if not inst:
+                    continue
+                was_finished = inst.finished_at is not None
+                status_val = item.get('status')
+                if status_val in ('in_progress', 'blocked', 'passed', 'failed', 'skipped'):
+                    inst.status = status_val
+                ar = item.get('actual_result')
+                if isinstance(ar, str):
+                    inst.actual_result = ar
+                    texts[inst.pk] = inst
+                inst.failure_signature = _signature_of(inst)
+                defects = item.get('defects')
+                if isinstance(defects, list):
+                    for value in defects:
+                        fields = parse_defect(value)
+                        if fields:
+                            links.append(DefectLink(instance=inst, project_id=run.project_id, **fields))
+                now = timezone.now()
+                if inst.status in ('passed', 'failed', 'skipped', 'blocked'):
+                    if not inst.started_at:
+                        inst.started_at = now
+                    inst.finished_at = now
+                    inst.duration_seconds = int((inst.finished_at - inst.started_at).total_seconds())
+                    # Runners know the real duration; prefer it over the ingestion timestamps
+                    reported = item.get('duration_seconds')
+                    if isinstance(reported, (int, float)) and reported >= 0:
+                        inst.duration_seconds = int(reported)
+                    inst.lease_expires_at = None
+                    if not was_finished:
+                        newly_finished[inst.pk] = inst
+                changed[inst.pk] = inst
+                updated += 1
+            artifacts = _offload_actual_results(texts.values(), getattr(request.user, 'id', None))
+            TestInstance.objects.bulk_update(changed.values(), [
+                'status', 'actual_result', 'actual_result_truncated', 'failure_signature', 'started_at',
+                'finished_at', 'duration_seconds', 'lease_expires_at',
+            ])
+            InstanceArtifact.objects.bulk_create(artifacts)
+            # Links are additive; ones already present are kept as they are
+            DefectLink.objects.bulk_create(links, ignore_conflicts=True)
+            counters.transitions((run.id, before[pk], inst.status) for pk, inst in changed.items())
+            stats.record_finished(newly_finished.values())
+            rollups.record(newly_finished.values())
+            traceability.invalidate(run.project_id)
+        events.publish_instances(run, changed.values())
         return Response({'updated': updated})
 
+    @action(detail=True, methods=['post'])
+    def next(self, request, pk=None):
+        """Claim the next not-started instance of the run for the caller (work queue).
+
+        Rows are locked with FOR UPDATE SKIP LOCKED so concurrent agents never get the
+        same instance. Only unassigned instances or ones already assigned to the caller
+        are eligible. The claim holds a lease; expired leases are put back by the
+        `reclaim_expired_leases_task` sweeper, which also drops the assignment when the
+        claim is what made it. Returns 204 when the queue is empty.
+        """
+        run = self.get_object()
+        if run.status != 'running':
+            return Response({'detail': 'Run is not running'}, status=400)
+        user_id = getattr(request.user, 'id', None)
+        try:
+            lease_seconds = int(request.data.get('lease_seconds') or settings.TEST_INSTANCE_LEASE_SECONDS)
+        except (TypeError, ValueError):
+            return Response({'detail': 'lease_seconds must be an integer'}, status=400)
+        if lease_seconds > settings.TEST_INSTANCE_LEASE_MAX_SECONDS:
+            # An unbounded lease would keep the instance away from the reclaim sweeper for good
+            return Response(
+                {'detail': f'lease_seconds must be at most {settings.TEST_INSTANCE_LEASE_MAX_SECONDS}'}, status=400,
+            )
+        qs = TestInstance.objects.filter(run=run, status='not_started').filter(
+            Q(assignee_user_id__isnull=True) | Q(assignee_user_id=user_id)
+        )
+        automated = request.data.get('automated')
+        if automated is not None:
+            if str(automated).lower() in ('1', 'true', 'yes'):
+                qs = qs.exclude(automation_ref='')
+            else:
+                qs = qs.filter(automation_ref='')
+        with transaction.atomic():
+            inst = qs.select_for_update(skip_locked=True).order_by('order', 'id').first()
+            if inst is None:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            now = timezone.now()
+            inst.status = 'in_progress'
+            inst.started_at = now
+            inst.claimed_by_user_id = user_id if inst.assignee_user_id is None else None
+            inst.assignee_user_id = inst.assignee_user_id or user_id
+            inst.lease_expires_at = now + timezone.timedelta(seconds=max(lease_seconds, 1))
+            inst.save(update_fields=['status', 'started_at', 'assignee_user_id', 'lease_expires_at', 'claimed_by_user_id'])
+            counters.moved(run.id, 'not_started', 'in_progress')
+            events.publish_instances(run, [inst])
+        return Response(TestInstanceSerializer(inst, context=self.get_serializer_context()).data)
+
+    @action(detail=True, methods=['post'])
+    def rerun(self, request, pk=None):
+        """Create a new run from the instances of this run with the given statuses.
+
+        Body: statuses (default failed/blocked/skipped), name, keep_assignee (default true),
+        start (default false). Instances are copied with their pinned version,
+        automation_ref and order in one bulk insert; the new run links back via parent_run.
+        """
+        run = self.get_object()
+        statuses = request.data.get('statuses') or ['failed', 'blocked', 'skipped']
+        valid = {key for key, _label in TestInstance.STATUS_CHOICES}
+        if not isinstance(statuses, list) or not set(statuses) <= valid:
+            return Response({'detail': f'statuses must be a list of {sorted(valid)}'}, status=400)
+        keep_assignee = str(request.data.get('keep_assignee', True)).lower() not in ('0', 'false', 'no')
+        start = str(request.data.get('start', False)).lower() in ('1', 'true', 'yes')
+        source = list(
+            run.instances.filter(status__in=statuses).order_by('order', 'id')
+            .values_list('testcase_id', 'testcase_version_id', 'automation_ref', 'assignee_user_id')
+        )
+        if not source:
+            return Response({'detail': 'No instances match the given statuses'}, status=400)
+        now = timezone.now()
+        with transaction.atomic():
+            new_run = TestRun.objects.create(
+                project_id=run.project_id,
+                plan_id=run.plan_id,
+                parent_run=run,
+                name=request.data.get('name') or f'{run.name} (rerun)',
+                is_automation=run.is_automation,
+                created_by_user_id=getattr(request.user, 'id', None),
+                status='running' if start else 'planned',
+                started_at=now if start else None,
+                total_count=len(source),
+                not_started_count=len(source),
+            )
+            TestInstance.objects.bulk_create([
+                TestInstance(
+                    run=new_run,
+                    tenant_id=run.project.tenant_id,
+                    testcase_id=tc_id,
+                    testcase_version_id=version_id,
+                    automation_ref=aref,
+                    assignee_user_id=assignee if keep_assignee else None,
+                    order=idx,
+                )
+                for idx, (tc_id, version_id, aref, assignee) in enumerate(source, start=1)
+            ])
+            if start:
+                events.publish_run(new_run, 'run.started')
+        return Response(self.get_serializer(new_run).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def failures(self, request, pk=None):
+        """Failed/blocked instances of the run grouped by failure signature, largest group first.
+
+        Query params: examples (instances shown per group, default 3, max 20), limit
+        (groups, default 50, max 500). Instances without actual_result are counted as
+        `unclassified`.
+        """
+        run = self.get_object()
+        try:
+            examples = min(max(int(request.query_params.get('examples', 3)), 1), 20)
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except (TypeError, ValueError):
+            return Response({'detail': 'examples/limit must be integers'}, status=400)
+        failing = run.instances.filter(status__in=signatures.FAILING)
+        counts = (
+            failing.values('failure_signature')
+            .annotate(count=Count('id'), failed=Count('id', filter=Q(status='failed')), first_id=Min('id'))
+            .order_by('-count', 'first_id')
+        )
+        unclassified = total = 0
+        groups = []
+        for row in counts:
+            total += row['count']
+            if not row['failure_signature']:
+                unclassified = row['count']
+            else:
+                groups.append(row)
+        total_groups = len(groups)
+        groups = groups[:limit]
+        samples = {}
+        if groups:
+            # One query for every group's examples: number instances within each signature
+            rows = (
+                failing.filter(failure_signature__in=[g['failure_signature'] for g in groups])
+                .annotate(rn=Window(RowNumber(), partition_by=F('failure_signature'), order_by=F('id').asc()))
+                .filter(rn__lte=examples)
+                .annotate(preview=Substr('actual_result', 1, 300))
+                .values('id', 'failure_signature', 'testcase_id', 'testcase__title', 'status', 'automation_ref', 'preview')
+                .order_by('failure_signature', 'id')
+            )
+            for r in rows:
+                samples.setdefault(r['failure_signature'], []).append({
+                    'instance': r['id'], 'testcase': r['testcase_id'], 'title': r['testcase__title'],
+                    'status': r['status'], 'automation_ref': r['automation_ref'],
+                    'actual_result_preview': r['preview'],
+                })
+        return Response({
+            'run': run.id,
+            'total_failures': total,
+            'groups_total': total_groups,
+            'unclassified': unclassified,
+            'groups': [{
+                'signature': g['failure_signature'],
+                'count': g['count'],
+                'failed': g['failed'],
+                'blocked': g['count'] - g['failed'],
+                'examples': samples.get(g['failure_signature'], []),
+            } for g in groups],
+        })
+
+    @action(detail=True, methods=['get'])
+    def compare(self, request, pk=None):
+        """Diff this run against `base` (default: latest completed run of the same plan).
+
+        Returns newly failing / newly passing / still failing / added / removed cases and
+        duration regressions (at least `regression_ratio` slower and `regression_min_seconds`
+        longer than the base), computed in a single SQL statement.
+        """
+        run = self.get_object()
+        base_id = request.query_params.get('base')
+        if base_id:
+            try:
+                base_id = int(base_id)
+            except (TypeError, ValueError):
+                return Response({'detail': 'base must be a run id'}, status=400)
+            base = self.get_queryset().filter(id=base_id).first()
+            if base is None:
+                return Response({'detail': 'Base run not found'}, status=404)
+        else:
+            if not run.plan_id:
+                return Response({'detail': 'base is required for runs without a plan'}, status=400)
+            base = (
+                TestRun.objects.filter(plan_id=run.plan_id, status='completed').exclude(id=run.id)
+                .order_by('-finished_at', '-id').first()
+            )
+            if base is None:
+                return Response({'detail': 'No completed run of this plan to compare with'}, status=404)
+        try:
+            ratio = float(request.query_params.get('regression_ratio', 0.5))
+            min_delta = int(request.query_params.get('regression_min_seconds', 5))
+        except (TypeError, ValueError):
+            return Response({'detail': 'regression_ratio/regression_min_seconds must be numbers'}, status=400)
+        result = comparison.cached_compare(run, base, ratio, min_delta)
+        return Response({'run': run.id, 'base': base.id, **result})
+
+    @action(detail=True, methods=['get'])
+    def eta(self, request, pk=None):
+        """Predicted remaining time of the run from per-case duration statistics.
+
+        Not-started work is summed in one aggregate (mean, and p90 as the pessimistic
+        bound); in-progress instances contribute their mean minus the time already spent.
+        Cases without history use the project average p50. The sum is divided by the number
+        of people/agents currently executing (at least 1).
+        """
+        run = self.get_object()
+        now = timezone.now()
+        fallback = TestCaseStats.objects.filter(project_id=run.project_id, count__gt=0).aggregate(
+            m=Coalesce(Avg('p50_seconds'), float(settings.SHARD_DEFAULT_DURATION_SECONDS))
+        )['m']
+        pending = run.instances.filter(status='not_started').aggregate(
+            n=Count('id'),
+            unseen=Count('id', filter=Q(testcase__stats__isnull=True)),
+            mean=Coalesce(Sum(Coalesce(F('testcase__stats__mean_seconds'), fallback)), 0.0),
+            p90=Coalesce(Sum(Coalesce(F('testcase__stats__p90_seconds'), F('testcase__stats__mean_seconds'), fallback)), 0.0),
+        )
+        active = list(run.instances.filter(status='in_progress').values_list(
+            'started_at', 'assignee_user_id', 'testcase__stats__mean_seconds', 'testcase__stats__p90_seconds',
+        ))
+        remaining_mean, remaining_p90 = pending['mean'], pending['p90']
+        for started_at, _assignee, mean_s, p90_s in active:
+            spent = (now - started_at).total_seconds() if started_at else 0
+            remaining_mean += max((mean_s or fallback) - spent, 0)
+            remaining_p90 += max((p90_s or mean_s or fallback) - spent, 0)
+        parallelism = max(len({assignee for _s, assignee, _m, _p in active if assignee is not None}), 1)
+        eta_seconds = remaining_mean / parallelism
+        return Response({
+            'run': run.id,
+            'status': run.status,
+            'remaining_instances': pending['n'] + len(active),
+            'unseen_cases': pending['unseen'],
+            'parallelism': parallelism,
+            'remaining_seconds': round(eta_seconds, 1),
+            'remaining_seconds_p90': round(remaining_p90 / parallelism, 1),
+            'predicted_finish_at': (now + timezone.timedelta(seconds=eta_seconds)) if run.status == 'running' else None,
+        })
+
+    @action(detail=True, methods=['get'])
+    def shards(self, request, pk=None):
+        """Split the run's automated instances into `workers` duration-balanced buckets.
+
+        Query params: workers (required), status (optional instance status filter,
+        e.g. not_started to plan only the remaining work).
+        """
+        run = self.get_object()
+        try:
+            workers = int(request.query_params.get('workers'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'workers must be an integer'}, status=400)
+        if workers < 1 or workers > 1000:
+            return Response({'detail': 'workers must be between 1 and 1000'}, status=400)
+        qs = run.instances.exclude(automation_ref='')
+        status_val = request.query_params.get('status')
+        if status_val:
+            qs = qs.filter(status=status_val)
+        refs = sorted(set(qs.values_list('automation_ref', flat=True)))
+        history = sharding.project_duration_history(run.project_id)
+        fallback = sharding.fallback_duration(history)
+        shards, makespan = sharding.plan_shards(refs, history, workers, fallback)
+        return Response({
+            'run': run.id,
+            'workers': workers,
+            'tests': len(refs),
+            'unseen': sum(1 for ref in refs if ref not in history),
+            'fallback_seconds': round(fallback, 1),
+            'makespan_seconds': makespan,
+            'shards': shards,
+        })
+
+    @action(detail=True, methods=['post'])
+    def auto_assign(self, request, pk=None):
+        """Distribute the run's unassigned not-started instances over `user_ids` by predicted effort.
+
+        Body: user_ids (required), section_affinity (default true), dry_run (default false).
+        Effort is the case's mean duration, or its step count when it was never run; work
+        the users already hold in this run counts toward their load. All assignments are
+        written with one UPDATE that skips instances claimed meanwhile.
+        """
+        run = self.get_object()
+        user_ids = request.data.get('user_ids')
+        try:
+            user_ids = list(dict.fromkeys(int(uid) for uid in user_ids))
+        except (TypeError, ValueError):
+            return Response({'detail': 'user_ids must be a non-empty list of ids'}, status=400)
+        if not user_ids or len(user_ids) > 1000:
+            return Response({'detail': 'user_ids must hold between 1 and 1000 ids'}, status=400)
+        affinity = str(request.data.get('section_affinity', True)).lower() not in ('0', 'false', 'no')
+        dry_run = str(request.data.get('dry_run', False)).lower() in ('1', 'true', 'yes')
+        rows = run.instances.filter(status__in=('not_started', 'in_progress')).order_by('order', 'id').values_list(
+            'id', 'status', 'assignee_user_id', 'testcase__section_id', 'testcase__stats__mean_seconds',
+            Coalesce('testcase_version__content__steps', 'testcase__steps'),
+        )
+        items, loads = [], {}
+        for inst_id, status_val, assignee, section_id, mean_s, steps in rows:
+            seconds = assignment.effort_of(mean_s, steps)
+            if assignee is None and status_val == 'not_started':
+                items.append((inst_id, section_id, seconds))
+            elif assignee is not None:
+                loads[assignee] = loads.get(assignee, 0.0) + seconds
+        plan, loads = assignment.plan_assignment(items, user_ids, loads, affinity)
+        sections = {inst_id: section_id for inst_id, section_id, _s in items}
+        assigned = 0
+        if not dry_run and items:
+            with transaction.atomic():
+                assigned = TestInstance.objects.filter(
+                    id__in=[inst_id for inst_id, _sec, _s in items], assignee_user_id__isnull=True,
+                ).update(assignee_user_id=Case(
+                    *[When(id__in=ids, then=Value(uid)) for uid, ids in plan.items() if ids],
+                ))
+                for uid, ids in plan.items():
+                    if ids:
+                        events.publish_bulk(run.id, 'instances.assigned', ids, {'assignee_user_id': uid})
+        return Response({
+            'run': run.id,
+            'dry_run': dry_run,
+            'instances': len(items),
+            'assigned': assigned,
+            'makespan_seconds': round(max(loads.values()), 1),
+            'users': [{
+                'user_id': uid,
+                'instances': len(plan[uid]),
+                'predicted_seconds': round(loads[uid], 1),
+                'sections': sorted({sections[i] for i in plan[uid]} - {None}),
+            } for uid in user_ids],
+        })
+
+    @action(detail=True, methods=['get'], url_path='events', renderer_classes=[events.EventStreamRenderer, JSONRenderer])
+    def event_stream(self, request, pk=None):
+        """SSE stream of instance changes and state transitions of this run."""
+        run = self.get_object()
+        return _event_stream_response([events.run_channel(run.id)])
+
 
 class TestInstanceViewSet(viewsets.ModelViewSet):
-    queryset = TestInstance.objects.select_related('run', 'testcase', 'testcase_version').all().order_by('id')
+    queryset = (
+        TestInstance.objects.select_related('run', 'testcase', 'testcase_version')
+        .prefetch_related('defect_links').all().order_by('id')
+    )
     serializer_class = TestInstanceSerializer
     permission_classes = [IsAuthenticated, IsTenantMember, TenantRBACPermission]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['run', 'status', 'assignee_user_id', 'testcase']
+    filterset_fields = ['run', 'status', 'assignee_user_id', 'testcase', 'failure_signature']
     ordering_fields = ['order', 'id', 'started_at']
     allowed_roles_write = ('owner', 'admin')
     allowed_roles_create = ('owner', 'admin', 'member')
@@ -569,15 +1406,49 @@ class TestInstanceViewSet(viewsets.ModelViewSet):
         'block': ('owner', 'admin', 'member'),
         'skip': ('owner', 'admin', 'member'),
         'link_defect': ('owner', 'admin', 'member'),
+        'artifacts': ('owner', 'admin', 'member'),
+        'bulk_assign': ('owner', 'admin', 'member'),
+        'bulk_status': ('owner', 'admin', 'member'),
     }
 
     def get_queryset(self):
         qs = super().get_queryset()
         tenant_id = getattr(self.request, 'tenant_id', None)
         if tenant_id:
-            qs = qs.filter(run__project__tenant_id=tenant_id)
+            qs = qs.filter(tenant_id=tenant_id)
         return qs
 
+    @staticmethod
+    def _locked_status(inst):
+        """Stored status under a row lock, so concurrent transitions are counted once."""
+        return TestInstance.objects.select_for_update().values_list('status', flat=True).get(pk=inst.pk)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            inst = serializer.save(tenant_id=serializer.validated_data['run'].project.tenant_id)
+            counters.apply(inst.run_id, {inst.status: 1})
+
+    def perform_destroy(self, inst):
+        with transaction.atomic():
+            old = self._locked_status(inst)
+            inst.delete()
+            counters.apply(inst.run_id, {old: -1})
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old = self._locked_status(serializer.instance)
+            inst = serializer.save()
+            inst.failure_signature = _signature_of(inst)
+            update_fields = ['failure_signature']
+            if 'actual_result' in serializer.validated_data:
+                artifacts = _offload_actual_results([inst], getattr(self.request.user, 'id', None))
+                InstanceArtifact.objects.bulk_create(artifacts)
+                update_fields += ['actual_result', 'actual_result_truncated']
+            inst.save(update_fields=update_fields)
+            counters.moved(inst.run_id, old, inst.status)
+            traceability.invalidate(inst.run.project_id)
+        events.publish_instances(inst.run, [inst])
+
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
         inst = self.get_object()
@@ -588,32 +1459,142 @@ class TestInstanceViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'assignee_user_id required'}, status=400)
         inst.assignee_user_id = uid
         inst.save(update_fields=['assignee_user_id'])
+        events.publish_instances(inst.run, [inst], 'instance.assigned')
         return Response(self.get_serializer(inst).data)
 
+    @action(detail=False, methods=['get'])
+    def my_work(self, request):
+        """Instances assigned to a user in the tenant's active runs, grouped by run.
+
+        Query params: user_id (default: the caller), status (comma list, default the open
+        ones: not_started, in_progress, blocked), limit (instances per run, default 50,
+        max 500). Each run carries the user's counts per status, finished included, so
+        progress shows without a second request. Both queries go through the
+        (tenant_id, assignee_user_id, status) index instead of joining projects.
+        """
+        try:
+            user_id = int(request.query_params.get('user_id') or request.user.id)
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except (TypeError, ValueError):
+            return Response({'detail': 'user_id/limit must be integers'}, status=400)
+        statuses = [s for s in request.query_params.get('status', '').split(',') if s] or [
+            'not_started', 'in_progress', 'blocked',
+        ]
+        valid = {key for key, _label in TestInstance.STATUS_CHOICES}
+        if not set(statuses) <= valid:
+            return Response({'detail': f'status must be a comma list of {sorted(valid)}'}, status=400)
+        mine = TestInstance.objects.filter(
+            tenant_id=getattr(request, 'tenant_id', None), assignee_user_id=user_id,
+            run__status__in=('planned', 'running', 'paused'),
+        )
+        runs = {}
+        for row in (
+            mine.values('run_id', 'run__name', 'run__status', 'run__project_id', 'status')
+            .annotate(n=Count('id')).order_by('-run_id')
+        ):
+            entry = runs.setdefault(row['run_id'], {
+                'run': row['run_id'], 'name': row['run__name'], 'status': row['run__status'],
+                'project': row['run__project_id'], 'counts': {}, 'total': 0, 'open': 0, 'instances': [],
+            })
+            entry['counts'][row['status']] = row['n']
+            entry['total'] += row['n']
+            if row['status'] in statuses:
+                entry['open'] += row['n']
+        rows = (
+            mine.filter(status__in=statuses)
+            .annotate(rn=Window(RowNumber(), partition_by=F('run_id'), order_by=(F('order').asc(), F('id').asc())))
+            .filter(rn__lte=limit)
+            .values('id', 'run_id', 'testcase_id', 'testcase__title', 'status', 'started_at', 'automation_ref')
+            .order_by('-run_id', 'rn')
+        )
+        for r in rows:
+            runs[r['run_id']]['instances'].append({
+                'id': r['id'], 'testcase': r['testcase_id'], 'title': r['testcase__title'], 'status': r['status'],
+                'started_at': r['started_at'], 'automation_ref': r['automation_ref'],
+            })
+        return Response({
+            'user_id': user_id,
+            'statuses': statuses,
+            'open': sum(entry['open'] for entry in runs.values()),
+            'runs': [entry for entry in runs.values() if entry['open']],
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_assign(self, request):
+        """Assign many instances with one UPDATE: {assignee_user_id (id, "me" or null), instances | filter}.
+
+        See `_select_instances` for the selection; roles are checked once per project.
+        """
+        uid = request.data.get('assignee_user_id', '')
+        if uid == 'me':
+            uid = getattr(request.user, 'id', None)
+        elif uid is not None:
+            try:
+                uid = int(uid)
+            except (TypeError, ValueError):
+                return Response({'detail': 'assignee_user_id must be an id, "me" or null'}, status=400)
+        qs, ids = _select_instances(request, request.data)
+        rows = _bulk_rows(qs.select_related('run').only('id', 'run_id', 'run__project_id'), ids)
+        _require_project_roles(request, {row.run.project_id for row in rows}, self.allowed_roles_actions['bulk_assign'])
+        by_run = defaultdict(list)
+        for row in rows:
+            by_run[row.run_id].append(row.id)
+        TestInstance.objects.filter(id__in=[row.id for row in rows]).update(assignee_user_id=uid)
+        for run_id, run_ids in by_run.items():
+            events.publish_bulk(run_id, 'instances.assigned', run_ids, {'assignee_user_id': uid})
+        return Response({'updated': len(rows), 'assignee_user_id': uid})
+
     @action(detail=True, methods=['post'])
     def unassign(self, request, pk=None):
         inst = self.get_object()
         inst.assignee_user_id = None
         inst.save(update_fields=['assignee_user_id'])
+        events.publish_instances(inst.run, [inst], 'instance.assigned')
         return Response(self.get_serializer(inst).data)
 
     @action(detail=True, methods=['post'])
     def start(self, request, pk=None):
         inst = self.get_object()
         now = timezone.now()
-        inst.status = 'in_progress'
-        inst.started_at = inst.started_at or now
-        inst.save(update_fields=['status', 'started_at'])
+        with transaction.atomic():
+            old = self._locked_status(inst)
+            inst.status = 'in_progress'
+            inst.started_at = inst.started_at or now
+            inst.save(update_fields=['status', 'started_at'])
+            counters.moved(inst.run_id, old, inst.status)
+        events.publish_instances(inst.run, [inst])
         return Response(self.get_serializer(inst).data)
 
-    def _finish(self, inst: TestInstance, status_val: str):
+    def _finish(self, inst: TestInstance, status_val: str, actual_result=None):
         now = timezone.now()
         inst.status = status_val
         if not inst.started_at:
             inst.started_at = now
         inst.finished_at = now
         inst.duration_seconds = int((inst.finished_at - inst.started_at).total_seconds())
-        inst.save(update_fields=['status', 'finished_at', 'started_at', 'duration_seconds'])
+        inst.lease_expires_at = None
+        update_fields = ['status', 'finished_at', 'started_at', 'duration_seconds', 'lease_expires_at', 'failure_signature']
+        artifacts = []
+        if actual_result is not None:
+            inst.actual_result = actual_result
+            update_fields += ['actual_result', 'actual_result_truncated']
+        # Signature is taken from the full text, before it is cut down to a preview
+        inst.failure_signature = _signature_of(inst)
+        if actual_result is not None:
+            artifacts = _offload_actual_results([inst], getattr(self.request.user, 'id', None))
+        with transaction.atomic():
+            # Read under the row lock: of two concurrent finishes only the first counts as an execution
+            old, finished_at = (
+                TestInstance.objects.select_for_update().values_list('status', 'finished_at').get(pk=inst.pk)
+            )
+            inst.save(update_fields=update_fields)
+            InstanceArtifact.objects.bulk_create(artifacts)
+            counters.moved(inst.run_id, old, status_val)
+            if finished_at is None:
+                stats.record_finished([inst])
+                rollups.record([inst])
+            traceability.invalidate(inst.run.project_id)
+        events.publish_instances(inst.run, [inst])
 
     @action(detail=True, methods=['post'])
     def pass_case(self, request, pk=None):
@@ -625,10 +1606,7 @@ class TestInstanceViewSet(viewsets.ModelViewSet):
     def fail_case(self, request, pk=None):
         inst = self.get_object()
         ar = request.data.get('actual_result')
-        if isinstance(ar, str):
-            inst.actual_result = ar
-            inst.save(update_fields=['actual_result'])
-        self._finish(inst, 'failed')
+        self._finish(inst, 'failed', ar if isinstance(ar, str) else None)
         return Response(self.get_serializer(inst).data)
 
     @action(detail=True, methods=['post'])
@@ -637,6 +1615,296 @@ class TestInstanceViewSet(viewsets.ModelViewSet):
         self._finish(inst, 'blocked')
         return Response(self.get_serializer(inst).data)
 
+    @action(detail=True, methods=['post'])
+    def skip(self, request, pk=None):
+        inst = self.get_object()
+        self._finish(inst, 'skipped')
+        return Response(self.get_serializer(inst).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """Set one status on many instances: {status, actual_result?, instances | filter}.
+
+        The selected rows are locked and changed with one UPDATE; run counters and case
+        statistics follow in the same transaction. Bulk transitions are not timed:
+        finished rows get finished_at=now and no duration. Without actual_result,
+        failed/blocked rows keep their text and get its signature.
+        """
+        status_val = request.data.get('status')
+        valid = {key for key, _label in TestInstance.STATUS_CHOICES}
+        if status_val not in valid:
+            return Response({'detail': f'status must be one of {sorted(valid)}'}, status=400)
+        ar = request.data.get('actual_result')
+        if ar is not None and not isinstance(ar, str):
+            return Response({'detail': 'actual_result must be a string'}, status=400)
+        qs, ids = _select_instances(request, request.data)
+        now = timezone.now()
+        changes = {'status': status_val, 'duration_seconds': None}
+        if status_val == 'not_started':
+            changes.update(started_at=None, finished_at=None, lease_expires_at=None)
+        elif status_val == 'in_progress':
+            changes.update(started_at=Coalesce('started_at', Value(now)), finished_at=None)
+        else:
+            changes.update(started_at=Coalesce('started_at', Value(now)), finished_at=now, lease_expires_at=None)
+        truncated = False
+        if ar is not None:
+            text, truncated = storage.preview(ar)
+            changes.update(actual_result=text, actual_result_truncated=truncated)
+        with transaction.atomic():
+            rows = _bulk_rows(
+                qs.select_for_update(of=('self',)).select_related('run')
+                .only('id', 'run_id', 'run__project_id', 'testcase_id', 'assignee_user_id', 'status', 'finished_at',
+                      'actual_result'),
+                ids,
+            )
+            _require_project_roles(request, {row.run.project_id for row in rows}, self.allowed_roles_actions['bulk_status'])
+            # Signatures are computed once per distinct text, not per row
+            if status_val not in signatures.FAILING:
+                changes['failure_signature'] = ''
+            elif ar is not None:
+                changes['failure_signature'] = signatures.failure_signature(ar)
+            else:
+                by_sig = defaultdict(list)
+                for row in rows:
+                    by_sig[signatures.failure_signature(row.actual_result)].append(row.id)
+                changes['failure_signature'] = Case(
+                    *[When(id__in=sig_ids, then=Value(sig)) for sig, sig_ids in by_sig.items()], default=Value(''),
+                )
+            TestInstance.objects.filter(id__in=[row.id for row in rows]).update(**changes)
+            if truncated:
+                # The full text is stored once per project of the selection
+                tenant_id = getattr(request, 'tenant_id', None)
+                offloaded = {
+                    pid: storage.offload_text(tenant_id, pid, ar) for pid in {row.run.project_id for row in rows}
+                }
+                InstanceArtifact.objects.bulk_create([InstanceArtifact(
+                    instance_id=row.id, project_id=row.run.project_id, kind='actual_result',
+                    name=f'actual_result_{row.id}.txt', content_type='text/plain; charset=utf-8',
+                    size=offloaded[row.run.project_id][1], sha256=offloaded[row.run.project_id][0], status='uploaded',
+                    uploaded_at=now, created_by_user_id=getattr(request.user, 'id', None),
+                ) for row in rows])
+            counters.transitions((row.run_id, row.status, status_val) for row in rows)
+            newly_finished = []
+            by_run = defaultdict(list)
+            for row in rows:
+                if status_val not in ('not_started', 'in_progress') and row.finished_at is None:
+                    newly_finished.append(row)
+                row.status, row.duration_seconds = status_val, None
+                by_run[row.run_id].append(row.id)
+            stats.record_finished(newly_finished)
+            rollups.record(newly_finished)
+            traceability.invalidate(*{row.run.project_id for row in rows})
+            for run_id, run_ids in by_run.items():
+                events.publish_bulk(run_id, 'instances.updated', run_ids, {'status': status_val})
+        return Response({'updated': len(rows), 'status': status_val})
+
+    @action(detail=True, methods=['post'])
+    def link_defect(self, request, pk=None):
+        """Link an external defect: {key?, url?, title?, tracker?}; `bug_url` and `defect` are accepted for old clients."""
+        inst = self.get_object()
+        data = request.data
+        value = data.get('defect') or {'key': data.get('key'), 'url': data.get('url') or data.get('bug_url')}
+        fields = parse_defect(value, data.get('title', ''), data.get('tracker', ''))
+        if not fields:
+            return Response({'detail': 'key or url required'}, status=400)
+        DefectLink.objects.bulk_create([DefectLink(
+            instance=inst, project_id=inst.run.project_id, created_by_user_id=getattr(request.user, 'id', None), **fields,
+        )], ignore_conflicts=True)
+        inst = self.get_queryset().get(pk=inst.pk)
+        return Response(self.get_serializer(inst).data)
+
+    @action(detail=True, methods=['get', 'post'])
+    def artifacts(self, request, pk=None):
+        """List the instance's artifacts, or register a new one for direct upload.
+
+        POST {name, size, sha256, content_type?, kind?} returns the artifact and an `upload`
+        spec (presigned PUT) for the client to send the bytes straight to storage, then
+        confirm with POST /artifacts/{id}/complete/. Content already stored in the same
+        project is deduplicated: the artifact is uploaded at once and `upload` is null.
+        Other projects' copies are never reused, so a digest alone gives no access.
+        """
+        inst = self.get_object()
+        if request.method == 'GET':
+            qs = inst.artifacts.order_by('id')
+            return Response(InstanceArtifactSerializer(qs, many=True).data)
+        serializer = InstanceArtifactSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sha = serializer.validated_data['sha256']
+        tenant_id, project_id = inst.run.project.tenant_id, inst.run.project_id
+        stored = InstanceArtifact.objects.filter(
+            sha256=sha, size=serializer.validated_data['size'], status='uploaded', project_id=project_id,
+        ).exists()
+        artifact = serializer.save(
+            instance=inst, project_id=project_id, created_by_user_id=getattr(request.user, 'id', None),
+            status='uploaded' if stored else 'pending', uploaded_at=timezone.now() if stored else None,
+        )
+        upload = None
+        if not stored:
+            upload = storage.get_storage().upload_url(
+                storage.content_key(tenant_id, project_id, sha), sha, artifact.content_type, artifact.size,
+            )
+        return Response({**serializer.data, 'upload': upload}, status=status.HTTP_201_CREATED)
+
+
+class DefectLinkViewSet(mixins.CreateModelMixin,
+                        mixins.ListModelMixin,
+                        mixins.RetrieveModelMixin,
+                        mixins.DestroyModelMixin,
+                        viewsets.GenericViewSet):
+    queryset = DefectLink.objects.select_related('project').all().order_by('-created_at')
+    serializer_class = DefectLinkSerializer
+    permission_classes = [IsAuthenticated, IsTenantMember, TenantRBACPermission]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['project', 'instance', 'instance__run', 'key', 'tracker']
+    ordering_fields = ['created_at', 'key']
+    allowed_roles_write = ('owner', 'admin')
+    allowed_roles_create = ('owner', 'admin', 'member')
+    allowed_roles_delete = ('owner', 'admin', 'member')
+    allowed_roles_actions = {
+        'bulk': ('owner', 'admin', 'member'),
+    }
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        tenant_id = getattr(self.request, 'tenant_id', None)
+        if tenant_id:
+            qs = qs.filter(project__tenant_id=tenant_id)
+        return qs
+
+    def perform_create(self, serializer):
+        inst = serializer.validated_data['instance']
+        serializer.save(project_id=inst.run.project_id, created_by_user_id=getattr(self.request.user, 'id', None))
+
+    @action(detail=False, methods=['get'])
+    def affected(self, request):
+        """Instances and runs affected by one defect: ?key=BUG-123 (or ?url=...), optional project, limit."""
+        key = request.query_params.get('key')
+        if not key and request.query_params.get('url'):
+            fields = parse_defect(request.query_params['url'])
+            key = fields['key'] if fields else None
+        if not key:
+            return Response({'detail': 'key or url required'}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 500)), 1), 5000)
+        except (TypeError, ValueError):
+            return Response({'detail': 'limit must be an integer'}, status=400)
+        links = self.get_queryset().filter(key=key)
+        project = request.query_params.get('project')
+        if project:
+            try:
+                links = links.filter(project_id=int(project))
+            except (TypeError, ValueError):
+                return Response({'detail': 'project must be an id'}, status=400)
+        runs = (
+            links.values('instance__run_id', 'instance__run__name', 'instance__run__status', 'project_id')
+            .annotate(instances=Count('instance_id'), failing=Count('instance_id', filter=Q(instance__status__in=signatures.FAILING)))
+            .order_by('-instance__run_id')
+        )
+        instances = (
+            links.values('instance_id', 'instance__run_id', 'instance__testcase_id', 'instance__testcase__title',
+                         'instance__status', 'instance__assignee_user_id')
+            .order_by('-instance__run_id', 'instance_id')[:limit]
+        )
+        return Response({
+            'key': key,
+            'runs': [{
+                'run': r['instance__run_id'], 'name': r['instance__run__name'], 'status': r['instance__run__status'],
+                'project': r['project_id'], 'instances': r['instances'], 'failing': r['failing'],
+            } for r in runs],
+            'instances': [{
+                'instance': i['instance_id'], 'run': i['instance__run_id'], 'testcase': i['instance__testcase_id'],
+                'title': i['instance__testcase__title'], 'status': i['instance__status'],
+                'assignee_user_id': i['instance__assignee_user_id'],
+            } for i in instances],
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Link one defect to many instances: {key?, url?, title?, tracker?, instances: [ids] | filter}.
+
+        `filter` selects instances as in the instance bulk actions ({run, status?, section?}).
+        """
+        fields = parse_defect({'key': request.data.get('key'), 'url': request.data.get('url')},
+                              request.data.get('title', ''), request.data.get('tracker', ''))
+        if not fields:
+            return Response({'detail': 'key or url required'}, status=400)
+        qs, ids = _select_instances(request, request.data)
+        rows = _bulk_rows(qs.select_related('run').only('id', 'run_id', 'run__project_id'), ids)
+        found = {row.id: row.run.project_id for row in rows}
+        _require_project_roles(request, found.values(), self.allowed_roles_actions['bulk'])
+        user_id = getattr(request.user, 'id', None)
+        existing = set(
+            DefectLink.objects.filter(instance_id__in=found.keys(), key=fields['key']).values_list('instance_id', flat=True)
+        )
+        DefectLink.objects.bulk_create([
+            DefectLink(instance_id=inst_id, project_id=project_id, created_by_user_id=user_id, **fields)
+            for inst_id, project_id in found.items() if inst_id not in existing
+        ], ignore_conflicts=True)
+        return Response({'key': fields['key'], 'linked': len(found) - len(existing), 'already_linked': len(existing)},
+                        status=status.HTTP_201_CREATED)
+
+
+class InstanceArtifactViewSet(mixins.ListModelMixin,
+                              mixins.RetrieveModelMixin,
+                              mixins.DestroyModelMixin,
+                              viewsets.GenericViewSet):
+    queryset = InstanceArtifact.objects.select_related('project').all().order_by('-created_at')
+    serializer_class = InstanceArtifactSerializer
+    permission_classes = [IsAuthenticated, IsTenantMember, TenantRBACPermission]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['project', 'instance', 'instance__run', 'kind', 'status']
+    ordering_fields = ['created_at', 'size']
+    allowed_roles_write = ('owner', 'admin')
+    allowed_roles_delete = ('owner', 'admin')
+    allowed_roles_actions = {
+        'complete': ('owner', 'admin', 'member'),
+    }
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        tenant_id = getattr(self.request, 'tenant_id', None)
+        if tenant_id:
+            qs = qs.filter(project__tenant_id=tenant_id)
+        return qs
+
+    def perform_destroy(self, artifact):
+        sha, tenant_id, project_id = artifact.sha256, artifact.project.tenant_id, artifact.project_id
+        artifact.delete()
+        # Bytes are shared by every artifact of the project with the same content
+        if not InstanceArtifact.objects.filter(sha256=sha, project_id=project_id).exists():
+            storage.get_storage().delete(storage.content_key(tenant_id, project_id, sha))
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Confirm a direct upload: the object must exist in storage with the declared size."""
+        artifact = self.get_object()
+        if artifact.status != 'uploaded':
+            size = storage.get_storage().size_of(
+                storage.content_key(artifact.project.tenant_id, artifact.project_id, artifact.sha256),
+            )
+            if size is None:
+                return Response({'detail': 'Upload not found in storage'}, status=409)
+            if size != artifact.size:
+                return Response({'detail': f'Stored size {size} differs from declared {artifact.size}'}, status=409)
+            artifact.status = 'uploaded'
+            artifact.uploaded_at = timezone.now()
+            artifact.save(update_fields=['status', 'uploaded_at'])
+        return Response(self.get_serializer(artifact).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Presigned download URL (valid ARTIFACT_URL_EXPIRES_SECONDS); bytes never pass through TMS."""
+        artifact = self.get_object()
+        if artifact.status != 'uploaded':
+            return Response({'detail': 'Artifact is not uploaded yet'}, status=409)
+        url = storage.get_storage().download_url(
+            storage.content_key(artifact.project.tenant_id, artifact.project_id, artifact.sha256),
+            artifact.name, artifact.content_type,
+        )
+        return Response({'url': url, 'expires_in': settings.ARTIFACT_URL_EXPIRES_SECONDS})
+
 
 class TestImportJobViewSet(mixins.CreateModelMixin,
                            mixins.ListModelMixin,
@@ -815,39 +2083,3 @@ def _process_export_job(job: TestExportJob):
         job.error_message = str(exc)
         job.finished_at = timezone.now()
         job.save(update_fields=['status', 'error_message', 'finished_at'])
-
-    @action(detail=True, methods=['post'])
-    def skip(self, request, pk=None):
-        inst = self.get_object()
-        self._finish(inst, 'skipped')
-        return Response(self.get_serializer(inst).data)
-
-    @action(detail=True, methods=['post'])
-    def link_defect(self, request, pk=None):
-        inst = self.get_object()
-        bug_url = request.data.get('url') or request.data.get('bug_url')
-        if not bug_url:
-            return Response({'detail': 'url or bug_url required'}, status=400)
-        defect_entry = {
-            'url': bug_url,
-            'title': request.data.get('title', ''),
-            'note': request.data.get('note', ''),
-            'linked_at': timezone.now().isoformat(),
-        }
-        defects = inst.defects or []
-        defects.append(defect_entry)
-        inst.defects = defects
-        inst.save(update_fields=['defects'])
-        return Response(self.get_serializer(inst).data)
-
-    @action(detail=True, methods=['post'])
-    def link_defect(self, request, pk=None):
-        inst = self.get_object()
-        defect = request.data.get('defect')
-        if not defect:
-            return Response({'detail': 'defect required'}, status=400)
-        defects = list(inst.defects or [])
-        defects.append(defect)
-        inst.defects = defects
-        inst.save(update_fields=['defects'])
-        return Response(self.get_serializer(inst).data)
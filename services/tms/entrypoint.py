@@ -49,5 +49,10 @@ def wait_for_db():
 if __name__ == '__main__':
     wait_for_db()
     subprocess.check_call(['python', 'manage.py', 'migrate', '--noinput'])
-    subprocess.check_call(['python', 'manage.py', 'runserver', '0.0.0.0:8000'])
+    if os.getenv('WEB_SERVER', 'gunicorn') == 'runserver':
+        # Autoreload for local work; every open SSE stream holds a thread here
+        subprocess.check_call(['python', 'manage.py', 'runserver', '0.0.0.0:8000'])
+    else:
+        # gevent workers park each SSE stream on a greenlet instead of a whole worker (see gunicorn.conf.py)
+        subprocess.check_call(['gunicorn', 'tms_service.wsgi:application', '--config', 'gunicorn.conf.py'])
 
@@ -0,0 +1,15 @@
+import os
+
+
+# SSE streams stay open for up to SSE_MAX_STREAM_SECONDS; with gevent each one is a
+# greenlet waiting on Redis, so a handful of processes serve many subscribers
+bind = '0.0.0.0:8000'
+worker_class = 'gevent'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+
+def post_fork(server, worker):
+    # Let psycopg2 yield to other greenlets while waiting on Postgres
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
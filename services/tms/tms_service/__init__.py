@@ -1,2 +1,3 @@
-__all__ = []
+from .celery import app as celery_app
 
+__all__ = ('celery_app',)
@@ -0,0 +1,27 @@
+import os
+from celery import Celery
+from datetime import timedelta
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tms_service.settings')
+
+app = Celery('tms_service')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+# Work-queue sweeper: put instances with expired leases back into the queue
+reclaim_seconds = int(os.getenv('RECLAIM_LEASES_EVERY_SECONDS', '60'))
+# Scheduled-run launcher: start planned runs whose scheduled_at is due
+launch_seconds = int(os.getenv('LAUNCH_SCHEDULED_RUNS_EVERY_SECONDS', '30'))
+
+app.conf.beat_schedule = {}
+if reclaim_seconds > 0:
+    app.conf.beat_schedule['reclaim-expired-leases'] = {
+        'task': 'core.tasks.reclaim_expired_leases_task',
+        'schedule': timedelta(seconds=reclaim_seconds),
+    }
+if launch_seconds > 0:
+    app.conf.beat_schedule['launch-scheduled-runs'] = {
+        'task': 'core.tasks.launch_scheduled_runs_task',
+        'schedule': timedelta(seconds=launch_seconds),
+    }
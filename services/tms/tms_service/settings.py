@@ -114,8 +114,65 @@ CACHES = {
     }
 }
 
+# Live run events (Server-Sent Events over Redis pub/sub)
+SSE_HEARTBEAT_SECONDS = env.int('SSE_HEARTBEAT_SECONDS', default=15)
+# Streams are closed after this long; clients reconnect on their own
+SSE_MAX_STREAM_SECONDS = env.int('SSE_MAX_STREAM_SECONDS', default=300)
+
+# Run work queue: how long a claimed instance stays leased (sweeper interval: RECLAIM_LEASES_EVERY_SECONDS, see celery.py)
+TEST_INSTANCE_LEASE_SECONDS = env.int('TEST_INSTANCE_LEASE_SECONDS', default=1800)
+# Longest lease a client may ask for with `lease_seconds`; larger values are rejected
+TEST_INSTANCE_LEASE_MAX_SECONDS = env.int('TEST_INSTANCE_LEASE_MAX_SECONDS', default=14400)
+# Scheduled runs started per launcher tick (interval: LAUNCH_SCHEDULED_RUNS_EVERY_SECONDS, see celery.py)
+SCHEDULED_RUNS_BATCH = env.int('SCHEDULED_RUNS_BATCH', default=20)
+# A scheduled run that fails to start is retried this much later instead of blocking the queue
+SCHEDULED_RUN_RETRY_SECONDS = env.int('SCHEDULED_RUN_RETRY_SECONDS', default=300)
+# Upper bound of instances one bulk assign/status/defect request may address
+TEST_INSTANCE_BULK_MAX = env.int('TEST_INSTANCE_BULK_MAX', default=10000)
+# Upper bound of test cases one bulk_update request may address
+TEST_CASE_BULK_MAX = env.int('TEST_CASE_BULK_MAX', default=10000)
+
+# Shard planner: duration history window, its cache TTL and the estimate for unseen tests
+SHARD_HISTORY_DAYS = env.int('SHARD_HISTORY_DAYS', default=90)
+SHARD_DURATIONS_CACHE_SECONDS = env.int('SHARD_DURATIONS_CACHE_SECONDS', default=600)
+SHARD_DEFAULT_DURATION_SECONDS = env.int('SHARD_DEFAULT_DURATION_SECONDS', default=60)
+# Effort of a never-executed case per step, for run auto_assign
+AUTO_ASSIGN_SECONDS_PER_STEP = env.int('AUTO_ASSIGN_SECONDS_PER_STEP', default=60)
+
+# Run comparison results are cached once both runs are completed
+RUN_COMPARE_CACHE_SECONDS = env.int('RUN_COMPARE_CACHE_SECONDS', default=86400)
+# Upper bound for a cached traceability matrix; result writes invalidate it earlier
+TRACEABILITY_CACHE_SECONDS = env.int('TRACEABILITY_CACHE_SECONDS', default=3600)
+# Upper bound for cached defect lists of release readiness; counter changes refresh them earlier
+READINESS_CACHE_SECONDS = env.int('READINESS_CACHE_SECONDS', default=600)
+# Widest trends query (hour/day buckets) over the execution rollups
+TRENDS_MAX_BUCKETS = env.int('TRENDS_MAX_BUCKETS', default=1000)
+# Tenant portfolio: recent pass-rate window (days) and upper bound for cached case counts
+PORTFOLIO_DAYS = env.int('PORTFOLIO_DAYS', default=14)
+PORTFOLIO_CACHE_SECONDS = env.int('PORTFOLIO_CACHE_SECONDS', default=3600)
+# Version diffs are keyed by immutable content hashes, so this only bounds cache size
+VERSION_DIFF_CACHE_SECONDS = env.int('VERSION_DIFF_CACHE_SECONDS', default=86400)
+
+# Flakiness: number of most recent pass/fail outcomes per test case that are scored (max 100)
+FLAKY_WINDOW = min(env.int('FLAKY_WINDOW', default=20), 100)
+
 TEST_MANAGER_IMPORT_ROOT = env('TEST_MANAGER_IMPORT_ROOT', default=str(BASE_DIR / 'test_manager_imports'))
 TEST_MANAGER_EXPORT_ROOT = env('TEST_MANAGER_EXPORT_ROOT', default=str(BASE_DIR / 'test_manager_exports'))
+TEST_MANAGER_ARTIFACT_ROOT = env('TEST_MANAGER_ARTIFACT_ROOT', default=str(BASE_DIR / 'test_manager_artifacts'))
+
+# Instance artifacts: 's3' (MinIO/S3, presigned direct upload/download) or 'local' (filesystem stand-in)
+ARTIFACT_STORAGE = env('ARTIFACT_STORAGE', default='local')
+ARTIFACT_S3_ENDPOINT_URL = env('ARTIFACT_S3_ENDPOINT_URL', default='http://minio:9000')
+# Address clients use for presigned URLs (the in-cluster endpoint is usually not reachable from outside)
+ARTIFACT_S3_PUBLIC_ENDPOINT_URL = env('ARTIFACT_S3_PUBLIC_ENDPOINT_URL', default=None)
+ARTIFACT_S3_BUCKET = env('ARTIFACT_S3_BUCKET', default='tms-artifacts')
+ARTIFACT_S3_ACCESS_KEY = env('ARTIFACT_S3_ACCESS_KEY', default=None)
+ARTIFACT_S3_SECRET_KEY = env('ARTIFACT_S3_SECRET_KEY', default=None)
+ARTIFACT_S3_REGION = env('ARTIFACT_S3_REGION', default='us-east-1')
+ARTIFACT_URL_EXPIRES_SECONDS = env.int('ARTIFACT_URL_EXPIRES_SECONDS', default=900)
+ARTIFACT_MAX_BYTES = env.int('ARTIFACT_MAX_BYTES', default=500 * 1024 * 1024)
+# actual_result longer than this is stored as an artifact; the row keeps a preview
+ACTUAL_RESULT_PREVIEW_CHARS = env.int('ACTUAL_RESULT_PREVIEW_CHARS', default=4000)
 
 # Inter-service config
 ORGS_BASE_URL = env('ORGS_BASE_URL', default='http://orgs:8000/api')
@@ -124,3 +181,10 @@ SERVICES_JWT_SECRET = env('SERVICES_JWT_SECRET', default=None)
 SERVICES_JWT_ISSUER = env('SERVICES_JWT_ISSUER', default='tms')
 SERVICES_JWT_AUDIENCE = env('SERVICES_JWT_AUDIENCE', default='orgs')
 AUTH_BASE_URL = env('AUTH_BASE_URL', default='http://auth:8000/api')
+
+# Distributed tracing (OpenTelemetry, W3C traceparent propagation)
+OTEL_ENABLED = env.bool('OTEL_ENABLED', default=False)
+OTEL_SERVICE_NAME = env('OTEL_SERVICE_NAME', default=env('SERVICE_NAME', default='tms'))
+OTEL_EXPORTER_OTLP_ENDPOINT = env('OTEL_EXPORTER_OTLP_ENDPOINT', default=None)
+OTEL_TRACES_FILE = env('OTEL_TRACES_FILE', default=None)
+OTEL_TRACES_SAMPLER_RATIO = env.float('OTEL_TRACES_SAMPLER_RATIO', default=1.0)
@@ -1,11 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from core.views import health
+from core.views import health, artifact_blob
 from core.viewsets import (
     ProjectViewSet, TestCaseViewSet, SuiteViewSet, SuiteCaseViewSet,
     ReleaseViewSet, TestCaseVersionViewSet, TestPlanViewSet, PlanItemViewSet,
-    TestRunViewSet, TestInstanceViewSet,
+    TestRunViewSet, TestInstanceViewSet, InstanceArtifactViewSet, DefectLinkViewSet,
     TestSectionViewSet, TestTagViewSet, RequirementViewSet,
     TestImportJobViewSet, TestExportJobViewSet,
 )
@@ -25,12 +25,15 @@ router.register(r'plans', TestPlanViewSet, basename='testplan')
 router.register(r'plan-items', PlanItemViewSet, basename='planitem')
 router.register(r'runs', TestRunViewSet, basename='testrun')
 router.register(r'instances', TestInstanceViewSet, basename='testinstance')
+router.register(r'artifacts', InstanceArtifactViewSet, basename='artifact')
+router.register(r'defect-links', DefectLinkViewSet, basename='defectlink')
 router.register(r'import-jobs', TestImportJobViewSet, basename='importjob')
 router.register(r'export-jobs', TestExportJobViewSet, basename='exportjob')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health', health),
+    path('api/artifacts/blob/<str:token>', artifact_blob, name='artifact-blob'),
     path('api/', include(router.urls)),
     path('api/schema', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs', SpectacularSwaggerView.as_view(url_name='schema')),